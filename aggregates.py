@@ -0,0 +1,123 @@
+from datetime import date
+from sqlalchemy import func, case, and_
+from app import db
+from models import Job, WorkOrder, Operation, NCRTracker
+
+NCR_GROUPS = ('category', 'work_center', 'month')
+
+
+def work_center_totals(work_center=None, work_centers=None, as_of=None):
+    """Planned/actual hour totals per work center from one GROUP BY query.
+
+    Returns {work_center: {"planned_hours", "actual_hours", "remaining_hours",
+    "overdue_hours", "operation_count", "open_count"}}, where overdue hours
+    are the remaining hours of open operations scheduled before as_of
+    (today by default). Pass work_center or a list of work_centers to
+    restrict the query.
+    """
+    planned = func.coalesce(Operation.planned_hours, 0)
+    actual = func.coalesce(Operation.actual_hours, 0)
+    is_open = func.coalesce(Operation.status, '') != 'Completed'
+    is_overdue = and_(is_open, Operation.scheduled_date < (as_of or date.today()))
+
+    query = db.session.query(
+        Operation.work_center,
+        func.sum(planned),
+        func.sum(actual),
+        func.sum(case((is_open, planned - actual), else_=0)),
+        func.sum(case((is_overdue, planned - actual), else_=0)),
+        func.count(Operation.id),
+        func.sum(case((is_open, 1), else_=0)),
+    ).group_by(Operation.work_center)
+    if work_center is not None:
+        query = query.filter(Operation.work_center == work_center)
+    if work_centers is not None:
+        query = query.filter(Operation.work_center.in_(list(work_centers)))
+
+    return {
+        name: {
+            "planned_hours": float(planned_hours or 0),
+            "actual_hours": float(actual_hours or 0),
+            "remaining_hours": float(remaining_hours or 0),
+            "overdue_hours": float(overdue_hours or 0),
+            "operation_count": operation_count,
+            "open_count": int(open_count or 0),
+        }
+        for name, planned_hours, actual_hours, remaining_hours, overdue_hours, operation_count, open_count
+        in query.all()
+    }
+
+
+def _month(column):
+    """YYYY-MM text of a datetime column in the bound database's dialect."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return func.strftime('%Y-%m', column)
+    if dialect == 'mysql':
+        return func.date_format(column, '%Y-%m')
+    return func.to_char(column, 'YYYY-MM')
+
+
+def iso_date(column):
+    """YYYY-MM-DD text of a date column, independent of server date settings.
+
+    A plain cast to text follows PostgreSQL's DateStyle, which need not be ISO.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return func.strftime('%Y-%m-%d', column)
+    if dialect == 'mysql':
+        return func.date_format(column, '%Y-%m-%d')
+    return func.to_char(column, 'YYYY-MM-DD')
+
+
+def ncr_totals(group_by='category', criteria=()):
+    """NCR count, overrun hours and financial impact per group from one GROUP BY.
+
+    group_by is one of NCR_GROUPS; work_center is the work center of the
+    operation the NCR was raised on, found through the tracker key.
+    criteria are extra SQL filters on NCRTracker. Returns a list of
+    {"group", "count", "overrun_hours", "financial_impact"} ordered by group.
+    """
+    if group_by == 'category':
+        group = NCRTracker.issue_category
+    elif group_by == 'work_center':
+        group = Operation.work_center
+    elif group_by == 'month':
+        group = _month(NCRTracker.created_at)
+    else:
+        raise ValueError(f"group_by must be one of {', '.join(NCR_GROUPS)}")
+
+    query = db.session.query(
+        group.label('group'),
+        func.count(NCRTracker.id),
+        func.sum(NCRTracker.actual_hours - NCRTracker.planned_hours),
+        func.sum(func.coalesce(NCRTracker.financial_impact, 0)),
+    )
+    if group_by == 'work_center':
+        query = (
+            query.select_from(NCRTracker)
+            .outerjoin(Job, Job.job_number == NCRTracker.job_number)
+            .outerjoin(WorkOrder, and_(WorkOrder.job_id == Job.id, WorkOrder.work_order_number == NCRTracker.work_order))
+            .outerjoin(Operation, and_(
+                Operation.work_order_id == WorkOrder.id,
+                Operation.operation_number == NCRTracker.operation_number,
+            ))
+        )
+    query = query.filter(*criteria).group_by(group).order_by(group)
+
+    return [
+        {
+            "group": name,
+            "count": count,
+            "overrun_hours": round(float(overrun or 0), 2),
+            "financial_impact": round(float(impact or 0), 2),
+        }
+        for name, count, overrun, impact in query.all()
+    ]
+
+
+def efficiency_percent(totals):
+    """Actual hours as a rounded percentage of planned hours."""
+    planned = totals["planned_hours"]
+    return round((totals["actual_hours"] / planned * 100) if planned else 0)
@@ -0,0 +1,122 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import request, make_response
+from app import app
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_version_lock = threading.Lock()
+_dataset_version = 0
+
+
+def dataset_version():
+    return _dataset_version
+
+
+def bump_dataset_version(reason=None):
+    """Invalidate every cached read response; call after any data change."""
+    global _dataset_version
+    with _version_lock:
+        _dataset_version += 1
+        version = _dataset_version
+    response_cache.clear()
+    logger.debug(f"Dataset version {version} ({reason or 'unspecified change'})")
+    return version
+
+
+class ResponseCache:
+    """Size-bounded LRU of rendered JSON bodies with hit/miss counters."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, etag):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key)[0])
+            self._entries[key] = (body, etag)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (old_body, _) = self._entries.popitem(last=False)
+                self.size -= len(old_body)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+                "dataset_version": dataset_version(),
+            }
+
+
+response_cache = ResponseCache(app.config.get("RESPONSE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+
+
+def _conditional(body, etag):
+    response = make_response(body)
+    response.mimetype = "application/json"
+    response.set_etag(etag)
+    # Browsers may keep the body but must revalidate, which costs a 304
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def cached_json(view):
+    """Serve a GET JSON view from the response cache with a strong ETag.
+
+    Entries are keyed by endpoint, query arguments and dataset version, so a
+    bump_dataset_version() call makes every stored body unreachable. Error
+    and streamed responses pass through uncached.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = (request.endpoint, tuple(sorted(request.args.items(multi=True))), dataset_version())
+        entry = response_cache.get(key)
+        if entry is not None:
+            return _conditional(*entry)
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200 or response.is_streamed or not response.is_json:
+            return response
+        body = response.get_data()
+        etag = hashlib.sha1(body).hexdigest()
+        response_cache.put(key, body, etag)
+        return _conditional(body, etag)
+
+    return wrapper
@@ -25,7 +25,7 @@ app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # Limit upload size to 16MB
 
 # Configure logging
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
@@ -36,6 +36,27 @@ db.init_app(app)
 # Create upload folder if it doesn't exist
 UPLOAD_FOLDER = "C:/New folder/uploads"
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+# Parsed uploads are cached by content hash under UPLOAD_FOLDER/parsed_cache
+app.config["UPLOAD_CACHE_ENABLED"] = True
+app.config["UPLOAD_CACHE_MAX_BYTES"] = int(os.environ.get("UPLOAD_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# In-process cache of rendered read-API responses, invalidated on data changes
+app.config["RESPONSE_CACHE_MAX_BYTES"] = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Buffered change events per /api/events client before it is dropped as too slow
+app.config["EVENT_QUEUE_SIZE"] = int(os.environ.get("EVENT_QUEUE_SIZE", 256))
+# Processes for what-if capacity scenarios (0 = one per CPU)
+app.config["SCENARIO_WORKERS"] = int(os.environ.get("SCENARIO_WORKERS", 0))
+# Hand uploads to the standalone ingest worker (ingest_worker.py) instead of
+# parsing them in the web process; INGEST_WORKERS is its process count
+app.config["INGEST_QUEUE"] = os.environ.get("INGEST_QUEUE", "0") == "1"
+app.config["INGEST_WORKERS"] = int(os.environ.get("INGEST_WORKERS", 2))
+# SQL statements at least this slow are logged to the "slow_query" logger (0 = off)
+app.config["SLOW_QUERY_SECONDS"] = float(os.environ.get("SLOW_QUERY_SECONDS", 0.5))
+# Requests sent with an X-Profile header are run under cProfile and dumped to PROFILE_DIR
+app.config["PROFILING_ENABLED"] = os.environ.get("PROFILING_ENABLED", "0") == "1"
+app.config["PROFILE_DIR"] = os.environ.get("PROFILE_DIR")
+# Serve /api/jobs, /api/job_details, /api/work_centers and /api/forecast from
+# a columnar copy of the plant loaded once per dataset version (plant_model.py)
+app.config["PLANT_MODEL_ENABLED"] = os.environ.get("PLANT_MODEL", "1") == "1"
 
 
 # Import routes after app initialization to avoid circular imports
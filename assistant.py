@@ -0,0 +1,284 @@
+import re
+import time
+import logging
+import threading
+from datetime import date
+import pandas as pd
+from sqlalchemy import func, case, and_
+from app import db
+from models import Job, WorkOrder, Operation, NCRTracker
+from api_cache import dataset_version
+from aggregates import efficiency_percent
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP = 5
+MAX_TOP = 20
+HOUR_FIELDS = ('planned_hours', 'actual_hours', 'remaining_hours', 'overdue_hours', 'overrun_hours')
+COUNT_FIELDS = ('operation_count', 'open_count', 'overdue_count')
+
+HELP_TEXT = (
+    "I can help you with:\n"
+    "- Number of jobs in progress\n"
+    "- Work center efficiency\n"
+    "- Remaining work for specific jobs\n"
+    "- Late jobs\n"
+    "- Work centers with the most overrun hours\n"
+    "- NCR cost, overall or for a job\n"
+    "Please ask me about these topics!"
+)
+
+# Order numbers are long; short numbers are counts ("top 3")
+JOB_NUMBER = re.compile(r'\b\d{4,}\b')
+TOP_COUNT = re.compile(r'\b(?:top|first|worst|(?:the\s+)?(?:most|biggest))\s+(\d{1,3})\b|\b(\d{1,3})\s+(?:late|overdue|jobs|work\s*centers?)\b')
+WORK_CENTER_PHRASE = re.compile(r'work\s*cent(?:er|re)s?\s+([\w\- ]+)')
+
+_index = None
+_index_lock = threading.Lock()
+
+
+class ChatIndex:
+    """Per-job and per-work-center summaries the assistant answers from.
+
+    Built from one GROUP BY over operations and one over NCR trackers.
+    Lookups are dict reads and rankings are pre-sorted, so answering costs
+    no SQL and at most a slice of a list.
+    """
+
+    def __init__(self, key, jobs, work_centers, ncr):
+        self.key = key
+        self.jobs = jobs
+        self.work_centers = {wc['name'].lower(): wc for wc in work_centers.values()}
+        self.jobs_in_progress = sum(1 for job in jobs.values() if job['open_count'])
+        self.late_jobs = sorted(
+            (job for job in jobs.values() if job['overdue_count']),
+            key=lambda job: (-job['overdue_hours'], job['job_number']),
+        )
+        self.overrun_work_centers = sorted(
+            (wc for wc in work_centers.values() if wc['overrun_hours'] > 0),
+            key=lambda wc: (-wc['overrun_hours'], wc['name']),
+        )
+        self.ncr = ncr
+        self.ncr_by_cost = sorted(ncr.values(), key=lambda row: (-row['financial_impact'], row['job_number']))
+        self.ncr_total = {
+            'count': sum(row['count'] for row in ncr.values()),
+            'financial_impact': round(sum(row['financial_impact'] for row in ncr.values()), 2),
+        }
+
+    def work_center(self, name):
+        return self.work_centers.get(name.strip().lower())
+
+
+def _summaries(frame, key):
+    totals = frame.groupby(key, sort=False)[list(HOUR_FIELDS + COUNT_FIELDS)].sum()
+    totals[list(HOUR_FIELDS)] = totals[list(HOUR_FIELDS)].round(2)
+    totals[list(COUNT_FIELDS)] = totals[list(COUNT_FIELDS)].astype('int64')
+    return totals
+
+
+def build_index(as_of):
+    """Aggregate operations per (job, work center) in SQL and roll them up both ways."""
+    planned = func.coalesce(Operation.planned_hours, 0)
+    actual = func.coalesce(Operation.actual_hours, 0)
+    is_open = func.coalesce(Operation.status, '') != 'Completed'
+    is_overdue = and_(is_open, Operation.scheduled_date < as_of)
+    query = (
+        db.session.query(
+            Job.job_number,
+            Job.customer_name,
+            Operation.work_center,
+            func.sum(planned),
+            func.sum(actual),
+            func.sum(case((is_open, planned - actual), else_=0)),
+            func.sum(case((is_overdue, planned - actual), else_=0)),
+            func.sum(case((actual > planned, actual - planned), else_=0)),
+            func.count(Operation.id),
+            func.sum(case((is_open, 1), else_=0)),
+            func.sum(case((is_overdue, 1), else_=0)),
+        )
+        .join(WorkOrder, WorkOrder.job_id == Job.id)
+        .join(Operation, Operation.work_order_id == WorkOrder.id)
+        .group_by(Job.job_number, Job.customer_name, Operation.work_center)
+    )
+    # Raw DBAPI rows: SQLAlchemy's per-row processing would double the build time
+    result = db.session.connection().execute(query.statement)
+    frame = pd.DataFrame.from_records(result.cursor.fetchall(), columns=['job_number', 'customer_name', 'work_center', *HOUR_FIELDS, *COUNT_FIELDS])
+    frame[list(HOUR_FIELDS + COUNT_FIELDS)] = frame[list(HOUR_FIELDS + COUNT_FIELDS)].fillna(0)
+
+    jobs = {}
+    customers = frame.groupby('job_number', sort=False)['customer_name'].first().to_dict()
+    for job_number, totals in _summaries(frame, 'job_number').to_dict('index').items():
+        jobs[job_number] = dict(totals, job_number=job_number,
+                                customer_name=customers[job_number] or "Unknown Customer")
+    work_centers = {
+        name: dict(totals, name=name)
+        for name, totals in _summaries(frame, 'work_center').to_dict('index').items()
+    }
+
+    ncr = {
+        job_number: {'job_number': job_number, 'count': count, 'financial_impact': round(float(impact or 0), 2)}
+        for job_number, count, impact in db.session.query(
+            NCRTracker.job_number,
+            func.count(NCRTracker.id),
+            func.sum(func.coalesce(NCRTracker.financial_impact, 0)),
+        ).group_by(NCRTracker.job_number)
+    }
+    return jobs, work_centers, ncr
+
+
+def get_index(as_of=None):
+    """The ChatIndex for the current dataset version, rebuilt after any change.
+
+    Ingest and schedule changes bump the dataset version, so the first
+    question after one pays for the rebuild; concurrent askers wait for it
+    instead of building their own.
+    """
+    global _index
+    as_of = as_of or date.today()
+    key = (dataset_version(), as_of)
+    index = _index
+    if index is not None and index.key == key:
+        return index
+    with _index_lock:
+        if _index is not None and _index.key == key:
+            return _index
+        started = time.perf_counter()
+        _index = ChatIndex(key, *build_index(as_of))
+        logger.info(
+            f"Chat index of {len(_index.jobs)} jobs and {len(_index.work_centers)} work centers "
+            f"built in {time.perf_counter() - started:.2f}s"
+        )
+        return _index
+
+
+def _top(message):
+    match = TOP_COUNT.search(message)
+    if not match:
+        return DEFAULT_TOP
+    return max(1, min(int(match.group(1) or match.group(2)), MAX_TOP))
+
+
+def _work_center_in(message, index):
+    """A known work center named in message, after "work center" or as a word."""
+    phrase = WORK_CENTER_PHRASE.search(message)
+    if phrase:
+        words = phrase.group(1).split()
+        # Longest leading run of words that names a work center
+        for end in range(len(words), 0, -1):
+            found = index.work_center(' '.join(words[:end]))
+            if found:
+                return found
+    for word in re.findall(r'[\w\-]+', message):
+        found = index.work_center(word)
+        if found:
+            return found
+    return None
+
+
+def parse_intent(message, index):
+    """Map a question to (intent, params); intent "help" if nothing matches."""
+    text = message.lower()
+    job = JOB_NUMBER.search(text)
+    job_number = job.group(0) if job else None
+
+    if 'ncr' in text and re.search(r'\b(cost|costs|impact|spend|spent|money|financial)\b|\$', text):
+        return 'ncr_cost', {'job_number': job_number, 'top': _top(text)}
+    if re.search(r'\b(late|overdue|behind( schedule)?|past due)\b', text):
+        return 'late_jobs', {'top': _top(text)}
+    if re.search(r'\boverrun|over (plan|budget|estimate)', text):
+        return 'overrun_work_centers', {'top': _top(text)}
+    if 'efficiency' in text:
+        return 'efficiency', {'work_center': _work_center_in(text, index), 'raw': text}
+    if re.search(r'\bremaining\b|\bleft\b', text) and job_number:
+        return 'remaining_work', {'job_number': job_number}
+    # "Is job 100003 in progress?" asks about that job, not the plant-wide count
+    if job_number:
+        return 'job_summary', {'job_number': job_number}
+    if re.search(r'\bjobs?\b', text) and re.search(r'in progress|\bopen\b|\bactive\b|\bwip\b', text):
+        return 'jobs_in_progress', {}
+    return 'help', {}
+
+
+def _hours(value):
+    return f"{value:.1f}"
+
+
+def _answer(intent, params, index):
+    if intent == 'jobs_in_progress':
+        return f"There are currently {index.jobs_in_progress} jobs in progress."
+
+    if intent == 'efficiency':
+        wc = params['work_center']
+        if wc is not None:
+            return f"The efficiency for {wc['name']} is {efficiency_percent(wc)}%"
+        name = params['raw'].split('work center')[-1].strip() if 'work center' in params['raw'] else ''
+        if name:
+            return f"Could not find data for work center: {name}"
+        known = ', '.join(sorted(center['name'] for center in index.work_centers.values()))
+        return f"Which work center? Known work centers: {known}"
+
+    if intent in ('remaining_work', 'job_summary'):
+        job = index.jobs.get(params['job_number'])
+        if job is None:
+            return f"Could not find job number: {params['job_number']}"
+        if intent == 'remaining_work':
+            return f"Job {job['job_number']} has {job['remaining_hours']:.1f} hours of remaining work."
+        ncr = index.ncr.get(job['job_number'])
+        lines = [
+            f"Job {job['job_number']} ({job['customer_name']}): {job['open_count']} of "
+            f"{job['operation_count']} operations open, {_hours(job['remaining_hours'])} hours remaining.",
+        ]
+        if job['overdue_count']:
+            lines.append(f"{job['overdue_count']} operations are late ({_hours(job['overdue_hours'])} hours).")
+        if ncr:
+            lines.append(f"{ncr['count']} NCRs, ${ncr['financial_impact']:,.2f} impact.")
+        return ' '.join(lines)
+
+    if intent == 'late_jobs':
+        if not index.late_jobs:
+            return "No jobs are late."
+        top = index.late_jobs[:params['top']]
+        lines = [f"{len(index.late_jobs)} jobs are late. Most overdue hours:"]
+        lines += [
+            f"- Job {job['job_number']} ({job['customer_name']}): {job['overdue_count']} operations, "
+            f"{_hours(job['overdue_hours'])} hours overdue"
+            for job in top
+        ]
+        return '\n'.join(lines)
+
+    if intent == 'overrun_work_centers':
+        if not index.overrun_work_centers:
+            return "No work center has overrun its planned hours."
+        lines = ["Work centers with the most overrun hours:"]
+        lines += [
+            f"- {wc['name']}: {_hours(wc['overrun_hours'])} hours over plan "
+            f"({efficiency_percent(wc)}% of planned hours used)"
+            for wc in index.overrun_work_centers[:params['top']]
+        ]
+        return '\n'.join(lines)
+
+    if intent == 'ncr_cost':
+        if params['job_number']:
+            ncr = index.ncr.get(params['job_number'])
+            if ncr is None:
+                return f"Job {params['job_number']} has no NCRs."
+            return f"Job {ncr['job_number']} has {ncr['count']} NCRs costing ${ncr['financial_impact']:,.2f}."
+        if not index.ncr_by_cost:
+            return "There are no NCRs."
+        lines = [
+            f"{index.ncr_total['count']} NCRs cost ${index.ncr_total['financial_impact']:,.2f} in total. Costliest jobs:"
+        ]
+        lines += [
+            f"- Job {row['job_number']}: ${row['financial_impact']:,.2f} ({row['count']} NCRs)"
+            for row in index.ncr_by_cost[:params['top']]
+        ]
+        return '\n'.join(lines)
+
+    return HELP_TEXT
+
+
+def answer(message):
+    """{"response", "intent"} for a chat message."""
+    index = get_index()
+    intent, params = parse_intent(message or '', index)
+    return {"response": _answer(intent, params, index), "intent": intent}
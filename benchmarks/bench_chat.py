@@ -0,0 +1,92 @@
+"""/api/chat latency at plant scale: SQL-per-question vs the chat index.
+
+Usage: python benchmarks/bench_chat.py [jobs] [questions per intent]
+
+Seeds a throwaway SQLite database (unless DATABASE_URL is set) with a
+generated plant (8 operations per job, so 12500 jobs is 100k operations),
+times one index build, then asks every intent repeatedly through the test
+client and reports p50/p99 latency. The three questions the assistant
+answered before are also timed with the queries it used to run.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+import logging
+import numpy as np
+
+from app import app, db
+from models import Job, WorkOrder, Operation
+from aggregates import work_center_totals
+from assistant import get_index
+from api_cache import bump_dataset_version
+from plantgen import generate_plant, seed_database
+import routes  # noqa: F401  registers the routes on app
+
+
+def legacy_jobs_in_progress():
+    return Job.query.join(WorkOrder).join(Operation).filter(Operation.status != 'Completed').distinct().count()
+
+
+def legacy_remaining_work(job_number):
+    """Lazy relationships, one query per work order."""
+    job = Job.query.filter_by(job_number=job_number).first()
+    return sum(op.planned_hours - op.actual_hours
+               for wo in job.work_orders for op in wo.operations if op.status != 'Completed')
+
+
+def latencies(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return np.percentile(times, 50), np.percentile(times, 99)
+
+
+def main(jobs=12500, repeat=200):
+    logging.disable(logging.WARNING)
+    plant = generate_plant(jobs=jobs)
+    job_number = str(plant["sapdata"]["Order"].iloc[len(plant["sapdata"]) // 2])
+    client = app.test_client()
+    questions = [
+        "How many jobs in progress?",
+        "What is the efficiency of work center CNC",
+        f"Remaining work for job {job_number}",
+        f"Job {job_number}",
+        "Top 5 late jobs",
+        "Which work centers have the most overrun?",
+        "NCR cost by job",
+        f"NCR cost for job {job_number}",
+    ]
+    with app.app_context():
+        db.create_all()
+        seed_database(plant)
+        operations = db.session.query(Operation).count()
+
+        bump_dataset_version("benchmark")
+        started = time.perf_counter()
+        index = get_index()
+        build = time.perf_counter() - started
+        print(f"{operations} operations, {len(index.jobs)} jobs: index built in {build * 1000:.0f} ms")
+
+        print(f"{'question':<48} {'p50 ms':>8} {'p99 ms':>8}")
+        for label, fn in (
+            ("legacy: jobs in progress (DISTINCT count)", legacy_jobs_in_progress),
+            ("legacy: efficiency (GROUP BY)", lambda: work_center_totals().get("CNC")),
+            ("legacy: remaining work (lazy loads)", lambda: (legacy_remaining_work(job_number), db.session.expunge_all())),
+        ):
+            p50, p99 = latencies(fn, min(repeat, 50))
+            print(f"{label:<48} {p50:8.2f} {p99:8.2f}")
+        for question in questions:
+            p50, p99 = latencies(lambda: client.post("/api/chat", json={"message": question}), repeat)
+            print(f"{question:<48} {p50:8.2f} {p99:8.2f}")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,84 @@
+"""Peak memory and wall time of pd.read_excel vs the streaming chunk reader.
+
+Usage: python benchmarks/bench_excel_reader.py [rows ...]
+
+Each measurement runs in a fresh interpreter so peak RSS is not shared
+between modes. Workbooks are generated once into a temp directory. The
+"upload" mode runs the whole SAPDATA upload (excel_processor.process_sap_data,
+streamed delta sync included) into a throwaway SQLite database.
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HEADER = ["Order", "Oper./Act.", "Oper.WorkCenter", "Work", "Actual work"]
+WORK_CENTERS = ["CNC", "LATHE", "MILL", "WELD", "PAINT", "NCR", "ASSY"]
+
+
+def write_workbook(path, rows, ops_per_job=8):
+    """Write a synthetic SAPDATA workbook with openpyxl's write-only mode."""
+    import random
+    from openpyxl import Workbook
+
+    rng = random.Random(42)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADER)
+    for i in range(rows):
+        work = round(rng.uniform(0.5, 40), 2)
+        actual = None if rng.random() < 0.3 else round(work * rng.uniform(0, 1.3), 2)
+        sheet.append([100000 + i // ops_per_job, (i % ops_per_job + 1) * 10, rng.choice(WORK_CENTERS), work, actual])
+    workbook.save(path)
+
+
+def child(mode, path):
+    started = time.perf_counter()
+    rows = 0
+    if mode == "pandas":
+        import pandas as pd
+        df = pd.read_excel(path, engine="openpyxl")
+        df.columns = df.columns.str.strip().str.lower()
+        rows = len(df)
+    elif mode == "upload":
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+        import logging
+        logging.disable(logging.WARNING)
+        from app import app, db
+        from excel_processor import process_sap_data
+        app.config["UPLOAD_CACHE_ENABLED"] = False
+        with app.app_context():
+            db.create_all()
+            rows = process_sap_data(path)["rows"]
+    else:
+        from excel_reader import iter_excel_chunks
+        for chunk in iter_excel_chunks(path, dtypes={"work": "numeric", "actual work": "numeric"}):
+            rows += len(chunk)
+    elapsed = time.perf_counter() - started
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{rows} {elapsed:.2f} {peak_mb:.0f}")
+
+
+def main(sizes):
+    workdir = tempfile.mkdtemp()
+    for rows in sizes:
+        path = os.path.join(workdir, f"sapdata_{rows}.xlsx")
+        write_workbook(path, rows)
+        for mode in ("pandas", "stream", "upload"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, path],
+                check=True, capture_output=True, text=True,
+            ).stdout.split()
+            print(f"{rows:>8} rows  {mode:<7} {float(out[1]):8.2f}s  peak RSS {out[2]:>6} MB")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main([int(arg) for arg in sys.argv[1:]] or [50000, 500000])
@@ -0,0 +1,80 @@
+"""Forecast computation time against a large worklog history.
+
+Usage: python benchmarks/bench_forecast.py [operations] [worklog rows]
+
+Seeds a throwaway SQLite database (unless DATABASE_URL is set) with
+synthetic SAPDATA and worklog postings, then times the vectorized pass
+alone, the full plant_forecast() including its two SELECTs, and a cached
+call.
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+import numpy as np
+import pandas as pd
+
+from app import app, db
+from models import WorkLog
+from ingest import write_rows
+from utils import process_sapdata
+from forecasting import HISTORY_DAYS, forecast_frames, load_operations, load_worklog, plant_forecast
+from bench_sap_ingest import make_sapdata
+
+
+def make_worklog(sapdata, rows, as_of, seed=7):
+    """Postings spread over the history window for random SAPDATA operations."""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(sapdata), rows)
+    jobs = sapdata["Order"].to_numpy()[picks].astype(str)
+    operations = sapdata["Oper./Act."].to_numpy()[picks]
+    return pd.DataFrame({
+        "employee_id": rng.integers(1000, 1200, rows),
+        "employee_name": "Bench",
+        "job_number": jobs,
+        "work_order": operations.astype(str),
+        "operation_number": operations,
+        "actual_hours": rng.uniform(0.25, 8, rows).round(2),
+        "posting_date": as_of - pd.to_timedelta(rng.integers(0, HISTORY_DAYS, rows), unit="D"),
+    })
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main(operations=200000, worklog_rows=1000000):
+    as_of = date.today()
+    with app.app_context():
+        sapdata = make_sapdata(operations)
+        process_sapdata(sapdata, mode="bulk")
+        db.session.query(WorkLog).delete()
+        worklog = make_worklog(sapdata, worklog_rows, pd.Timestamp(as_of))
+        worklog["posting_date"] = worklog["posting_date"].dt.date
+        write_rows(WorkLog, worklog)
+        db.session.commit()
+
+        ops, load_ops = timed(load_operations)
+        log, load_log = timed(lambda: load_worklog(as_of))
+        (centers, jobs), compute = timed(lambda: forecast_frames(ops, log, as_of))
+        _, full = timed(lambda: plant_forecast(as_of))
+        _, cached = timed(lambda: plant_forecast(as_of))
+
+    print(f"{len(ops):>9} operations, {len(log):>9} worklog rows, {len(centers)} work centers, {len(jobs)} jobs")
+    print(f"  load operations   {load_ops * 1000:9.1f} ms")
+    print(f"  load worklog      {load_log * 1000:9.1f} ms")
+    print(f"  vectorized pass   {compute * 1000:9.1f} ms")
+    print(f"  plant_forecast()  {full * 1000:9.1f} ms")
+    print(f"  cached call       {cached * 1000:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
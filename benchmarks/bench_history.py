@@ -0,0 +1,63 @@
+"""Snapshot write and /api/history query times over a year of snapshots.
+
+Usage: python benchmarks/bench_history.py [operations] [days]
+
+Seeds a throwaway SQLite database (unless DATABASE_URL is set) with
+synthetic SAPDATA, writes one snapshot per day for the given number of
+days, then times an as-of lookup and a work center and single-job trend
+across the whole range.
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+from app import app, db
+from models import PlantSnapshot
+from utils import process_sapdata
+from snapshots import record_snapshot, snapshot_as_of, snapshot_trend
+from bench_sap_ingest import make_sapdata
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main(operations=50000, days=365):
+    end = datetime.now().replace(hour=18, minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=days - 1)
+    with app.app_context():
+        process_sapdata(make_sapdata(operations), mode="bulk")
+        db.session.query(PlantSnapshot).delete()
+
+        write = 0.0
+        for day in range(days):
+            written, seconds = timed(lambda: record_snapshot(start + timedelta(days=day)))
+            db.session.commit()
+            write += seconds
+        rows = db.session.query(PlantSnapshot).count()
+        job = db.session.query(PlantSnapshot.name).filter(PlantSnapshot.scope == "job").first()[0]
+
+        mid = (start + timedelta(days=days // 2)).date()
+        as_of, as_of_time = timed(lambda: snapshot_as_of(mid))
+        _, job_as_of_time = timed(lambda: snapshot_as_of(mid, "job"))
+        centers, trend_time = timed(lambda: snapshot_trend(start.date(), end.date()))
+        _, job_trend_time = timed(lambda: snapshot_trend(start.date(), end.date(), "job", [job]))
+
+    print(f"{rows:>9} snapshot rows ({written['work_center']} work centers, {written['job']} jobs per day, {days} days)")
+    print(f"  snapshot write (mean)  {write / days * 1000:9.1f} ms")
+    print(f"  as-of work centers     {as_of_time * 1000:9.1f} ms")
+    print(f"  as-of jobs             {job_as_of_time * 1000:9.1f} ms")
+    print(f"  work center trend      {trend_time * 1000:9.1f} ms ({sum(len(s) for s in centers['series'].values())} points)")
+    print(f"  single job trend       {job_trend_time * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
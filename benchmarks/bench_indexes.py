@@ -0,0 +1,130 @@
+"""EXPLAIN plans and latency of the hot filter queries with and without indexes.
+
+Usage: python benchmarks/bench_indexes.py [operations]
+
+Seeds a throwaway SQLite database (unless DATABASE_URL is set), then runs
+each query with the model indexes dropped and again with them created.
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from app import app, db
+from models import Operation, WorkOrder, WorkLog, NCRTracker
+from ingest import write_rows
+from utils import process_sapdata
+from bench_sap_ingest import make_sapdata
+
+TODAY = date.today()
+
+QUERIES = {
+    "ops by work center + status": (
+        "SELECT id FROM operation WHERE work_center = 'NCR' AND status = 'In Progress'", {}),
+    "ops scheduled today": (
+        "SELECT id FROM operation WHERE scheduled_date = :day", {"day": TODAY}),
+    "ops of 50 work orders": (
+        "SELECT id FROM operation WHERE work_order_id IN (SELECT id FROM work_order LIMIT 50)", {}),
+    "work orders of a job": (
+        "SELECT id FROM work_order WHERE job_id = 42", {}),
+    "worklog by job": (
+        "SELECT id FROM work_log WHERE job_number = '100042'", {}),
+    "worklog by employee + month": (
+        "SELECT id FROM work_log WHERE employee_id = 1010 AND posting_date BETWEEN :start AND :end",
+        {"start": TODAY - timedelta(days=30), "end": TODAY}),
+    "worklog by posting date": (
+        "SELECT id FROM work_log WHERE posting_date = :day", {"day": TODAY - timedelta(days=3)}),
+    "ncr by status": (
+        "SELECT id FROM ncr_tracker WHERE status = 'Active'", {}),
+}
+
+TABLES = [WorkOrder, Operation, WorkLog, NCRTracker]
+
+
+def seed(operations):
+    process_sapdata(make_sapdata(operations), mode="bulk")
+    # Spread the schedule over two months instead of the ingest's "today"
+    ids = [pk for (pk,) in db.session.query(Operation.id)]
+    db.session.execute(
+        db.update(Operation),
+        [{"id": pk, "scheduled_date": TODAY + timedelta(days=pk % 60)} for pk in ids],
+    )
+    rng = np.random.default_rng(7)
+    n = operations * 2
+    write_rows(WorkLog, pd.DataFrame({
+        "employee_id": rng.integers(1000, 1200, n),
+        "employee_name": "Employee",
+        "job_number": (100000 + rng.integers(0, operations // 8, n)).astype(str),
+        "work_order": "10",
+        "operation_number": 10,
+        "actual_hours": rng.uniform(0, 8, n).round(2),
+        "posting_date": [TODAY - timedelta(days=int(d)) for d in rng.integers(0, 365, n)],
+    }))
+    m = max(operations // 20, 1)
+    write_rows(NCRTracker, pd.DataFrame({
+        "ncr_number": [f"NCR-{i}" for i in range(m)],
+        "job_number": (100000 + rng.integers(0, operations // 8, m)).astype(str),
+        "work_order": "1", "operation_number": 10, "planned_hours": 1.0, "actual_hours": 1.0,
+        "issue_description": "-", "issue_category": "Machining", "root_cause": "-", "corrective_action": "-",
+        "status": rng.choice(["Active", "Pending", "Closed"], m),
+    }))
+    db.session.commit()
+
+
+def set_indexes(enabled):
+    engine = db.engine
+    for model in TABLES:
+        for index in model.__table__.indexes:
+            if enabled:
+                index.create(engine, checkfirst=True)
+            else:
+                index.drop(engine, checkfirst=True)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def explain(sql, params):
+    if db.engine.dialect.name == "sqlite":
+        rows = db.session.execute(text("EXPLAIN QUERY PLAN " + sql), params).all()
+        return "; ".join(row[-1] for row in rows)
+    rows = db.session.execute(text("EXPLAIN " + sql), params).all()
+    return rows[0][0]
+
+
+def latency_ms(sql, params, repeat=20):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        db.session.execute(text(sql), params).all()
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def main(operations):
+    with app.app_context():
+        seed(operations)
+        results = {}
+        for enabled in (False, True):
+            db.session.commit()
+            set_indexes(enabled)
+            for name, (sql, params) in QUERIES.items():
+                results.setdefault(name, []).append((explain(sql, params), latency_ms(sql, params)))
+
+        print(f"{operations} operations, {operations * 2} worklog rows, {max(operations // 20, 1)} NCRs")
+        for name, ((plan_before, before), (plan_after, after)) in results.items():
+            print(f"\n{name}: {before:.2f} ms -> {after:.2f} ms ({before / after if after else 0:.0f}x)")
+            print(f"  before: {plan_before}")
+            print(f"  after:  {plan_after}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
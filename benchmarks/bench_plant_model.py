@@ -0,0 +1,103 @@
+"""Memory and latency of the columnar plant model vs. ORM hydration.
+
+Usage: python benchmarks/bench_plant_model.py [operations ...]
+
+Seeds a throwaway SQLite database (unless DATABASE_URL is set) with a
+generated plant of 8 operations per job. For each size it reports the
+memory retained by a loaded PlantModel and by the Job/WorkOrder/Operation
+objects /api/jobs hydrates (tracemalloc, scaled to 100k operations), then
+times the read endpoints with the model on and off. Response caches are
+cleared before every request; the model itself stays loaded, as it does
+between data changes.
+"""
+import os
+import sys
+import gc
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+import logging
+from sqlalchemy.orm import selectinload
+
+from app import app, db
+from models import Job, WorkOrder, Operation
+from api_cache import dataset_version, response_cache
+from forecasting import load_operations
+from plant_model import PlantModel
+from plantgen import generate_plant, seed_database
+import plant_model
+import routes  # noqa: F401  registers the routes on app
+
+
+def retained(load):
+    """Wall time of load() and the bytes its result keeps alive."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, size
+
+
+def hydrate_jobs():
+    return Job.query.options(selectinload(Job.work_orders).selectinload(WorkOrder.operations)).all()
+
+
+def timed(fn, repeat=5):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        response_cache.clear()
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main(sizes):
+    logging.disable(logging.WARNING)
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        for operations in sizes:
+            plant = generate_plant(jobs=operations // 8)
+            seed_database(plant)
+            count = db.session.query(Operation).count()
+            scale = 100000 / count
+            job_number = str(plant["sapdata"]["Order"].iloc[count // 2])
+
+            model, model_load, model_bytes = retained(lambda: PlantModel(dataset_version()))
+            print(f"{count} operations ({len(model.job_numbers)} jobs)")
+            print(f"  plant model   load {model_load * 1000:7.0f} ms   retained {model_bytes * scale / 2**20:7.1f} MB "
+                  f"per 100k ops (arrays {model.nbytes * scale / 2**20:.1f} MB)")
+            del model
+            jobs, orm_load, orm_bytes = retained(hydrate_jobs)
+            print(f"  ORM objects   load {orm_load * 1000:7.0f} ms   retained {orm_bytes * scale / 2**20:7.1f} MB "
+                  f"per 100k ops   ({orm_bytes / max(model_bytes, 1):.0f}x)")
+            del jobs
+            db.session.expunge_all()
+
+            plant_model.get_model()
+            for url in ("/api/jobs", "/api/jobs?limit=100", "/api/jobs?work_center=CNC&status=In%20Progress",
+                        f"/api/job_details?job_number={job_number}", "/api/work_centers"):
+                line = f"  {url:<48}"
+                for enabled in (False, True):
+                    app.config["PLANT_MODEL_ENABLED"] = enabled
+                    line += f"  {'model' if enabled else 'ORM':>5} {timed(lambda: client.get(url)):8.1f} ms"
+                print(line)
+            # /api/forecast is cached per version; what the model replaces is its operations query
+            line = f"  {'forecast operations (load_operations)':<48}"
+            for enabled in (False, True):
+                app.config["PLANT_MODEL_ENABLED"] = enabled
+                line += f"  {'model' if enabled else 'ORM':>5} {timed(load_operations):8.1f} ms"
+            print(line)
+            db.session.expunge_all()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000])
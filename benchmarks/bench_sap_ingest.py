@@ -0,0 +1,60 @@
+"""Compare the row-by-row, bulk and delta SAPDATA ingest paths.
+
+Usage: python benchmarks/bench_sap_ingest.py [rows ...]
+
+Runs against a throwaway SQLite database unless DATABASE_URL is set.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+import numpy as np
+import pandas as pd
+
+from app import app
+from utils import process_sapdata
+
+
+def make_sapdata(rows, ops_per_job=8, seed=42):
+    """Build a synthetic SAPDATA frame with the export's column names."""
+    rng = np.random.default_rng(seed)
+    job_index = np.arange(rows) // ops_per_job
+    work = rng.uniform(0.5, 40, rows).round(2)
+    actual = np.where(rng.random(rows) < 0.3, np.nan, (work * rng.uniform(0, 1.3, rows)).round(2))
+    return pd.DataFrame({
+        "Order": 100000 + job_index,
+        "Oper./Act.": (np.arange(rows) % ops_per_job + 1) * 10,
+        "Oper.WorkCenter": rng.choice(["CNC", "LATHE", "MILL", "WELD", "PAINT", "NCR", "ASSY"], rows),
+        "Work": work,
+        "Actual work": actual,
+    })
+
+
+def run(df, mode):
+    started = time.perf_counter()
+    process_sapdata(df, mode=mode)
+    return time.perf_counter() - started
+
+
+def main(sizes):
+    with app.app_context():
+        for rows in sizes:
+            df = make_sapdata(rows)
+            bulk = run(df, "bulk")
+            # Daily re-upload: 2% of operations changed on top of the bulk load
+            changed = df.copy()
+            changed.loc[changed.sample(frac=0.02, random_state=1).index, "Actual work"] = 1.0
+            delta = run(changed, "delta")
+            row = run(df, "row") if rows <= 50000 else None
+            line = f"{rows:>8} rows  bulk {bulk:8.2f}s ({rows / bulk:>9.0f} rows/s)  delta(2%) {delta:8.2f}s"
+            if row is not None:
+                line += f"  row {row:8.2f}s ({rows / row:>9.0f} rows/s)  speedup {row / bulk:5.1f}x"
+            print(line)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000])
@@ -0,0 +1,61 @@
+"""Wall time of a batch of what-if capacity scenarios, serial vs. pooled.
+
+Usage: python benchmarks/bench_scenarios.py [operations] [scenarios]
+
+Seeds a throwaway SQLite database (unless DATABASE_URL is set) through
+the bulk SAPDATA ingest, then runs the same batch inline and through
+scenarios.run_scenarios(), whose workers share one copy of the arrays.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+from app import app
+from utils import process_sapdata
+from scheduler import plan_schedule
+from scenarios import run_scenarios
+from bench_sap_ingest import make_sapdata
+
+SATURDAY = [1, 1, 1, 1, 1, 1, 0]
+
+
+def make_scenarios(count):
+    centers = ["CNC", "LATHE", "MILL", "WELD", "PAINT", "NCR", "ASSY"]
+    scenarios = []
+    for i in range(count):
+        overrides = {centers[i % len(centers)]: {"add_workers": 1 + i // len(centers)}}
+        if i % 2:
+            overrides["*"] = {"working_days": SATURDAY}
+        scenarios.append({"name": f"scenario {i + 1}", "overrides": overrides})
+    return scenarios
+
+
+def main(operations=100000, count=8):
+    with app.app_context():
+        process_sapdata(make_sapdata(operations), mode="bulk")
+        scenarios = make_scenarios(count)
+
+        started = time.perf_counter()
+        for scenario in [{"overrides": {}}] + scenarios:
+            plan_schedule(overrides=scenario["overrides"])
+        serial = time.perf_counter() - started
+
+        run_scenarios(scenarios[:1])  # start the pool outside the measurement
+        started = time.perf_counter()
+        result = run_scenarios(scenarios)
+        pooled = time.perf_counter() - started
+
+    per_scenario = sorted(s["seconds"] for s in result["scenarios"])
+    print(f"{result['operations']:>8} open operations, {count + 1} scenarios incl. baseline, {os.cpu_count()} CPUs")
+    print(f"  serial plan_schedule   {serial:7.2f} s")
+    print(f"  run_scenarios (pool)   {pooled:7.2f} s   speedup {serial / pooled:4.1f}x")
+    print(f"  per-scenario compute   {per_scenario[0]:.2f}-{per_scenario[-1]:.2f} s")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,44 @@
+"""Throughput of the finite-capacity scheduler on synthetic operations.
+
+Usage: python benchmarks/bench_scheduler.py [operations ...]
+
+Times scheduler.finite_capacity_schedule on in-memory arrays, so the
+numbers exclude the database round trips of plan_schedule/apply_schedule.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+import numpy as np
+
+import app  # noqa: F401  (registers the models before scheduler imports them)
+from scheduler import finite_capacity_schedule, weekly_capacity
+
+WORK_CENTERS = 12
+
+
+def make_operations(rows, ops_per_job=8, seed=42):
+    rng = np.random.default_rng(seed)
+    work_order_ids = np.arange(rows) // ops_per_job
+    operation_numbers = (np.arange(rows) % ops_per_job + 1) * 10
+    center_codes = rng.integers(0, WORK_CENTERS, rows)
+    hours = rng.gamma(2.0, 3.0, rows).round(2)
+    capacity = np.array([weekly_capacity(hours) for hours in rng.uniform(16, 64, WORK_CENTERS)])
+    return work_order_ids, operation_numbers, center_codes, hours, capacity
+
+
+def main(sizes):
+    for rows in sizes:
+        arrays = make_operations(rows)
+        started = time.perf_counter()
+        start, finish = finite_capacity_schedule(*arrays, start_weekday=0)
+        elapsed = time.perf_counter() - started
+        print(f"{rows:>8} ops  {elapsed * 1000:9.1f} ms  {rows / elapsed:>10,.0f} ops/s  horizon {int(finish.max())} days")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 50000, 100000, 200000])
@@ -0,0 +1,68 @@
+"""Query count and latency of /api/work_centers and /api/forecast.
+
+Usage: python benchmarks/bench_work_center_api.py [operations ...]
+
+Seeds a throwaway SQLite database (unless DATABASE_URL is set) through the
+bulk SAPDATA ingest, then compares the per-work-center loop the endpoints
+used to run with the current GROUP BY endpoints.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+from sqlalchemy import event
+
+from app import app, db
+from models import Operation
+from utils import process_sapdata
+from bench_sap_ingest import make_sapdata
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+def legacy_work_centers():
+    """The N+1 loop /api/work_centers ran before aggregation moved to SQL."""
+    result = {}
+    for (work_center,) in db.session.query(Operation.work_center).distinct().all():
+        operations = Operation.query.filter_by(work_center=work_center).all()
+        result[work_center] = (sum(op.planned_hours for op in operations), sum(op.actual_hours for op in operations))
+    return result
+
+
+def measure(counter, fn, repeat=5):
+    counter.count = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000, counter.count // repeat
+
+
+def main(sizes):
+    client = app.test_client()
+    with app.app_context():
+        counter = QueryCounter()
+        event.listen(db.engine, "before_cursor_execute", counter)
+        for rows in sizes:
+            process_sapdata(make_sapdata(rows), mode="bulk")
+            for label, fn in (
+                ("legacy loop", lambda: (legacy_work_centers(), db.session.expunge_all())),
+                ("/api/work_centers", lambda: client.get("/api/work_centers")),
+                ("/api/forecast", lambda: client.get("/api/forecast")),
+            ):
+                ms, queries = measure(counter, fn)
+                print(f"{rows:>8} ops  {label:<18} {ms:9.1f} ms  {queries:>3} queries")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000])
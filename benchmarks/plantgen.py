@@ -0,0 +1,183 @@
+"""Seeded synthetic plant data for the benchmark suite.
+
+generate_plant() builds a SAPDATA frame and a matching "SAP Document
+Export" worklog frame with the export's own column names; the same seed
+and scale always give the same plant. write_sapdata_workbook() and
+write_worklog_workbook() save them as uploads, seed_database() loads them
+straight into the tables as a fixture for the read APIs.
+"""
+import os
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+BASE_WORK_CENTERS = ["CNC", "LATHE", "MILL", "WELD", "PAINT", "ASSY", "GRIND", "DEBURR", "INSPECT", "HEAT"]
+CUSTOMERS = ["Acme Aero", "Borealis Marine", "Cobalt Energy", "Delta Rail", "Evergreen Pumps", "Fulcrum Defense"]
+ISSUE_CATEGORIES = ["Dimensional", "Surface Finish", "Material", "Weld Defect", "Documentation", "Assembly"]
+EMPLOYEE_NAMES = ["A. Patel", "B. Novak", "C. Okafor", "D. Schmidt", "E. Rossi", "F. Kim", "G. Silva", "H. Berg"]
+WORKLOG_SHEET = "SAP Document Export"
+WORKLOG_DATE_FORMAT = "%m/%d/%Y"
+
+DEFAULT_SCALE = {
+    "jobs": 1000,
+    "ops_per_work_order": 8,
+    "work_centers": 7,
+    "ncr_rate": 0.02,
+    "worklog_days": 60,
+    "seed": 42,
+}
+
+
+def work_center_names(count):
+    """NCR plus count - 1 production centers, numbered once the named ones run out."""
+    production = BASE_WORK_CENTERS + [f"WC{i:02d}" for i in range(len(BASE_WORK_CENTERS) + 1, count)]
+    return production[:max(count - 1, 1)] + ["NCR"]
+
+
+def make_sapdata(jobs, ops_per_work_order, work_centers, ncr_rate, rng):
+    """One work order per job, ops_per_work_order operations each.
+
+    About a third of operations are finished, a third started and the rest
+    not started. A fraction ncr_rate of operations is rerouted to the NCR
+    work center with report details filled in for most of them.
+    """
+    rows = jobs * ops_per_work_order
+    job_index = np.repeat(np.arange(jobs), ops_per_work_order)
+    centers = np.array(work_center_names(work_centers))
+    production = centers[:-1]
+
+    # Log-normal setup plus run time, like real routings: mostly short, some long
+    work = np.clip(rng.lognormal(1.6, 0.8, rows), 0.25, 120).round(2)
+    progress = rng.random(rows)
+    actual = np.where(
+        progress < 0.35, (work * rng.uniform(1.0, 1.4, rows)).round(2),
+        np.where(progress < 0.7, (work * rng.uniform(0.05, 0.95, rows)).round(2), np.nan),
+    )
+    work_center = production[rng.integers(0, len(production), rows)].astype(object)
+    ncr = rng.random(rows) < ncr_rate
+    work_center[ncr] = "NCR"
+    # Started NCR operations are the ones ingest turns into trackers
+    actual[ncr] = (work[ncr] * rng.uniform(0.1, 1.2, int(ncr.sum()))).round(2)
+
+    def ncr_text(values):
+        column = np.full(rows, None, dtype=object)
+        column[ncr] = values
+        return column
+
+    detailed = ncr & (rng.random(rows) < 0.8)
+    categories = ncr_text(rng.choice(ISSUE_CATEGORIES, int(ncr.sum())))
+    categories[ncr & ~detailed] = None
+    impact = np.full(rows, np.nan)
+    impact[detailed] = rng.uniform(50, 5000, int(detailed.sum())).round(2)
+    return pd.DataFrame({
+        "Order": 100000 + job_index,
+        "Oper./Act.": (np.arange(rows) % ops_per_work_order + 1) * 10,
+        "Oper.WorkCenter": work_center,
+        "Work": work,
+        "Actual work": actual,
+        "Customer": np.array(CUSTOMERS)[rng.integers(0, len(CUSTOMERS), jobs)][job_index],
+        "Issue_Description": ncr_text([f"Nonconformance found at inspection, lot {i}" for i in range(int(ncr.sum()))]),
+        "Issue_Category": categories,
+        "Root_Cause": ncr_text(rng.choice(["Tool wear", "Operator", "Supplier", "Drawing revision"], int(ncr.sum()))),
+        "Corrective_Action": ncr_text(rng.choice(["Rework", "Scrap", "Use as is", "Return to vendor"], int(ncr.sum()))),
+        "Financial_Impact": impact,
+    })
+
+
+def make_worklog(sapdata, days, rng, as_of):
+    """Labor confirmations booking each started operation's actual hours.
+
+    Hours are split over one to four postings on random days within the
+    last days days; a few postings are adjustments or non-productive.
+    """
+    started = sapdata[sapdata["Actual work"].notna() & (sapdata["Actual work"] > 0)]
+    postings = rng.integers(1, 5, len(started))
+    index = np.repeat(np.arange(len(started)), postings)
+    hours = (started["Actual work"].to_numpy()[index] / postings[index]).round(2)
+    rows = len(index)
+    employees = rng.integers(0, len(EMPLOYEE_NAMES) * 25, rows)
+    posting_date = pd.to_datetime(as_of) - pd.to_timedelta(rng.integers(0, days, rows), unit="D")
+    special = rng.random(rows)
+    return pd.DataFrame({
+        "PERNR": 20000 + employees,
+        "EmployeeName": np.array(EMPLOYEE_NAMES)[employees % len(EMPLOYEE_NAMES)],
+        "Order": started["Order"].to_numpy()[index],
+        "Operation": started["Oper./Act."].to_numpy()[index],
+        "Operation short text": "Op " + started["Oper./Act."].astype(str).to_numpy()[index] + " "
+                                + started["Oper.WorkCenter"].to_numpy()[index],
+        "Acutal Work": hours,
+        "PostingDate": posting_date.strftime(WORKLOG_DATE_FORMAT),
+        "Adjustment Confirmation Text": np.where(special < 0.02, "Correction of earlier booking", None),
+        "NonProdCode": np.where((special >= 0.02) & (special < 0.05), "TRN", None),
+    }).sort_values("PostingDate", kind="stable", ignore_index=True)
+
+
+def generate_plant(jobs=None, ops_per_work_order=None, work_centers=None, ncr_rate=None,
+                   worklog_days=None, seed=None, as_of=None):
+    """SAPDATA and worklog frames for one plant; unset arguments use DEFAULT_SCALE."""
+    scale = dict(DEFAULT_SCALE)
+    scale.update({key: value for key, value in {
+        "jobs": jobs, "ops_per_work_order": ops_per_work_order, "work_centers": work_centers,
+        "ncr_rate": ncr_rate, "worklog_days": worklog_days, "seed": seed,
+    }.items() if value is not None})
+    if scale["work_centers"] < 2:
+        raise ValueError("work_centers must be at least 2 (one of them is NCR)")
+    rng = np.random.default_rng(scale["seed"])
+    as_of = as_of or date.today()
+    sapdata = make_sapdata(scale["jobs"], scale["ops_per_work_order"], scale["work_centers"], scale["ncr_rate"], rng)
+    worklog = make_worklog(sapdata, scale["worklog_days"], rng, as_of)
+    return {"scale": scale, "sapdata": sapdata, "worklog": worklog}
+
+
+def _write_workbook(frame, path, sheet_name=None):
+    """Write-only openpyxl, which keeps large workbooks out of memory."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    sheet.append(list(frame.columns))
+    for row in frame.itertuples(index=False):
+        sheet.append([None if value is None or value != value else value for value in row])
+    workbook.save(path)
+    return path
+
+
+def write_sapdata_workbook(plant, path):
+    return _write_workbook(plant["sapdata"], path)
+
+
+def write_worklog_workbook(plant, path):
+    return _write_workbook(plant["worklog"], path, WORKLOG_SHEET)
+
+
+def seed_database(plant):
+    """Load the plant into the database as the read APIs expect to find it.
+
+    Goes through the same building blocks as an upload (bulk SAPDATA load,
+    NCR detection, worklog rows, a snapshot) without the workbook round trip.
+    """
+    from app import db
+    from models import WorkLog
+    from utils import process_sapdata
+    from ingest import build_ncr_frame, sync_ncr_trackers, prepare_worklog_chunk, write_rows
+    from snapshots import take_snapshot
+
+    process_sapdata(plant["sapdata"], mode="bulk")
+    sync_ncr_trackers(build_ncr_frame(plant["sapdata"]))
+    db.session.query(WorkLog).delete()
+    rows, _ = prepare_worklog_chunk(plant["worklog"])
+    write_rows(WorkLog, rows)
+    db.session.commit()
+    take_snapshot()
+
+
+if __name__ == "__main__":
+    # python benchmarks/plantgen.py DIRECTORY [jobs]: write both workbooks
+    directory = sys.argv[1] if len(sys.argv) > 1 else "."
+    plant = generate_plant(jobs=int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    print(write_sapdata_workbook(plant, os.path.join(directory, "SAPDATA.xlsx")))
+    print(write_worklog_workbook(plant, os.path.join(directory, "WORKLOG.xlsx")))
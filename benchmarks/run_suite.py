@@ -0,0 +1,386 @@
+"""Reproducible benchmark suite: ingest paths and every /api route.
+
+Usage:
+    python benchmarks/run_suite.py [--jobs N] [--ops-per-work-order N]
+        [--work-centers N] [--ncr-rate F] [--seed N] [--repeat N]
+        [--only TEXT] [--output results.json] [--compare baseline.json]
+
+Generates a seeded plant (benchmarks/plantgen.py) into a throwaway SQLite
+database unless DATABASE_URL is set, then times process_sapdata (bulk and
+delta), process_sap_data and process_worklog_data on generated workbooks,
+and every /api route through the Flask test client against the plant as
+a fixture. /api/events is left out: it is an open-ended SSE stream.
+
+Each case records the median and best wall time of --repeat runs, the SQL
+statements of one run, and the peak Python allocation (tracemalloc) of an
+extra run that comes first and doubles as warm-up. Read-API cases start from invalidated caches. --output
+writes the results as a JSON baseline; --compare checks them against one
+recorded at the same scale and exits with status 1 on a regression:
+a slower best run, more SQL statements or a higher peak allocation.
+"""
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import tempfile
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp(prefix="shoplead-bench-")
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(WORK_DIR, "bench.db"))
+
+import logging
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import app, db
+from models import Job, WorkOrder, Operation, NCRTracker
+from api_cache import bump_dataset_version
+from upload_cache import cache_dir
+from utils import process_sapdata
+from excel_processor import process_sap_data, process_worklog_data
+from plantgen import DEFAULT_SCALE, generate_plant, seed_database, write_sapdata_workbook, write_worklog_workbook
+import routes  # noqa: F401  registers the routes on app
+
+# A case regresses when its best run is slower than the baseline's by more
+# than the tolerance and by at least MIN_SLOWDOWN_SECONDS, which keeps
+# millisecond routes from flagging on timer noise
+DEFAULT_TOLERANCE = 0.25
+MIN_SLOWDOWN_SECONDS = 0.005
+MIN_MEMORY_GROWTH = 1024 * 1024
+# Opening a pooled connection can add a statement or two; an N+1 adds many
+QUERY_SLACK = 2
+
+
+class QueryCounter:
+    """Counts SQL statements on every engine; reset count before a run."""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(Engine, "after_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+class Case:
+    def __init__(self, name, run, setup=None):
+        self.name = name
+        self.run = run
+        self.setup = setup
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def measure(case, repeat, counter):
+    """Median and best wall time, SQL statement count and peak allocation of a case."""
+    # Tracing slows allocation-heavy code down, so memory gets its own run,
+    # which also warms imports, connections and the OS file cache
+    if case.setup:
+        case.setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    times = []
+    queries = None
+    for _ in range(repeat):
+        if case.setup:
+            case.setup()
+        counter.count = 0
+        started = time.perf_counter()
+        case.run()
+        times.append(time.perf_counter() - started)
+        queries = counter.count
+    return {
+        "seconds": round(statistics.median(times), 4),
+        "min_seconds": round(min(times), 4),
+        "queries": queries,
+        "peak_bytes": peak,
+    }
+
+
+# Ingest cases
+
+def clear_parsed_cache():
+    shutil.rmtree(cache_dir(), ignore_errors=True)
+
+
+def clear_plant():
+    for model in (Operation, WorkOrder, Job, NCRTracker):
+        db.session.query(model).delete()
+    db.session.commit()
+    clear_parsed_cache()
+
+
+def ingest_cases(plant, sapdata_path, worklog_path):
+    sapdata = plant["sapdata"]
+    # A daily re-export: 2% of the operations have booked more hours
+    changed = sapdata.copy()
+    picked = changed.sample(frac=0.02, random_state=plant["scale"]["seed"]).index
+    changed.loc[picked, "Actual work"] = changed.loc[picked, "Work"]
+
+    return [
+        Case("process_sapdata bulk", lambda: process_sapdata(sapdata, mode="bulk")),
+        Case("process_sapdata delta 2% changed", lambda: process_sapdata(changed, mode="delta"),
+             setup=lambda: process_sapdata(sapdata, mode="bulk")),
+        Case("process_sap_data first upload", lambda: process_sap_data(sapdata_path), setup=clear_plant),
+        Case("process_sap_data unchanged re-upload", lambda: process_sap_data(sapdata_path)),
+        Case("process_worklog_data", lambda: process_worklog_data(worklog_path), setup=clear_parsed_cache),
+    ]
+
+
+# API cases
+
+def call(client, method, url, **kwargs):
+    response = client.open(url, method=method, **kwargs)
+    # Streamed routes only do their work while the body is read
+    body = response.get_data()
+    if response.status_code >= 400:
+        raise BenchmarkError(f"{method} {url} returned {response.status_code}: {body[:200]!r}")
+    return response
+
+
+def invalidate_caches():
+    # Also drops the forecast and other caches keyed on the dataset version
+    bump_dataset_version("benchmark")
+
+
+def api_case(client, method, url, cold=True, **kwargs):
+    """A request case; cold ones start from invalidated caches."""
+    name = f"{method} {url}" if "json" not in kwargs else f"{method} {url} {json.dumps(kwargs['json'])[:60]}"
+    def run():
+        call(client, method, url, **kwargs)
+
+    if cold:
+        return Case(name, run, setup=invalidate_caches)
+    return Case(f"{name} (cached)", run, setup=run)
+
+
+def upload_round_trip(client, sapdata_path):
+    """Upload a workbook, follow its progress stream to the end, then poll its status."""
+    with open(sapdata_path, "rb") as f:
+        response = call(client, "POST", "/upload", data={"file": (f, "SAPDATA.xlsx")},
+                        content_type="multipart/form-data")
+    job_id = response.json["job_id"]
+    call(client, "GET", f"/api/upload/{job_id}/events")
+    status = call(client, "GET", f"/api/upload/{job_id}").json
+    if status["status"] != "succeeded":
+        raise BenchmarkError(f"upload job ended {status['status']}: {status.get('error')}")
+
+
+def api_cases(client, plant, sapdata_path):
+    today = date.today()
+    job_number = str(plant["sapdata"]["Order"].iloc[0])
+    center = plant["sapdata"]["Oper.WorkCenter"].iloc[0]
+    employee = int(plant["worklog"]["PERNR"].iloc[0])
+    with app.app_context():
+        operation_ids = [row.id for row in db.session.query(Operation.id).order_by(Operation.id).limit(100)]
+        ncr = db.session.query(NCRTracker).order_by(NCRTracker.id).first()
+    if not operation_ids:
+        raise BenchmarkError("the fixture has no operations")
+    moves = [{"operation_id": op_id, "new_date": (today + timedelta(days=op_id % 20)).isoformat()}
+             for op_id in operation_ids]
+    scenarios = [
+        {"name": "extra shift", "overrides": {center: {"add_workers": 2}}},
+        {"name": "six day week", "overrides": {"*": {"working_days": [1, 1, 1, 1, 1, 1, 0]}}},
+    ]
+    history_start = (today - timedelta(days=30)).isoformat()
+
+    cases = [
+        api_case(client, "GET", "/api/jobs"),
+        api_case(client, "GET", "/api/jobs?limit=100"),
+        api_case(client, "GET", f"/api/jobs?work_center={center}&status=In%20Progress"),
+        api_case(client, "GET", "/api/jobs?fields=job_number,customer_name"),
+        api_case(client, "GET", "/api/jobs", cold=False),
+        api_case(client, "GET", f"/api/job_details?job_number={job_number}"),
+        api_case(client, "GET", "/api/work_centers"),
+        api_case(client, "GET", "/api/forecast"),
+        api_case(client, "GET", "/api/forecast?by=job"),
+        api_case(client, "GET", f"/api/history?as_of={today}"),
+        api_case(client, "GET", f"/api/history?start_date={history_start}&end_date={today}"),
+        api_case(client, "GET", f"/api/history?scope=job&name={job_number}&start_date={history_start}"),
+        api_case(client, "GET", "/api/schedule"),
+        api_case(client, "GET", "/api/worklog"),
+        api_case(client, "GET", f"/api/worklog?format=ndjson&employee_id={employee}"),
+        api_case(client, "GET", "/api/worklog?group_by=employee,day"),
+        api_case(client, "GET", "/api/ncr"),
+        api_case(client, "GET", "/api/ncr?limit=50&sort=financial_impact"),
+        api_case(client, "GET", "/api/ncr/summary"),
+        api_case(client, "GET", "/api/ncr/summary?group_by=work_center"),
+        api_case(client, "GET", "/api/ncr_monitor"),
+        api_case(client, "GET", "/api/cache_stats"),
+        api_case(client, "POST", "/api/chat", json={"message": "How many jobs in progress?"}),
+        api_case(client, "POST", "/api/chat", json={"message": f"What is the efficiency of work center {center}"}),
+        api_case(client, "POST", "/api/chat", json={"message": f"Remaining work for job {job_number}"}),
+        api_case(client, "POST", "/api/chat", json={"message": "Top 5 late jobs"}),
+        api_case(client, "POST", "/api/chat", json={"message": "NCR cost by job"}),
+        api_case(client, "POST", "/api/chat", json={"message": "NCR cost by job"}, cold=False),
+        api_case(client, "POST", "/api/schedule", json={"operation_id": operation_ids[0], "date": today.isoformat()}),
+        api_case(client, "POST", "/api/update_schedule",
+                 json={"operation_id": operation_ids[1 % len(operation_ids)], "new_date": today.isoformat()}),
+        api_case(client, "POST", "/api/schedule/batch", json={"moves": moves}),
+        api_case(client, "POST", "/api/schedule/auto", json={"dry_run": True}),
+        api_case(client, "POST", "/api/scenarios", json={"scenarios": scenarios}),
+        Case("POST /upload + GET /api/upload/<job_id>[/events]", lambda: upload_round_trip(client, sapdata_path)),
+    ]
+    if ncr is not None:
+        cases.append(api_case(client, "POST", "/api/ncr_report", json={
+            "job_number": ncr.job_number, "work_order": ncr.work_order, "operation_number": ncr.operation_number,
+            "root_cause": "Tool wear", "corrective_action": "Rework",
+        }))
+    return cases
+
+
+# Baselines
+
+def compare(results, baseline, tolerance):
+    """Regressions of results against a baseline, one message each."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline["results"].get(name)
+        if base is None or "error" in base:
+            continue
+        if "error" in current:
+            regressions.append(f"{name}: now fails ({current['error']})")
+            continue
+        slowdown = current["min_seconds"] - base["min_seconds"]
+        if slowdown > base["min_seconds"] * tolerance and slowdown >= MIN_SLOWDOWN_SECONDS:
+            regressions.append(
+                f"{name}: best run {base['min_seconds'] * 1000:.1f} ms -> {current['min_seconds'] * 1000:.1f} ms"
+            )
+        if current["queries"] > base["queries"] + QUERY_SLACK:
+            regressions.append(f"{name}: {base['queries']} -> {current['queries']} SQL statements")
+        growth = current["peak_bytes"] - base["peak_bytes"]
+        if growth > base["peak_bytes"] * tolerance and growth >= MIN_MEMORY_GROWTH:
+            regressions.append(
+                f"{name}: peak memory {base['peak_bytes'] / 2**20:.1f} MB -> {current['peak_bytes'] / 2**20:.1f} MB"
+            )
+    return regressions
+
+
+def print_results(results, baseline=None):
+    print(f"{'case':<72} {'ms':>10} {'queries':>8} {'peak MB':>8}  {'vs baseline':>12}")
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name[:72]:<72} FAILED: {result['error']}")
+            continue
+        line = f"{name[:72]:<72} {result['seconds'] * 1000:>10.1f} {result['queries']:>8} {result['peak_bytes'] / 2**20:>8.1f}"
+        base = (baseline or {}).get("results", {}).get(name)
+        if base and "error" not in base and base["seconds"]:
+            line += f"  {(result['seconds'] / base['seconds'] - 1) * 100:>+11.0f}%"
+        print(line)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark ingest and the /api routes on a seeded synthetic plant.")
+    parser.add_argument("--jobs", type=int, help=f"jobs (one work order each; default {DEFAULT_SCALE['jobs']})")
+    parser.add_argument("--ops-per-work-order", type=int,
+                        help=f"operations per work order (default {DEFAULT_SCALE['ops_per_work_order']})")
+    parser.add_argument("--work-centers", type=int,
+                        help=f"work centers including NCR (default {DEFAULT_SCALE['work_centers']})")
+    parser.add_argument("--ncr-rate", type=float,
+                        help=f"share of operations rerouted to NCR (default {DEFAULT_SCALE['ncr_rate']})")
+    parser.add_argument("--worklog-days", type=int,
+                        help=f"days of labor postings (default {DEFAULT_SCALE['worklog_days']})")
+    parser.add_argument("--seed", type=int, help=f"generator seed (default {DEFAULT_SCALE['seed']})")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (default 3)")
+    parser.add_argument("--only", help="run only cases whose name contains this text")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against this JSON baseline; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"allowed slowdown and memory growth as a fraction (default {DEFAULT_TOLERANCE})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    baseline = None
+    scale = dict(DEFAULT_SCALE)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        # A comparison only means something at the baseline's own scale
+        scale.update(baseline["meta"]["scale"])
+    requested = {
+        "jobs": args.jobs, "ops_per_work_order": args.ops_per_work_order, "work_centers": args.work_centers,
+        "ncr_rate": args.ncr_rate, "worklog_days": args.worklog_days, "seed": args.seed,
+    }
+    scale.update({key: value for key, value in requested.items() if value is not None})
+    if baseline is not None and scale != baseline["meta"]["scale"]:
+        sys.exit(f"{args.compare} was recorded at {baseline['meta']['scale']}, not {scale}")
+
+    logging.disable(logging.WARNING)
+    app.config["UPLOAD_FOLDER"] = WORK_DIR
+    plant = generate_plant(**scale)
+    sapdata_path = write_sapdata_workbook(plant, os.path.join(WORK_DIR, "SAPDATA.xlsx"))
+    worklog_path = write_worklog_workbook(plant, os.path.join(WORK_DIR, "WORKLOG.xlsx"))
+    with app.app_context():
+        database = db.engine.dialect.name
+        db.create_all()
+    print(f"{len(plant['sapdata'])} SAPDATA rows, {len(plant['worklog'])} worklog rows, {database} database")
+
+    counter = QueryCounter()
+    client = app.test_client()
+    results = {}
+
+    def run(cases):
+        for case in cases:
+            if args.only and args.only not in case.name:
+                continue
+            try:
+                with app.app_context():
+                    results[case.name] = measure(case, args.repeat, counter)
+            except Exception as e:
+                results[case.name] = {"error": f"{type(e).__name__}: {e}"}
+            finally:
+                with app.app_context():
+                    db.session.rollback()
+
+    run(ingest_cases(plant, sapdata_path, worklog_path))
+    with app.app_context():
+        seed_database(plant)
+    run(api_cases(client, plant, sapdata_path))
+
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {
+                    "created": datetime.now().isoformat(timespec="seconds"),
+                    "scale": scale,
+                    "repeat": args.repeat,
+                    "database": database,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                },
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+        print(f"Results written to {args.output}")
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import json
+import logging
+import threading
+from collections import deque
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import app
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 256
+HISTORY_SIZE = 1024
+# Larger change sets are announced as a count plus "truncated"; clients refetch
+MAX_EVENT_ITEMS = 1000
+PENDING_KEY = "pending_events"
+
+
+def format_event(event_id, event_type, data):
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class Subscriber:
+    """One SSE client's bounded buffer of formatted events."""
+
+    def __init__(self, max_queue):
+        self.max_queue = max_queue
+        self.dropped = False
+        self._queue = deque()
+        self._cond = threading.Condition()
+
+    def offer(self, message):
+        """Queue message; a full buffer marks the client as dropped instead."""
+        with self._cond:
+            if self.dropped:
+                return False
+            if len(self._queue) >= self.max_queue:
+                self.dropped = True
+                self._queue.clear()
+                self._cond.notify_all()
+                return False
+            self._queue.append(message)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Next message, or None on timeout or once dropped."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._queue or self.dropped, timeout)
+            if self._queue:
+                return self._queue.popleft()
+            return None
+
+
+class EventBroker:
+    """Per-process fan-out of change events to SSE subscribers.
+
+    publish() never blocks on clients: a subscriber whose buffer is full is
+    dropped and told to resync. The most recent events are kept so a
+    reconnecting client (Last-Event-ID) gets what it missed.
+    """
+
+    def __init__(self, max_queue=DEFAULT_QUEUE_SIZE, history=HISTORY_SIZE):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._history = deque(maxlen=history)
+        self._last_id = 0
+        self.published = 0
+        self.dropped = 0
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    def publish(self, event_type, data):
+        with self._lock:
+            self._last_id += 1
+            event_id = self._last_id
+            message = format_event(event_id, event_type, data)
+            self._history.append((event_id, message))
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for subscriber in subscribers:
+            if not subscriber.offer(message):
+                self.unsubscribe(subscriber)
+                with self._lock:
+                    self.dropped += 1
+                logger.info(f"Dropped slow event subscriber after event {event_id}")
+        return event_id
+
+    def subscribe(self, last_event_id=None):
+        """Register a client, replaying events after last_event_id if still kept."""
+        subscriber = Subscriber(self.max_queue)
+        with self._lock:
+            if last_event_id is not None:
+                oldest = self._history[0][0] if self._history else self._last_id + 1
+                if last_event_id > self._last_id or last_event_id + 1 < oldest:
+                    # Restarted process or history rolled over: the client must refetch
+                    subscriber.offer(self.resync_message("history unavailable"))
+                else:
+                    for event_id, message in self._history:
+                        if event_id > last_event_id:
+                            subscriber.offer(message)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def resync_message(self, reason):
+        # Carries the current id so a reconnect resumes from here, not from the gap
+        return format_event(self._last_id, "resync", {"reason": reason})
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "published": self.published,
+                "dropped": self.dropped,
+                "last_id": self._last_id,
+            }
+
+
+broker = EventBroker(app.config.get("EVENT_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+
+
+def publish(event_type, data):
+    return broker.publish(event_type, data)
+
+
+def publish_on_commit(session, event_type, data):
+    """Publish an event once session's transaction commits; dropped on rollback."""
+    session.info.setdefault(PENDING_KEY, []).append((event_type, data))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    for event_type, data in session.info.pop(PENDING_KEY, []):
+        broker.publish(event_type, data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(PENDING_KEY, None)
@@ -1,100 +1,142 @@
 
-import uuid
+import os
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
 from app import db
 from models import WorkLog
-from models import NCRTracker
+from utils import process_sapdata
+from ingest import load_worklog_chunks, build_ncr_frame, sync_ncr_trackers, NCR_WORK_CENTER
+from excel_reader import iter_excel_chunks, sheet_row_count, DEFAULT_CHUNK_SIZE
+from upload_cache import iter_cached_chunks
+from api_cache import bump_dataset_version
+from events import publish_on_commit, MAX_EVENT_ITEMS
+from snapshots import take_snapshot
+from metrics import ingest_phase
 
 
 logger = logging.getLogger(__name__)
 
-def process_sap_data(file_path):
-    """Process SAP data from Excel and return structured data."""
+SAP_DTYPES = {
+    'oper./act.': 'numeric',
+    'oper.workcenter': 'string',
+    'work': 'numeric',
+    'actual work': 'numeric',
+}
+# Columns kept for the job/work order/operation sync
+SAP_SYNC_COLUMNS = ['order', 'oper./act.', 'oper.workcenter', 'work', 'actual work', 'customer']
+# Optional NCR details some exports carry
+SAP_NCR_COLUMNS = ['issue_description', 'issue_category', 'root_cause', 'corrective_action', 'financial_impact']
+SAP_COLUMNS = SAP_SYNC_COLUMNS + SAP_NCR_COLUMNS
+
+def process_sap_data(file_path, progress=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Process SAP data from Excel and return the delta sync summary.
+
+    The workbook is streamed in chunks straight into the delta sync, which
+    writes each chunk before the next is read, so memory does not grow
+    with the file. Only the columns the job tables need are passed on; NCR
+    rows are set aside for NCR detection afterwards, followed by a plant
+    snapshot for /api/history. progress, if given, is called with phase
+    and row counts as the upload moves through these stages.
+    """
     try:
-        print("🚀 Starting SAP data processing...")
-        df = pd.read_excel(file_path, engine='openpyxl')
-        df.columns = df.columns.str.strip().str.lower()
-
-        if "oper.workcenter" not in df.columns:
-            print("⚠️ Column 'oper.workcenter' not found in SAPDATA!")
-            return
+        logger.info(f"Starting SAP data processing of {file_path}")
+        if progress:
+            progress(phase="syncing", rows_total=sheet_row_count(file_path))
+
+        ncr_chunks = []
+        chunks = iter_cached_chunks(
+            file_path, "sapdata",
+            lambda: iter_excel_chunks(file_path, chunk_size=chunk_size, dtypes=SAP_DTYPES, usecols=SAP_COLUMNS),
+        )
 
-        print(f"✅ SAPDATA.xlsx loaded with {len(df)} rows.")
-        
-        # Process NCR Data
-        process_ncr_data(df)
-        print("🎯 SAPDATA processing complete!")
+        def sync_chunks():
+            rows_parsed = 0
+            for chunk in chunks:
+                if "oper.workcenter" not in chunk.columns:
+                    raise ValueError("Column 'oper.workcenter' not found in SAPDATA")
+
+                # NCR rows are few; keep them whole for the tracker stage
+                ncr_chunks.append(chunk[chunk['oper.workcenter'].astype(str).str.strip().str.upper() == NCR_WORK_CENTER])
+                rows_parsed += len(chunk)
+                if progress:
+                    progress(rows_parsed=rows_parsed)
+                yield chunk[[c for c in SAP_SYNC_COLUMNS if c in chunk.columns]]
+            # Raised inside the sync's transaction, so an empty file deletes nothing
+            if not rows_parsed:
+                raise ValueError("SAPDATA contains no rows")
+
+        # Sync jobs, work orders and operations with only the rows that changed
+        summary = process_sapdata(sync_chunks(), mode="delta", progress=progress)
+        logger.info(f"SAPDATA delta sync summary: {summary}")
+
+        if progress:
+            progress(phase="ncr")
+        with ingest_phase("sapdata", "ncr"):
+            ncr = process_ncr_data(pd.concat(ncr_chunks, ignore_index=True))
+        summary['ncr'] = {'detected': ncr['detected'], 'updated': ncr['updated']}
+        if ncr.get('error'):
+            # The job sync is committed; report the NCR stage failure with it
+            summary['ncr']['error'] = ncr['error']
+
+        if progress:
+            progress(phase="snapshot")
+        with ingest_phase("sapdata", "snapshot"):
+            summary['snapshot'] = take_snapshot()
+        return summary
 
     except Exception as e:
-        print(f"❌ Error processing SAP data: {str(e)}")
+        logger.error(f"Error processing SAP data: {str(e)}")
+        raise
 
 
 
 def process_ncr_data(df):
-    try:
-        required_columns = ['order', 'oper./act.', 'oper.workcenter', 'work', 'actual work']
-        if not all(col in df.columns for col in required_columns):
-            print("⚠️ SAPDATA.xlsx is missing required columns for NCR processing!")
-            return
-
-        # Filter NCR operations
-        ncr_data = df[df['oper.workcenter'].str.upper() == 'NCR']
-
-        if ncr_data.empty:
-            print("ℹ️ No NCR operations found in SAPDATA.xlsx.")
-            return
-
-        # Insert NCR data into the database
-        for _, row in ncr_data.iterrows():
-            ncr_record = NCRTracker(
-                ncr_number=str(uuid.uuid4()),  # Generate unique NCR number
-                job_number=row['order'],
-                work_order=row.get('order', 'Unknown'),  # Ensure work_order is not NULL
-                operation_number=row['oper./act.'],
-                planned_hours=row['work'],
-                actual_hours=row['actual work'],
-                issue_description=row.get('issue_description', 'No issue description provided'),  # ✅ Default value
-                issue_category=row.get('issue_category', 'Uncategorized'),
-                root_cause=row.get('root_cause', 'Unknown'),
-                corrective_action=row.get('corrective_action', 'None'),
-                financial_impact=row.get('financial_impact', 0.0),
-                created_at=datetime.now(),
-                status="Active" if row['actual work'] > 0 else "Pending"
-            )
-            db.session.add(ncr_record)
+    """Record newly started NCR operations from a SAPDATA frame.
 
-        db.session.commit()
-        print("✅ NCR Data saved successfully!")
+    Runs as its own transaction after the job sync. Returns the
+    sync_ncr_trackers() summary; a failure is logged, returned as the
+    summary's error and leaves the synced jobs in place.
+    """
+    required_columns = ['order', 'oper./act.', 'oper.workcenter', 'work', 'actual work']
+    if not all(col in df.columns for col in required_columns):
+        logger.warning("SAPDATA is missing required columns for NCR processing")
+        return {'detected': 0, 'updated': 0, 'new': []}
 
+    try:
+        summary = sync_ncr_trackers(build_ncr_frame(df))
+        if summary['new']:
+            publish_on_commit(db.session, "ncr", {"source": "ingest", "ncrs": summary['new'][:MAX_EVENT_ITEMS]})
+        db.session.commit()
     except Exception as e:
         db.session.rollback()
-        print(f"❌ Error saving NCR data: {str(e)}")
-
-        
-def process_worklog_data(file_path):
-    df = pd.read_excel(file_path, sheet_name='SAP Document Export')
-
-    # Convert column names to lowercase for consistency
-    df.columns = df.columns.str.strip().str.lower()
-
-    for _, row in df.iterrows():
-        worklog_entry = WorkLog(
-            employee_id=int(row["pernr"]),
-            employee_name=row["employeename"],
-            job_number=str(int(row["order"])) if pd.notna(row["order"]) else None,
-            work_order=str(int(row["operation"])) if pd.notna(row["operation"]) else None,
-            operation_number=int(row["operation"]),
-            operation_description=row["operation short text"],
-            actual_hours=float(row["acutal work"]),
-            posting_date=datetime.strptime(row["postingdate"], "%m/%d/%Y"),
-            adjustment_text=row["adjustment confirmation text"] if pd.notna(row["adjustment confirmation text"]) else None,
-            non_prod_code=row["nonprodcode"] if pd.notna(row["nonprodcode"]) else None
-        )
-        db.session.add(worklog_entry)
-
-    db.session.commit()
-
-
+        logger.exception("Error saving NCR data")
+        return {'detected': 0, 'updated': 0, 'new': [], 'error': str(e)}
+
+    if summary['detected'] or summary['updated']:
+        bump_dataset_version("ncr")
+    logger.info(f"NCR trackers: {summary['detected']} newly started, {summary['updated']} refreshed")
+    return summary
+
+
+def process_worklog_data(file_path, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Load a labor-confirmation export and return the ingest summary.
+
+    Rows that fail validation are skipped and written to an error report
+    next to the upload (<file>.errors.csv) instead of aborting the import.
+    """
+    chunks = iter_cached_chunks(
+        file_path, "worklog",
+        lambda: iter_excel_chunks(file_path, sheet_name='SAP Document Export', chunk_size=chunk_size, row_numbers=True),
+    )
+    summary, rejected = load_worklog_chunks(chunks, progress=progress)
+    bump_dataset_version("worklog")
+
+    if not rejected.empty:
+        report_path = os.path.splitext(file_path)[0] + ".errors.csv"
+        rejected.to_csv(report_path, index=False)
+        summary['error_report'] = report_path
+        logger.warning(f"{len(rejected)} worklog rows rejected, see {report_path}")
+
+    return summary
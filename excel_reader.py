@@ -0,0 +1,81 @@
+import logging
+import pandas as pd
+from openpyxl import load_workbook
+
+logger = logging.getLogger(__name__)
+
+# Rows per DataFrame chunk handed to the processors
+DEFAULT_CHUNK_SIZE = 10000
+# Column holding each row's 1-based spreadsheet row number, if requested
+SHEET_ROW = "__sheet_row__"
+
+
+def normalize_column_name(name):
+    """Match the processors' convention: stripped, lower-case column names."""
+    return str(name).strip().lower() if name is not None else ""
+
+
+def _typed_frame(rows, columns, dtypes):
+    frame = pd.DataFrame.from_records(rows, columns=columns)
+    for column, kind in (dtypes or {}).items():
+        if column not in frame.columns:
+            continue
+        if kind == "numeric":
+            frame[column] = pd.to_numeric(frame[column], errors="coerce")
+        elif kind == "string":
+            frame[column] = frame[column].where(frame[column].isna(), frame[column].astype(str).str.strip())
+        elif kind == "datetime":
+            frame[column] = pd.to_datetime(frame[column], errors="coerce")
+    return frame
+
+
+def sheet_row_count(file_path, sheet_name=None):
+    """Data rows in a sheet according to its stored dimensions (None if unknown)."""
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.active
+        return sheet.max_row - 1 if sheet.max_row else None
+    finally:
+        workbook.close()
+
+
+def iter_excel_chunks(file_path, sheet_name=None, chunk_size=DEFAULT_CHUNK_SIZE, dtypes=None, usecols=None,
+                      row_numbers=False):
+    """Yield a sheet as DataFrame chunks of at most chunk_size rows.
+
+    The workbook is opened in openpyxl read-only mode and read row by row, so
+    memory is bounded by one chunk regardless of the file size. Column names
+    are normalized the same way the processors expect, dtypes maps column
+    names to "numeric", "string" or "datetime", and usecols limits the chunks
+    to the listed (normalized) columns. Blank rows are skipped; with
+    row_numbers the chunks get a SHEET_ROW column so rows can still be
+    reported by their position in the sheet.
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+
+        columns = [normalize_column_name(name) for name in header]
+        positions = [i for i, name in enumerate(columns) if name and (usecols is None or name in usecols)]
+        columns = [columns[i] for i in positions]
+        if row_numbers:
+            columns.append(SHEET_ROW)
+
+        buffer = []
+        # The header is sheet row 1
+        for number, row in enumerate(rows, start=2):
+            values = tuple(row[i] if i < len(row) else None for i in positions)
+            if all(value is None for value in values):
+                continue
+            buffer.append(values + (number,) if row_numbers else values)
+            if len(buffer) >= chunk_size:
+                yield _typed_frame(buffer, columns, dtypes)
+                buffer = []
+        if buffer:
+            yield _typed_frame(buffer, columns, dtypes)
+    finally:
+        workbook.close()
@@ -0,0 +1,201 @@
+import time
+import logging
+import threading
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from app import db
+from models import Job, WorkOrder, Operation, WorkLog
+from api_cache import dataset_version
+from aggregates import iso_date
+import plant_model
+
+logger = logging.getLogger(__name__)
+
+# Worklog history used for burn rates; recent postings weigh more
+HISTORY_DAYS = 56
+HALF_LIFE_DAYS = 14
+# Planned-hours overrun assumed where no completed operations exist to learn it from
+DEFAULT_OVERRUN = 1.1
+OVERRUN_BOUNDS = (0.5, 3.0)
+
+_cache_lock = threading.Lock()
+_cache = {}
+
+
+def _read_frame(query):
+    """Run query and build a DataFrame straight from the DBAPI rows.
+
+    Skips SQLAlchemy's per-row Result processing, which dominates the load
+    time for a million worklog rows; column types are fixed up by pandas.
+    """
+    result = db.session.connection().execute(query.statement)
+    return pd.DataFrame.from_records(result.cursor.fetchall(), columns=list(result.keys()))
+
+
+def load_operations():
+    """Operations with their job number, as one DataFrame."""
+    if plant_model.enabled():
+        return plant_model.get_model().operations_frame()
+    query = db.session.query(
+        Job.job_number,
+        Operation.operation_number,
+        Operation.work_center,
+        func.coalesce(Operation.planned_hours, 0).label('planned_hours'),
+        func.coalesce(Operation.actual_hours, 0).label('actual_hours'),
+        func.coalesce(Operation.status, '').label('status'),
+    ).join(WorkOrder, WorkOrder.id == Operation.work_order_id).join(Job, Job.id == WorkOrder.job_id)
+    return _read_frame(query)
+
+
+def load_worklog(as_of, history_days=HISTORY_DAYS):
+    """Worklog postings of the history window ending at as_of."""
+    query = db.session.query(
+        WorkLog.job_number,
+        WorkLog.operation_number,
+        WorkLog.actual_hours,
+        # ISO text is parsed in one vectorized call instead of per-row date objects
+        iso_date(WorkLog.posting_date).label('posting_date'),
+    ).filter(WorkLog.posting_date > as_of - timedelta(days=history_days), WorkLog.posting_date <= as_of)
+    return _read_frame(query)
+
+
+def decay_weights(ages, half_life=HALF_LIFE_DAYS):
+    return 0.5 ** (np.asarray(ages, dtype=float) / half_life)
+
+
+def burn_normalizer(as_of, history_days=HISTORY_DAYS, half_life=HALF_LIFE_DAYS):
+    """Weighted hours of someone posting one hour on every working day of the window.
+
+    Dividing weighted hours by this gives a burn rate in hours per working day.
+    """
+    ages = np.arange(history_days)
+    days = np.datetime64(as_of, 'D') - ages
+    return decay_weights(ages[np.is_busday(days)], half_life).sum()
+
+
+def _group_sums(codes, n, **columns):
+    return {name: np.bincount(codes, weights=values, minlength=n) for name, values in columns.items()}
+
+
+def _projection(names, codes, op_columns, log_codes, log_weighted_hours, normalizer, as_of):
+    """Per-group totals, burn rate and projected finish for one grouping."""
+    n = len(names)
+    totals = _group_sums(codes, n, **op_columns)
+    burn_rate = np.bincount(log_codes, weights=log_weighted_hours, minlength=n) / normalizer
+    remaining = totals['remaining_hours']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days = np.where(burn_rate > 0, np.ceil(remaining / burn_rate), np.nan)
+    finishes = np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+    known = ~np.isnan(days)
+    finishes[known] = np.busday_offset(np.datetime64(as_of, 'D'), days[known].astype(np.int64), roll='forward')
+    return pd.DataFrame({
+        'planned_hours': totals['planned_hours'],
+        'actual_hours': totals['actual_hours'],
+        'remaining_hours': remaining,
+        'projected_hours': totals['projected_hours'],
+        'open_operations': totals['open_operations'].astype(np.int64),
+        'burn_rate': burn_rate,
+        'days_to_finish': days,
+        'projected_finish_date': finishes,
+    }, index=pd.Index(names, name='name'))
+
+
+def forecast_frames(ops, worklog, as_of, history_days=HISTORY_DAYS, half_life=HALF_LIFE_DAYS):
+    """Work center and job projections for the whole plant in one pass.
+
+    ops has the load_operations() columns and worklog the load_worklog()
+    ones. Projected hours scale the open planned hours by each work
+    center's overrun on completed operations; burn rates are
+    decay-weighted worklog hours per working day. Returns
+    (work_centers, jobs) DataFrames indexed by name.
+    """
+    planned = ops['planned_hours'].to_numpy(dtype=float)
+    actual = ops['actual_hours'].to_numpy(dtype=float)
+    is_open = ops['status'].to_numpy() != 'Completed'
+    center_codes, center_names = pd.factorize(ops['work_center'], sort=True)
+    job_codes, job_names = pd.factorize(ops['job_number'], sort=True)
+    n_centers = len(center_names)
+
+    done = _group_sums(center_codes, n_centers, planned=np.where(is_open, 0, planned), actual=np.where(is_open, 0, actual))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        overrun = np.where(done['planned'] > 0, done['actual'] / done['planned'], DEFAULT_OVERRUN)
+    overrun = np.clip(overrun, *OVERRUN_BOUNDS)
+
+    op_columns = {
+        'planned_hours': planned,
+        'actual_hours': actual,
+        'remaining_hours': np.where(is_open, np.clip(planned - actual, 0, None), 0),
+        'projected_hours': np.where(is_open, np.maximum(planned * overrun[center_codes], actual), actual),
+        'open_operations': is_open.astype(float),
+    }
+
+    ages = (np.datetime64(as_of, 'D') - pd.to_datetime(worklog['posting_date'], format='%Y-%m-%d').to_numpy(dtype='datetime64[D]')).astype(np.int64)
+    weighted_hours = worklog['actual_hours'].to_numpy(dtype=float) * decay_weights(ages, half_life)
+    normalizer = burn_normalizer(as_of, history_days, half_life) or 1.0
+
+    # Postings reach a work center through their (job, operation) key;
+    # WorkLog.work_order holds the operation number, not the SAP order, so
+    # this is the finest key the worklog has. A key repeated on two work
+    # orders of a job books to its first operation row.
+    op_keys = pd.MultiIndex.from_arrays([ops['job_number'].astype(str), ops['operation_number'].astype(np.int64)])
+    log_keys = pd.MultiIndex.from_arrays([worklog['job_number'].astype(str), worklog['operation_number'].astype(np.int64)])
+    if op_keys.is_unique:
+        log_ops = op_keys.get_indexer(log_keys)
+    else:
+        # Positions in the de-duplicated keys, mapped back to rows of ops
+        first = np.flatnonzero(~op_keys.duplicated())
+        positions = op_keys[first].get_indexer(log_keys)
+        log_ops = np.where(positions >= 0, first[positions], -1)
+    matched = log_ops >= 0
+    log_centers = center_codes[log_ops[matched]]
+    log_jobs = pd.Index(job_names).get_indexer(worklog['job_number'].astype(str))
+
+    work_centers = _projection(center_names, center_codes, op_columns, log_centers, weighted_hours[matched], normalizer, as_of)
+    jobs = _projection(job_names, job_codes, op_columns, log_jobs[log_jobs >= 0], weighted_hours[log_jobs >= 0], normalizer, as_of)
+    return work_centers, jobs
+
+
+def _records(frame):
+    out = {}
+    for name, row in zip(frame.index, frame.itertuples(index=False)):
+        finish = row.projected_finish_date
+        out[name] = {
+            "planned_hours": round(float(row.planned_hours), 2),
+            "actual_hours": round(float(row.actual_hours), 2),
+            "remaining_hours": round(float(row.remaining_hours), 2),
+            "projected_hours": round(float(row.projected_hours), 2),
+            "open_operations": int(row.open_operations),
+            "burn_rate": round(float(row.burn_rate), 2),
+            "days_to_finish": None if np.isnan(row.days_to_finish) else int(row.days_to_finish),
+            "projected_finish_date": None if pd.isna(finish) else pd.Timestamp(finish).date().isoformat(),
+        }
+    return out
+
+
+def plant_forecast(as_of=None):
+    """Forecast for every work center and job, cached per dataset version.
+
+    Returns {"as_of", "work_centers": {...}, "jobs": {...}}; any ingest or
+    schedule change bumps the dataset version and so forces a recompute.
+    """
+    as_of = as_of or date.today()
+    key = (dataset_version(), as_of)
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    started = time.perf_counter()
+    work_centers, jobs = forecast_frames(load_operations(), load_worklog(as_of), as_of)
+    result = {
+        "as_of": as_of.isoformat(),
+        "work_centers": _records(work_centers),
+        "jobs": _records(jobs),
+    }
+    with _cache_lock:
+        _cache.clear()
+        _cache[key] = result
+    logger.info(f"Forecast for {len(work_centers)} work centers and {len(jobs)} jobs in {time.perf_counter() - started:.2f}s")
+    return result
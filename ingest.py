@@ -0,0 +1,682 @@
+import io
+import time
+import logging
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert, select, update, delete, tuple_
+from app import db
+from models import Job, WorkOrder, Operation, WorkLog, NCRTracker
+from metrics import INGEST_PHASE_SECONDS, PhaseTimer
+from excel_reader import SHEET_ROW
+
+logger = logging.getLogger(__name__)
+
+# Rows per multi-row INSERT statement when COPY is not available
+INSERT_BATCH_SIZE = 5000
+
+# Operation columns that come from SAP and therefore participate in the row hash.
+# scheduled_date is owned by the planners and is never overwritten by a sync.
+OPERATION_HASH_COLUMNS = ['work_center', 'planned_hours', 'actual_hours', 'status']
+
+DEFAULT_CUSTOMER = "Unknown Customer"
+
+
+def normalize_columns(df):
+    """Return a copy of df with stripped, lower-cased column names."""
+    df = df.copy(deep=False)
+    df.columns = df.columns.astype(str).str.strip().str.lower()
+    return df
+
+
+def _job_numbers(orders):
+    job_number = orders.astype(str).str.strip()
+    # Excel hands numeric orders back as floats ("1234.0")
+    return job_number.str.replace(r'\.0$', '', regex=True)
+
+
+def build_sap_frames(df):
+    """Derive job, work order and operation tables from a SAPDATA frame.
+
+    Everything is computed column-wise; the returned frames are keyed by
+    job_number / work_order_number so foreign keys can be resolved after
+    the parent rows are written.
+    """
+    df = normalize_columns(df)
+
+    job_number = _job_numbers(df['order'])
+    operation_number = pd.to_numeric(df['oper./act.'], errors='coerce')
+    planned = pd.to_numeric(df['work'], errors='coerce')
+    actual = pd.to_numeric(df['actual work'], errors='coerce')
+
+    valid = operation_number.notna() & planned.notna() & job_number.ne('') & job_number.ne('nan')
+    skipped = int((~valid).sum())
+    if skipped:
+        logger.warning(f"Skipping {skipped} SAPDATA rows with missing order, operation or work")
+
+    if 'customer' in df.columns:
+        customer = df['customer'].where(df['customer'].notna(), DEFAULT_CUSTOMER).astype(str)
+    else:
+        customer = pd.Series(DEFAULT_CUSTOMER, index=df.index)
+
+    operations = pd.DataFrame({
+        'job_number': job_number[valid],
+        # Work order number mirrors the job number (one work order per job)
+        'work_order_number': job_number[valid],
+        'operation_number': operation_number[valid].astype('int64'),
+        'work_center': df.loc[valid, 'oper.workcenter'].astype(str).str.strip(),
+        'planned_hours': planned[valid].astype(float),
+        'actual_hours': actual[valid].fillna(0).astype(float),
+    })
+    operations['status'] = 'In Progress'
+    operations.loc[actual[valid].notna() & (actual[valid] >= planned[valid]), 'status'] = 'Completed'
+    operations['scheduled_date'] = datetime.now().date()
+    # An operation appears once per work order; a repeated line replaces the earlier one
+    operations = operations.drop_duplicates(['work_order_number', 'operation_number'], keep='last')
+
+    jobs = (
+        pd.DataFrame({'job_number': job_number[valid], 'customer_name': customer[valid]})
+        .drop_duplicates('job_number')
+        .reset_index(drop=True)
+    )
+    work_orders = (
+        operations[['work_order_number', 'job_number']]
+        .drop_duplicates('work_order_number')
+        .reset_index(drop=True)
+    )
+    return jobs, work_orders, operations.reset_index(drop=True), skipped
+
+
+def _copy_supported():
+    """COPY is only used on PostgreSQL through psycopg2."""
+    engine = db.session.get_bind()
+    return engine.dialect.name == 'postgresql' and engine.dialect.driver == 'psycopg2'
+
+
+def _copy_rows(table, frame):
+    """Stream frame into table with PostgreSQL COPY FROM STDIN."""
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False, na_rep='\\N')
+    buffer.seek(0)
+    columns = ', '.join(frame.columns)
+    cursor = db.session.connection().connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def write_rows(model, frame, batch_size=INSERT_BATCH_SIZE):
+    """Write frame into the model's table with COPY or batched multi-row INSERTs."""
+    if frame.empty:
+        return 0
+    table = model.__table__
+    if _copy_supported():
+        _copy_rows(table, frame)
+        return len(frame)
+
+    records = frame.to_dict('records')
+    for start in range(0, len(records), batch_size):
+        db.session.execute(insert(table), records[start:start + batch_size])
+    return len(records)
+
+
+def _id_map(key_column, id_column):
+    """Load a natural key -> primary key mapping in one query."""
+    rows = db.session.execute(select(key_column, id_column)).all()
+    return pd.Series({key: pk for key, pk in rows}, dtype='int64')
+
+
+def bulk_load_sapdata(df):
+    """Replace Job/WorkOrder/Operation with the contents of a SAPDATA frame.
+
+    Parent keys are resolved with one SELECT per table instead of a flush per
+    row. Returns a stats dict including throughput in rows/second.
+    """
+    started = time.perf_counter()
+    jobs, work_orders, operations, skipped = build_sap_frames(df)
+    transformed = time.perf_counter()
+
+    try:
+        db.session.execute(Operation.__table__.delete())
+        db.session.execute(WorkOrder.__table__.delete())
+        db.session.execute(Job.__table__.delete())
+
+        now = datetime.utcnow()
+        jobs['created_at'] = now
+        write_rows(Job, jobs)
+
+        job_ids = _id_map(Job.job_number, Job.id)
+        wo_frame = pd.DataFrame({
+            'work_order_number': work_orders['work_order_number'],
+            'job_id': work_orders['job_number'].map(job_ids).astype('int64'),
+            'created_at': now,
+        })
+        write_rows(WorkOrder, wo_frame)
+
+        wo_ids = _id_map(WorkOrder.work_order_number, WorkOrder.id)
+        op_frame = operations.drop(columns=['job_number', 'work_order_number'])
+        op_frame.insert(0, 'work_order_id', operations['work_order_number'].map(wo_ids).astype('int64'))
+        op_frame['created_at'] = now
+        write_rows(Operation, op_frame)
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    finished = time.perf_counter()
+    INGEST_PHASE_SECONDS.observe(transformed - started, dataset='sapdata', phase='transform')
+    INGEST_PHASE_SECONDS.observe(finished - transformed, dataset='sapdata', phase='write')
+    elapsed = finished - started
+    stats = {
+        'rows': len(df),
+        'skipped': skipped,
+        'jobs': len(jobs),
+        'work_orders': len(work_orders),
+        'operations': len(operations),
+        'transform_seconds': round(transformed - started, 3),
+        'write_seconds': round(finished - transformed, 3),
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(len(df) / elapsed) if elapsed else None,
+    }
+    logger.info(
+        f"Bulk SAPDATA ingest: {stats['operations']} operations in {stats['seconds']}s "
+        f"({stats['rows_per_second']} rows/s)"
+    )
+    return stats
+
+
+def _dialect_insert(table):
+    """Return an INSERT construct that supports ON CONFLICT, or None."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(table)
+
+
+def upsert_rows(model, frame, index_elements, update_columns, batch_size=INSERT_BATCH_SIZE):
+    """INSERT ... ON CONFLICT DO UPDATE the rows of frame into model's table.
+
+    Dialects without ON CONFLICT fall back to updating rows whose key already
+    exists and inserting the rest.
+    """
+    if frame.empty:
+        return 0
+    table = model.__table__
+    records = frame.to_dict('records')
+    stmt = _dialect_insert(table)
+    if stmt is not None:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={column: stmt.excluded[column] for column in update_columns},
+        )
+        for start in range(0, len(records), batch_size):
+            db.session.execute(stmt, records[start:start + batch_size])
+        return len(records)
+
+    key_columns = [table.c[name] for name in index_elements]
+    existing = {tuple(row) for row in db.session.execute(select(*key_columns)).all()}
+    new_rows = [r for r in records if tuple(r[k] for k in index_elements) not in existing]
+    old_rows = [r for r in records if tuple(r[k] for k in index_elements) in existing]
+    if new_rows:
+        db.session.execute(insert(table), new_rows)
+    for row in old_rows:
+        where = [table.c[k] == row[k] for k in index_elements]
+        db.session.execute(update(table).where(*where).values({c: row[c] for c in update_columns}))
+    return len(records)
+
+
+def _delete_ids(model, ids, batch_size=INSERT_BATCH_SIZE):
+    ids = [int(pk) for pk in ids]
+    for start in range(0, len(ids), batch_size):
+        db.session.execute(delete(model.__table__).where(model.id.in_(ids[start:start + batch_size])))
+    return len(ids)
+
+
+def _row_hash(frame):
+    return pd.util.hash_pandas_object(frame[OPERATION_HASH_COLUMNS], index=False).to_numpy()
+
+
+def _select_in(columns, key_column, keys, *joins):
+    """Rows of columns whose key_column is in keys, as a DataFrame, one IN list per batch."""
+    keys = list(keys)
+    rows = []
+    for start in range(0, len(keys), INSERT_BATCH_SIZE):
+        query = select(*columns)
+        for target, condition in joins:
+            query = query.join(target, condition)
+        rows.extend(db.session.execute(query.where(key_column.in_(keys[start:start + INSERT_BATCH_SIZE]))).all())
+    return pd.DataFrame(rows, columns=[column.key for column in columns])
+
+
+def _stale_ids(model, seen, batch_size=50000):
+    """Primary keys of model's rows not in the sorted array seen, read in batches."""
+    stale = []
+    result = db.session.execute(select(model.id).execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        ids = np.fromiter((row[0] for row in partition), dtype=np.int64, count=len(partition))
+        stale.append(ids[~np.isin(ids, seen)])
+    return np.concatenate(stale) if stale else np.empty(0, dtype=np.int64)
+
+
+class _DeltaState:
+    """Ids reconciled so far in a chunked delta sync, kept as sorted arrays."""
+
+    def __init__(self):
+        self.jobs = np.empty(0, dtype=np.int64)
+        self.work_orders = np.empty(0, dtype=np.int64)
+        self.operations = np.empty(0, dtype=np.int64)
+        self.work_centers = set()
+
+
+def _sync_sap_chunk(jobs, work_orders, operations, state, summary, now):
+    """Diff and write one chunk's frames; returns the operations reconciled."""
+    # Jobs; a job seen in an earlier chunk keeps that chunk's customer
+    existing = _select_in([Job.id, Job.job_number, Job.customer_name], Job.job_number, jobs['job_number'])
+    merged = jobs.merge(existing, on='job_number', how='left', suffixes=('', '_old'))
+    fresh = ~merged['id'].isin(state.jobs)
+    new_jobs = merged['id'].isna()
+    changed_jobs = fresh & ~new_jobs & (merged['customer_name'] != merged['customer_name_old'])
+    upsert_rows(Job, merged.loc[new_jobs | changed_jobs, ['job_number', 'customer_name']].assign(created_at=now),
+                ['job_number'], ['customer_name'])
+    summary['jobs']['inserted'] += int(new_jobs.sum())
+    summary['jobs']['updated'] += int(changed_jobs.sum())
+    job_ids = _select_in([Job.job_number, Job.id], Job.job_number, jobs['job_number'])
+    state.jobs = np.union1d(state.jobs, job_ids['id'].to_numpy(dtype=np.int64))
+    job_ids = job_ids.set_index('job_number')['id']
+
+    # Work orders
+    wo_frame = pd.DataFrame({
+        'work_order_number': work_orders['work_order_number'],
+        'job_id': work_orders['job_number'].map(job_ids).astype('int64'),
+    })
+    existing = _select_in([WorkOrder.id, WorkOrder.work_order_number, WorkOrder.job_id],
+                          WorkOrder.work_order_number, wo_frame['work_order_number'])
+    merged = wo_frame.merge(existing, on='work_order_number', how='left', suffixes=('', '_old'))
+    fresh = ~merged['id'].isin(state.work_orders)
+    new_wos = merged['id'].isna()
+    changed_wos = fresh & ~new_wos & (merged['job_id'] != merged['job_id_old'])
+    upsert_rows(WorkOrder, merged.loc[new_wos | changed_wos, ['work_order_number', 'job_id']].assign(created_at=now),
+                ['work_order_number'], ['job_id'])
+    summary['work_orders']['inserted'] += int(new_wos.sum())
+    summary['work_orders']['updated'] += int(changed_wos.sum())
+    wo_ids = _select_in([WorkOrder.work_order_number, WorkOrder.id], WorkOrder.work_order_number,
+                        wo_frame['work_order_number'])
+    state.work_orders = np.union1d(state.work_orders, wo_ids['id'].to_numpy(dtype=np.int64))
+    wo_ids = wo_ids.set_index('work_order_number')['id']
+
+    # Operations of this chunk's work orders
+    op_columns = [Operation.id, WorkOrder.work_order_number, Operation.operation_number]
+    joins = [(WorkOrder, Operation.work_order_id == WorkOrder.id)]
+    existing = _select_in(op_columns + [getattr(Operation, column) for column in OPERATION_HASH_COLUMNS],
+                          WorkOrder.work_order_number, wo_ids.index, *joins)
+    existing = existing.astype({'operation_number': 'int64'})
+    existing['row_hash'] = _row_hash(existing) if not existing.empty else pd.Series(dtype='uint64')
+    operations = operations.assign(row_hash=_row_hash(operations))
+    merged = operations.merge(
+        existing[['id', 'work_order_number', 'operation_number', 'work_center', 'row_hash']],
+        on=['work_order_number', 'operation_number'], how='left', suffixes=('', '_old'),
+    )
+    # A line repeated from an earlier chunk replaces it but is not counted twice
+    fresh = ~merged['id'].isin(state.operations)
+    new_ops = merged['id'].isna()
+    changed_ops = ~new_ops & (merged['row_hash'] != merged['row_hash_old'])
+    summary['operations']['inserted'] += int(new_ops.sum())
+    summary['operations']['updated'] += int((fresh & changed_ops).sum())
+    summary['operations']['unchanged'] += int((fresh & ~new_ops & ~changed_ops).sum())
+    touched = new_ops | changed_ops
+    state.work_centers.update(merged.loc[touched, 'work_center'].dropna())
+    state.work_centers.update(merged.loc[touched, 'work_center_old'].dropna())
+
+    # New and changed operations go through one upsert on
+    # (work_order_id, operation_number); scheduled_date is only written
+    # for new rows, so planner edits survive
+    upserts = merged.loc[touched]
+    op_frame = upserts[['operation_number'] + OPERATION_HASH_COLUMNS + ['scheduled_date']].copy()
+    op_frame.insert(0, 'work_order_id', upserts['work_order_number'].map(wo_ids).astype('int64'))
+    op_frame['operation_number'] = op_frame['operation_number'].astype('int64')
+    op_frame['created_at'] = now
+    for start in range(0, len(op_frame), INSERT_BATCH_SIZE):
+        upsert_rows(Operation, op_frame.iloc[start:start + INSERT_BATCH_SIZE],
+                    ['work_order_id', 'operation_number'], OPERATION_HASH_COLUMNS)
+
+    stored = _select_in(op_columns, WorkOrder.work_order_number, wo_ids.index, *joins).astype({'operation_number': 'int64'})
+    seen = stored.merge(operations[['work_order_number', 'operation_number']], on=['work_order_number', 'operation_number'])
+    state.operations = np.union1d(state.operations, seen['id'].to_numpy(dtype=np.int64))
+    return len(operations)
+
+
+def delta_sync_sapdata(chunks, progress=None):
+    """Apply SAPDATA as a diff against the current tables.
+
+    chunks is a SAPDATA frame or an iterable of frame chunks, such as
+    excel_reader.iter_excel_chunks() yields. Each chunk is diffed and
+    written before the next one is read, so memory holds one chunk plus
+    the ids of the rows reconciled so far; rows the file no longer has are
+    deleted after the last chunk. Rows are keyed on job_number /
+    work_order_number / operation_number and compared by a hash of their
+    SAP-owned columns, so only inserted, changed or vanished rows are
+    written. A repeated operation line replaces the earlier one and a job
+    keeps the customer of its first line; when the repeat falls in a later
+    chunk the earlier line is written first and counted as an update.
+    Everything happens in one transaction, which keeps the previous data
+    visible to readers until the commit. progress, if given, is called
+    with rows_written as operations are reconciled. Returns a summary of
+    changed rows per table.
+    """
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+    started = time.perf_counter()
+    timer = PhaseTimer('sapdata')
+    state = _DeltaState()
+    summary = {
+        'rows': 0,
+        'skipped': 0,
+        'jobs': {'inserted': 0, 'updated': 0, 'deleted': 0},
+        'work_orders': {'inserted': 0, 'updated': 0, 'deleted': 0},
+        'operations': {'inserted': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0},
+    }
+    reconciled = 0
+
+    try:
+        now = datetime.utcnow()
+        chunks = iter(chunks)
+        while True:
+            # Chunks may be read lazily, so pulling the next one is the parse time
+            with timer.phase('parse'):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            with timer.phase('transform'):
+                jobs, work_orders, operations, skipped = build_sap_frames(chunk)
+            summary['rows'] += len(chunk)
+            summary['skipped'] += skipped
+            with timer.phase('write'):
+                reconciled += _sync_sap_chunk(jobs, work_orders, operations, state, summary, now)
+            if progress:
+                progress(rows_written=reconciled)
+
+        with timer.phase('write'):
+            stale_op_ids = _stale_ids(Operation, state.operations)
+            for start in range(0, len(stale_op_ids), INSERT_BATCH_SIZE):
+                state.work_centers.update(db.session.execute(
+                    select(Operation.work_center).distinct()
+                    .where(Operation.id.in_(stale_op_ids[start:start + INSERT_BATCH_SIZE].tolist()))
+                ).scalars())
+            summary['operations']['deleted'] = _delete_ids(Operation, stale_op_ids)
+            summary['work_orders']['deleted'] = _delete_ids(WorkOrder, _stale_ids(WorkOrder, state.work_orders))
+            summary['jobs']['deleted'] = _delete_ids(Job, _stale_ids(Job, state.jobs))
+            # Work centers whose totals moved, on either side of the diff
+            summary['work_centers'] = sorted(name for name in state.work_centers if name is not None)
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    timer.observe()
+    summary['seconds'] = round(time.perf_counter() - started, 3)
+    logger.info(f"Delta SAPDATA sync: {summary}")
+    return summary
+
+
+NCR_WORK_CENTER = 'NCR'
+NCR_KEY = ['job_number', 'work_order', 'operation_number']
+# Report fields an SAP export may carry; the quality team fills in the rest
+NCR_DETAIL_DEFAULTS = {
+    'issue_description': 'No issue description provided',
+    'issue_category': 'Uncategorized',
+    'root_cause': 'Unknown',
+    'corrective_action': 'None',
+    'financial_impact': 0.0,
+}
+
+
+def build_ncr_frame(df):
+    """Started NCR operations of a SAPDATA frame, one row per tracker key.
+
+    An NCR operation counts as started once it has actual hours; missing
+    hours are treated as zero rather than written as NaN.
+    """
+    df = normalize_columns(df)
+    ncr = df[df['oper.workcenter'].astype(str).str.strip().str.upper() == NCR_WORK_CENTER]
+    job_number = _job_numbers(ncr['order'])
+    operation_number = pd.to_numeric(ncr['oper./act.'], errors='coerce')
+    planned = pd.to_numeric(ncr['work'], errors='coerce').fillna(0.0)
+    actual = pd.to_numeric(ncr['actual work'], errors='coerce').fillna(0.0)
+    started = operation_number.notna() & job_number.ne('') & job_number.ne('nan') & (actual > 0)
+
+    frame = pd.DataFrame({
+        'job_number': job_number[started],
+        # Work order number mirrors the job number (one work order per job)
+        'work_order': job_number[started],
+        'operation_number': operation_number[started].astype('int64'),
+        'planned_hours': planned[started].astype(float),
+        'actual_hours': actual[started].astype(float),
+    })
+    for column, default in NCR_DETAIL_DEFAULTS.items():
+        values = ncr.loc[started, column] if column in ncr.columns else pd.Series(default, index=frame.index)
+        frame[column] = values.where(values.notna(), default)
+    return frame.drop_duplicates(NCR_KEY, keep='last').reset_index(drop=True)
+
+
+def _free_ncr_numbers(numbers):
+    """numbers with a "-2", "-3", ... suffix on any that another tracker already uses.
+
+    Generated numbers can collide with ones typed into /api/ncr_report for
+    a different operation; ncr_number is unique, so those get the first free
+    suffix instead of failing the whole upsert.
+    """
+    numbers = list(numbers)
+    taken = set()
+    for start in range(0, len(numbers), INSERT_BATCH_SIZE):
+        taken.update(db.session.execute(
+            select(NCRTracker.ncr_number).where(NCRTracker.ncr_number.in_(numbers[start:start + INSERT_BATCH_SIZE]))
+        ).scalars())
+    if not taken:
+        return numbers
+    for base in list(taken):
+        taken.update(db.session.execute(
+            select(NCRTracker.ncr_number).where(NCRTracker.ncr_number.like(f"{base}-%"))
+        ).scalars())
+    free = []
+    for number in numbers:
+        candidate, suffix = number, 1
+        while candidate in taken:
+            suffix += 1
+            candidate = f"{number}-{suffix}"
+        taken.add(candidate)
+        free.append(candidate)
+    return free
+
+
+def sync_ncr_trackers(frame):
+    """Upsert one NCRTracker per started NCR operation.
+
+    Trackers are keyed on (job_number, work_order, operation_number); an
+    existing one only gets its hours refreshed, since status and report
+    details belong to the quality team. Does not commit. Returns a summary
+    with the newly detected trackers.
+    """
+    if frame.empty:
+        return {'detected': 0, 'updated': 0, 'new': []}
+
+    existing = {}
+    jobs = frame['job_number'].unique().tolist()
+    for start in range(0, len(jobs), INSERT_BATCH_SIZE):
+        for job, work_order, operation, planned, actual in db.session.execute(
+            select(NCRTracker.job_number, NCRTracker.work_order, NCRTracker.operation_number,
+                   NCRTracker.planned_hours, NCRTracker.actual_hours)
+            .where(NCRTracker.job_number.in_(jobs[start:start + INSERT_BATCH_SIZE]))
+        ).all():
+            existing[(job, work_order, int(operation))] = (planned, actual)
+    keys = zip(frame['job_number'], frame['work_order'], frame['operation_number'].astype(int))
+    hours = zip(frame['planned_hours'], frame['actual_hours'])
+    stored = [existing.get(key) for key in keys]
+    is_new = pd.Series([row is None for row in stored], index=frame.index)
+    # Re-uploading the same workbook leaves unchanged trackers untouched
+    is_changed = pd.Series([row is not None and row != current for row, current in zip(stored, hours)], index=frame.index)
+
+    rows = frame[is_new | is_changed].assign(
+        ncr_number=lambda f: 'NCR-' + f['work_order'] + '-' + f['operation_number'].astype(str),
+        status='Active',
+        created_at=datetime.now(),
+    )
+    # Only inserted rows take their number; refreshed ones keep the stored one
+    inserted = is_new[is_new | is_changed]
+    if inserted.any():
+        rows.loc[inserted, 'ncr_number'] = _free_ncr_numbers(rows.loc[inserted, 'ncr_number'])
+    if not rows.empty:
+        upsert_rows(NCRTracker, rows, NCR_KEY, ['planned_hours', 'actual_hours'])
+    new = rows.loc[is_new[is_new | is_changed], ['ncr_number'] + NCR_KEY + ['status']]
+    return {
+        'detected': int(is_new.sum()),
+        'updated': int(is_changed.sum()),
+        'new': new.astype({'operation_number': int}).to_dict('records'),
+    }
+
+
+WORKLOG_DATE_FORMAT = "%m/%d/%Y"
+
+
+def _text_or_none(series):
+    series = series.astype(object)
+    return series.where(series.notna(), None)
+
+
+def prepare_worklog_chunk(df, first_row=2):
+    """Convert a labor-confirmation chunk into WorkLog rows in one pass.
+
+    Returns (rows, rejected). rows has WorkLog column names; rejected keeps
+    the original columns plus the spreadsheet row number and the reason the
+    row was refused. Row numbers come from the reader's SHEET_ROW column if
+    present, else first_row is taken as the spreadsheet row of df's first
+    line and the rows as contiguous.
+    """
+    df = normalize_columns(df).reset_index(drop=True)
+    if SHEET_ROW in df.columns:
+        sheet_rows = df.pop(SHEET_ROW)
+    else:
+        sheet_rows = pd.Series(df.index + first_row, index=df.index)
+    missing = pd.Series(None, index=df.index, dtype=object)
+
+    def column(name):
+        return df[name] if name in df.columns else missing
+
+    employee_id = pd.to_numeric(column('pernr'), errors='coerce')
+    order = pd.to_numeric(column('order'), errors='coerce')
+    operation = pd.to_numeric(column('operation'), errors='coerce')
+    actual_hours = pd.to_numeric(column('acutal work'), errors='coerce')
+    posting = column('postingdate')
+    if pd.api.types.is_datetime64_any_dtype(posting):
+        posting_date = posting
+    else:
+        posting_date = pd.to_datetime(posting, format=WORKLOG_DATE_FORMAT, errors='coerce')
+        # Cells Excel already stored as dates don't match the string format
+        fallback = posting_date.isna() & posting.notna()
+        if fallback.any():
+            posting_date[fallback] = pd.to_datetime(posting[fallback], errors='coerce')
+    employee_name = column('employeename')
+
+    reason = pd.Series(None, index=df.index, dtype=object)
+    checks = [
+        (employee_id.isna() | (employee_id % 1 != 0), 'invalid employee id (PERNR)'),
+        (employee_name.isna(), 'missing employee name'),
+        (order.isna(), 'missing or non-numeric order'),
+        (operation.isna() | (operation % 1 != 0), 'missing or non-numeric operation'),
+        (actual_hours.isna(), 'missing or non-numeric actual work'),
+        (posting_date.isna(), 'unparseable posting date'),
+    ]
+    # Report the first failing check for each row
+    for failed, message in reversed(checks):
+        reason[failed] = message
+    valid = reason.isna()
+
+    rejected = df.loc[~valid].copy()
+    rejected.insert(0, 'error', reason[~valid])
+    rejected.insert(0, 'row', sheet_rows[~valid].astype('int64'))
+
+    rows = pd.DataFrame({
+        'employee_id': employee_id[valid].astype('int64'),
+        'employee_name': employee_name[valid].astype(str),
+        'job_number': order[valid].astype('int64').astype(str),
+        'work_order': operation[valid].astype('int64').astype(str),
+        'operation_number': operation[valid].astype('int64'),
+        'operation_description': _text_or_none(column('operation short text')[valid]),
+        'actual_hours': actual_hours[valid].astype(float),
+        'posting_date': posting_date[valid].dt.date,
+        'adjustment_text': _text_or_none(column('adjustment confirmation text')[valid]),
+        'non_prod_code': _text_or_none(column('nonprodcode')[valid]),
+    })
+    return rows.reset_index(drop=True), rejected
+
+
+def load_worklog_chunks(chunks, progress=None):
+    """Bulk-load WorkLog rows from labor-confirmation chunks.
+
+    Each (employee, posting date) in the import replaces what was stored
+    for that employee on that day, so re-importing an overlapping window is
+    idempotent, while postings of employees missing from a partial export
+    (one department or shift) are kept. An export is expected to hold all
+    of an employee's postings for each day it covers. All chunks are
+    written in a single transaction. Returns (summary, rejected).
+    """
+    started = time.perf_counter()
+    timer = PhaseTimer('worklog')
+    replaced_days = set()
+    rejected_chunks = []
+    summary = {'rows': 0, 'inserted': 0, 'rejected': 0, 'replaced': 0}
+    first_date = last_date = None
+
+    try:
+        chunks = iter(chunks)
+        while True:
+            # Chunks are read lazily, so pulling the next one is the parse time
+            with timer.phase('parse'):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            with timer.phase('transform'):
+                rows, rejected = prepare_worklog_chunk(chunk, first_row=summary['rows'] + 2)
+            summary['rows'] += len(chunk)
+            if not rejected.empty:
+                rejected_chunks.append(rejected)
+                summary['rejected'] += len(rejected)
+
+            with timer.phase('write'):
+                days = set(zip(rows['employee_id'].tolist(), rows['posting_date']))
+                new_days = sorted(days - replaced_days)
+                key = tuple_(WorkLog.employee_id, WorkLog.posting_date)
+                for start in range(0, len(new_days), INSERT_BATCH_SIZE):
+                    result = db.session.execute(
+                        delete(WorkLog.__table__).where(key.in_(new_days[start:start + INSERT_BATCH_SIZE]))
+                    )
+                    summary['replaced'] += result.rowcount or 0
+                replaced_days.update(new_days)
+
+                summary['inserted'] += write_rows(WorkLog, rows)
+            if not rows.empty:
+                first_date = min(filter(None, [first_date, rows['posting_date'].min()]))
+                last_date = max(filter(None, [last_date, rows['posting_date'].max()]))
+            if progress:
+                progress(rows_parsed=summary['rows'], rows_written=summary['inserted'])
+
+        with timer.phase('write'):
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    timer.observe()
+    summary['posting_dates'] = [first_date.isoformat(), last_date.isoformat()] if first_date else None
+    summary['seconds'] = round(time.perf_counter() - started, 3)
+    logger.info(f"WorkLog ingest: {summary}")
+    rejected = pd.concat(rejected_chunks, ignore_index=True) if rejected_chunks else pd.DataFrame()
+    return summary, rejected
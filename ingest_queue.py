@@ -0,0 +1,303 @@
+import os
+import json
+import time
+import socket
+import logging
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, select, update, func, exists
+from sqlalchemy.exc import OperationalError
+from app import app, db
+from models import IngestJob
+from excel_processor import process_sap_data, process_worklog_data
+from api_cache import bump_dataset_version
+from upload_jobs import FINISHED_STATES
+import events
+
+logger = logging.getLogger(__name__)
+
+# Dataset name -> processor(file_path, progress=...) run by the worker
+PROCESSORS = {
+    "sapdata": process_sap_data,
+    "worklog": process_worklog_data,
+}
+POLL_INTERVAL = 2.0
+# Progress rows are written at most this often, phase changes always
+PROGRESS_INTERVAL = 1.0
+HEARTBEAT_INTERVAL = 10.0
+# One-second retries for writing a finished job's outcome to a busy database
+FINISH_ATTEMPTS = 120
+# A running job whose worker has not reported for this long is failed
+STALE_AFTER = timedelta(minutes=10)
+WATCH_INTERVAL = 1.0
+# PostgreSQL advisory lock taken while claiming, so two workers never start
+# the same dataset at once
+CLAIM_LOCK_KEY = 7346021
+
+_reporter_engine = None
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def enabled():
+    return app.config.get("INGEST_QUEUE", False)
+
+
+def enqueue(job_id, dataset, filename, filepath):
+    """Queue an uploaded file for the ingest worker; the file must already exist."""
+    if dataset not in PROCESSORS:
+        raise ValueError(f"unknown dataset {dataset!r}")
+    job = IngestJob(id=job_id, dataset=dataset, filename=filename, filepath=filepath,
+                    status="queued", phase="queued", created_at=datetime.utcnow())
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def get(job_id):
+    return db.session.get(IngestJob, job_id)
+
+
+def _seconds(start, end):
+    return (end - start).total_seconds()
+
+
+def job_status(job):
+    """Status dict of a queued job, shaped like UploadJob.to_dict()."""
+    now = datetime.utcnow()
+    finished = job.status in FINISHED_STATES
+    eta = None
+    if not finished and job.rows_total and job.write_started_at and job.rows_written:
+        remaining = max(job.rows_total - job.rows_written, 0)
+        eta = round(_seconds(job.write_started_at, now) / job.rows_written * remaining, 1)
+    return {
+        "job_id": job.id,
+        "dataset": job.dataset,
+        "filename": job.filename,
+        "status": job.status,
+        "phase": job.phase,
+        "rows_total": job.rows_total,
+        "rows_parsed": job.rows_parsed or 0,
+        "rows_written": job.rows_written or 0,
+        "eta_seconds": eta,
+        "elapsed_seconds": round(_seconds(job.started_at, job.finished_at or now), 1) if job.started_at else None,
+        "summary": json.loads(job.summary) if job.summary else None,
+        "error": job.error,
+    }
+
+
+def claim(worker):
+    """Atomically move the oldest claimable queued job to running.
+
+    A job is claimable while no other job of its dataset is running. On
+    PostgreSQL the candidate row is locked FOR UPDATE SKIP LOCKED and claims
+    are serialized by an advisory lock; on SQLite the single UPDATE runs
+    under the database write lock. Returns the job or None.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(select(func.pg_advisory_xact_lock(CLAIM_LOCK_KEY)))
+    running = select(IngestJob.dataset).where(IngestJob.status == "running")
+    candidate = (
+        select(IngestJob.id)
+        .where(IngestJob.status == "queued", IngestJob.dataset.not_in(running))
+        .order_by(IngestJob.created_at, IngestJob.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    now = datetime.utcnow()
+    job_id = db.session.execute(
+        update(IngestJob)
+        .where(IngestJob.id == candidate, IngestJob.status == "queued")
+        .values(status="running", phase="starting", worker=worker, started_at=now, heartbeat_at=now)
+        .returning(IngestJob.id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    db.session.commit()
+    return db.session.get(IngestJob, job_id) if job_id else None
+
+
+def has_queued():
+    return db.session.query(exists().where(IngestJob.status == "queued")).scalar()
+
+
+def fail_running(error, worker=None, stale_before=None):
+    """Fail running jobs of a dead worker, or ones silent since stale_before."""
+    query = update(IngestJob).where(IngestJob.status == "running")
+    if worker is not None:
+        query = query.where(IngestJob.worker == worker)
+    if stale_before is not None:
+        query = query.where(IngestJob.heartbeat_at < stale_before)
+    now = datetime.utcnow()
+    count = db.session.execute(
+        query.values(status="failed", phase="failed", error=error, finished_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    if count:
+        logger.warning(f"Marked {count} ingest job(s) failed: {error}")
+    return count
+
+
+class JobReporter:
+    """Progress callback that writes a job's status back to its queue row.
+
+    Writes go through their own short transactions on the engine, so they
+    never commit or roll back the processor's session. Row counts are
+    batched to one write per PROGRESS_INTERVAL; phase changes and
+    heartbeats are written at once. A write that finds the database locked
+    (SQLite while the processor holds its write transaction) is kept and
+    retried with the next update.
+    """
+
+    def __init__(self, engine, job_id, interval=PROGRESS_INTERVAL):
+        self.engine = engine
+        self.job_id = job_id
+        self.interval = interval
+        self._pending = {}
+        self._last_write = 0.0
+        self._write_started = False
+        self._lock = threading.Lock()
+
+    def __call__(self, phase=None, **counts):
+        with self._lock:
+            if phase:
+                self._pending["phase"] = phase
+            self._pending.update(counts)
+            if counts.get("rows_written") and not self._write_started:
+                self._write_started = True
+                self._pending["write_started_at"] = datetime.utcnow()
+            if phase or time.monotonic() - self._last_write >= self.interval:
+                self._write()
+
+    def heartbeat(self):
+        with self._lock:
+            self._write()
+
+    def finish(self, **fields):
+        """Record the outcome, waiting for a busy database to free up."""
+        with self._lock:
+            self._pending.update(fields, finished_at=datetime.utcnow())
+            for _ in range(FINISH_ATTEMPTS):
+                if self._write():
+                    return
+                time.sleep(1)
+            logger.error(f"Could not record the outcome of ingest job {self.job_id}")
+
+    def _write(self):
+        values = dict(self._pending, heartbeat_at=datetime.utcnow())
+        self._last_write = time.monotonic()
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(update(IngestJob).where(IngestJob.id == self.job_id).values(**values))
+        except OperationalError:
+            logger.debug(f"Progress of ingest job {self.job_id} deferred, database busy")
+            return False
+        self._pending.clear()
+        return True
+
+
+def reporter_engine():
+    """Engine for JobReporter writes.
+
+    SQLite gets a separate engine that fails fast instead of waiting out the
+    busy timeout behind the processor's own write transaction.
+    """
+    global _reporter_engine
+    if _reporter_engine is None:
+        if db.engine.dialect.name == 'sqlite':
+            _reporter_engine = create_engine(db.engine.url, connect_args={"timeout": 0})
+        else:
+            _reporter_engine = db.engine
+    return _reporter_engine
+
+
+def run_job(job):
+    """Run a claimed job's processor and record the outcome on its row."""
+    reporter = JobReporter(reporter_engine(), job.id)
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                reporter.heartbeat()
+            except Exception:
+                logger.exception(f"Heartbeat for ingest job {job.id} failed")
+
+    threading.Thread(target=beat, name=f"heartbeat-{job.id}", daemon=True).start()
+    started = time.perf_counter()
+    try:
+        summary = PROCESSORS[job.dataset](job.filepath, progress=reporter)
+        reporter.finish(status="succeeded", phase="done", summary=json.dumps(summary, default=str))
+        logger.info(f"Ingest job {job.id} ({job.dataset}) done in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        logger.exception(f"Ingest job {job.id} failed")
+        db.session.rollback()
+        reporter.finish(status="failed", phase="failed", error=str(e))
+    finally:
+        stop.set()
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def work_loop(poll_interval=POLL_INTERVAL, drain=False):
+    """Claim and run queued jobs until stopped; with drain, until none are queued."""
+    with app.app_context():
+        # Pooled connections inherited from a forking parent must not be shared
+        db.engine.dispose(close=False)
+        worker = worker_name()
+        logger.info(f"Ingest worker {worker} started")
+        while True:
+            try:
+                fail_running("ingest worker stopped responding", stale_before=datetime.utcnow() - STALE_AFTER)
+                job = claim(worker)
+            except OperationalError as e:
+                # SQLite stays locked while another worker writes its ingest
+                logger.warning(f"Ingest queue unavailable: {e}")
+                db.session.rollback()
+                job = None
+            else:
+                if job is None and drain and not has_queued():
+                    return
+            if job is not None:
+                run_job(job)
+            else:
+                time.sleep(poll_interval)
+            db.session.remove()
+
+
+def _watch():
+    with app.app_context():
+        last = datetime.utcnow()
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            try:
+                finished = (
+                    IngestJob.query.filter(IngestJob.finished_at > last)
+                    .order_by(IngestJob.finished_at).all()
+                )
+                for job in finished:
+                    last = max(last, job.finished_at)
+                    if job.status == "succeeded":
+                        bump_dataset_version(f"{job.dataset} ingest")
+                        events.publish("ingest", {
+                            "dataset": job.dataset, "job_id": job.id, "filename": job.filename,
+                            "summary": json.loads(job.summary) if job.summary else None,
+                        })
+            except Exception:
+                logger.exception("Error polling finished ingest jobs")
+            finally:
+                db.session.remove()
+
+
+def ensure_watcher():
+    """Mirror jobs the worker finishes into this process's caches and events."""
+    global _watcher
+    if _watcher is not None or not enabled():
+        return
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = threading.Thread(target=_watch, name="ingest-watcher", daemon=True)
+            _watcher.start()
@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+import uuid
+import logging
+import argparse
+import multiprocessing
+from app import app, db
+import ingest_queue
+
+logger = logging.getLogger(__name__)
+
+
+def _start(poll_interval, drain):
+    process = multiprocessing.Process(
+        target=ingest_queue.work_loop, kwargs={"poll_interval": poll_interval, "drain": drain}, daemon=False,
+    )
+    process.start()
+    return process
+
+
+def supervise(processes, poll_interval, drain):
+    """Run work_loop in N processes, replacing any that crash.
+
+    Jobs a crashed process was running are failed right away instead of
+    waiting for their heartbeat to go stale.
+    """
+    workers = [_start(poll_interval, drain) for _ in range(processes)]
+    while workers:
+        time.sleep(1)
+        for process in list(workers):
+            if process.is_alive():
+                continue
+            workers.remove(process)
+            if process.exitcode == 0:
+                continue
+            name = f"{ingest_queue.worker_name().rsplit(':', 1)[0]}:{process.pid}"
+            logger.error(f"Ingest worker {name} exited with code {process.exitcode}")
+            with app.app_context():
+                ingest_queue.fail_running("ingest worker process crashed", worker=name)
+            if not drain:
+                workers.append(_start(poll_interval, drain))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run queued upload ingests outside the web server.")
+    parser.add_argument("--processes", type=int, default=app.config.get("INGEST_WORKERS", 1),
+                        help="worker processes claiming jobs (default: INGEST_WORKERS)")
+    parser.add_argument("--poll-interval", type=float, default=ingest_queue.POLL_INTERVAL,
+                        help="seconds between queue polls when idle")
+    parser.add_argument("--drain", action="store_true", help="exit once the queue is empty")
+    parser.add_argument("--enqueue", nargs=2, metavar=("DATASET", "FILE"),
+                        help="queue FILE for ingest instead of running workers")
+    args = parser.parse_args(argv)
+
+    if args.enqueue:
+        dataset, path = args.enqueue
+        with app.app_context():
+            job_id = ingest_queue.enqueue(uuid.uuid4().hex, dataset, os.path.basename(path), os.path.abspath(path)).id
+        print(job_id)
+        return 0
+
+    logger.info(f"Starting {args.processes} ingest worker process(es)")
+    if args.processes <= 1:
+        ingest_queue.work_loop(args.poll_interval, args.drain)
+    else:
+        # Parent holds no connections while the children fork
+        with app.app_context():
+            db.engine.dispose()
+        supervise(args.processes, args.poll_interval, args.drain)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
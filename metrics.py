@@ -0,0 +1,282 @@
+import io
+import os
+import time
+import pstats
+import logging
+import cProfile
+import tempfile
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import app
+from api_cache import response_cache, dataset_version
+from events import broker
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("slow_query")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+INGEST_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+PROFILE_HEADER = "X-Profile"
+UNMATCHED = "<unmatched>"
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = defaultdict(float)
+
+    def inc(self, amount=1, **labels):
+        with self._lock:
+            self._values[self._key(labels)] += amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        lines = []
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class GaugeFunction(_Metric):
+    """Gauge read at scrape time from fn(), a number or {label values: number}."""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, fn, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.fn = fn
+
+    def samples(self):
+        try:
+            values = self.fn()
+        except Exception:
+            logger.exception(f"Error collecting {self.name}")
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [
+            f"{self.name}{_labels(self.labelnames, key if isinstance(key, tuple) else (key,))} {_number(value)}"
+            for key, value in sorted(values.items()) if value is not None
+        ]
+
+
+def render():
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to produce a response, by route.", ("method", "endpoint", "status"),
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request.", ("endpoint",), QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Time spent in SQL per request.", ("endpoint",))
+QUERY_SECONDS = Histogram("db_query_duration_seconds", "SQL statement execution time.", ("statement",))
+SLOW_QUERIES = Counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_SECONDS.", ("statement",))
+INGEST_PHASE_SECONDS = Histogram(
+    "ingest_phase_duration_seconds", "Time per ingest phase.", ("dataset", "phase"), INGEST_BUCKETS,
+)
+
+
+# Ingest phases
+
+@contextmanager
+def ingest_phase(dataset, phase):
+    """Time one ingest phase (parse, transform, write, ...) into INGEST_PHASE_SECONDS."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        INGEST_PHASE_SECONDS.observe(time.perf_counter() - started, dataset=dataset, phase=phase)
+
+
+class PhaseTimer:
+    """Accumulates phases that interleave, e.g. per chunk; observe() records each total once."""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.seconds = defaultdict(float)
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - started
+
+    def observe(self):
+        for phase, seconds in self.seconds.items():
+            INGEST_PHASE_SECONDS.observe(seconds, dataset=self.dataset, phase=phase)
+
+
+# SQL timing
+
+def _statement_kind(statement):
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    kind = _statement_kind(statement)
+    QUERY_SECONDS.observe(elapsed, statement=kind)
+    in_request = has_request_context()
+    if in_request:
+        g.db_queries = g.get("db_queries", 0) + 1
+        g.db_seconds = g.get("db_seconds", 0.0) + elapsed
+
+    threshold = app.config.get("SLOW_QUERY_SECONDS")
+    if threshold and elapsed >= threshold:
+        SLOW_QUERIES.inc(statement=kind)
+        where = request.endpoint if in_request else "background"
+        slow_query_logger.warning(f"{elapsed * 1000:.0f} ms in {where}: {' '.join(statement.split())[:1000]}")
+
+
+# Requests
+
+def _endpoint():
+    return request.url_rule.rule if request.url_rule is not None else UNMATCHED
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+    g.db_queries = 0
+    g.db_seconds = 0.0
+    if app.config.get("PROFILING_ENABLED") and request.headers.get(PROFILE_HEADER):
+        g.profiler = cProfile.Profile()
+        try:
+            g.profiler.enable()
+        except ValueError:
+            # Another profiler is already active on this thread
+            g.profiler = None
+
+
+def _dump_profile(profiler, response):
+    profiler.disable()
+    directory = app.config.get("PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "shoplead_profiles")
+    os.makedirs(directory, exist_ok=True)
+    name = (request.endpoint or "unmatched").replace(".", "_")
+    path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}_{name}_{os.getpid()}.prof")
+    profiler.dump_stats(path)
+    if logger.isEnabledFor(logging.DEBUG):
+        top = io.StringIO()
+        pstats.Stats(profiler, stream=top).sort_stats("cumulative").print_stats(15)
+        logger.debug(top.getvalue())
+    logger.info(f"Profile of {request.method} {request.path} written to {path}")
+    response.headers["X-Profile-File"] = path
+
+
+@app.after_request
+def _record_request(response):
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        _dump_profile(profiler, response)
+
+    started = g.get("request_started")
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = _endpoint()
+    REQUEST_SECONDS.observe(elapsed, method=request.method, endpoint=endpoint, status=response.status_code)
+    REQUEST_QUERIES.observe(g.db_queries, endpoint=endpoint)
+    REQUEST_DB_SECONDS.observe(g.db_seconds, endpoint=endpoint)
+    # Visible per request in the browser's network panel
+    response.headers["Server-Timing"] = f"app;dur={elapsed * 1000:.1f}, db;dur={g.db_seconds * 1000:.1f};desc=\"{g.db_queries} queries\""
+    return response
+
+
+GaugeFunction("response_cache_bytes", "Bytes held by the read-API response cache.", lambda: response_cache.stats()["bytes"])
+GaugeFunction("response_cache_hits", "Response cache hits since start.", lambda: response_cache.stats()["hits"])
+GaugeFunction("response_cache_misses", "Response cache misses since start.", lambda: response_cache.stats()["misses"])
+GaugeFunction("dataset_version", "Current dataset version of this process.", dataset_version)
+GaugeFunction("event_subscribers", "Connected /api/events clients.", lambda: broker.stats()["subscribers"])
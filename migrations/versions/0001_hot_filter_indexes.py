@@ -0,0 +1,50 @@
+"""Indexes for the dashboard's hot filter columns
+
+Revision ID: 0001_hot_filter_indexes
+Revises:
+Create Date: 2026-10-18 10:15:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_hot_filter_indexes'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_work_order_job_id', 'work_order', ['job_id'], False),
+    ('ix_operation_work_center_status', 'operation', ['work_center', 'status'], False),
+    ('ix_operation_scheduled_date', 'operation', ['scheduled_date'], False),
+    ('ix_work_log_job_number', 'work_log', ['job_number'], False),
+    ('ix_work_log_employee_posting_date', 'work_log', ['employee_id', 'posting_date'], False),
+    ('ix_work_log_posting_date', 'work_log', ['posting_date'], False),
+    ('ix_ncr_tracker_job_number', 'ncr_tracker', ['job_number'], False),
+    ('ix_ncr_tracker_status', 'ncr_tracker', ['status'], False),
+]
+
+
+def upgrade():
+    # Tables may already carry these indexes when db.create_all() built them
+    for name, table, columns, unique in INDEXES:
+        op.create_index(name, table, columns, unique=unique, if_not_exists=True)
+
+    # Keep the newest row of any duplicated (work_order_id, operation_number)
+    # pair so the unique index used by upserts can be built
+    op.execute(
+        "DELETE FROM operation WHERE id NOT IN "
+        "(SELECT MAX(id) FROM operation GROUP BY work_order_id, operation_number)"
+    )
+    op.create_index(
+        'uq_operation_work_order_operation', 'operation', ['work_order_id', 'operation_number'],
+        unique=True, if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index('uq_operation_work_order_operation', table_name='operation', if_exists=True)
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
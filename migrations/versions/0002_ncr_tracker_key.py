@@ -0,0 +1,37 @@
+"""One NCR tracker per operation and an index for the NCR monitor
+
+Revision ID: 0002_ncr_tracker_key
+Revises: 0001_hot_filter_indexes
+Create Date: 2026-10-18 11:30:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_ncr_tracker_key'
+down_revision = '0001_hot_filter_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Every upload used to add another tracker with a random number for the
+    # same NCR operation; keep the first one, which holds any report details
+    op.execute(
+        "DELETE FROM ncr_tracker WHERE id NOT IN "
+        "(SELECT MIN(id) FROM ncr_tracker GROUP BY job_number, work_order, operation_number)"
+    )
+    op.create_index(
+        'uq_ncr_tracker_job_work_order_operation', 'ncr_tracker', ['job_number', 'work_order', 'operation_number'],
+        unique=True, if_not_exists=True,
+    )
+    op.create_index(
+        'ix_operation_work_center_actual_hours', 'operation', ['work_center', 'actual_hours'],
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_operation_work_center_actual_hours', table_name='operation', if_exists=True)
+    op.drop_index('uq_ncr_tracker_job_work_order_operation', table_name='ncr_tracker', if_exists=True)
@@ -0,0 +1,25 @@
+"""Indexes for paging and rolling up NCR trackers
+
+Revision ID: 0003_ncr_tracker_listing
+Revises: 0002_ncr_tracker_key
+Create Date: 2026-10-18 12:10:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_ncr_tracker_listing'
+down_revision = '0002_ncr_tracker_key'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_ncr_tracker_created_at_id', 'ncr_tracker', ['created_at', 'id'], if_not_exists=True)
+    op.create_index('ix_ncr_tracker_issue_category', 'ncr_tracker', ['issue_category'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_ncr_tracker_issue_category', table_name='ncr_tracker', if_exists=True)
+    op.drop_index('ix_ncr_tracker_created_at_id', table_name='ncr_tracker', if_exists=True)
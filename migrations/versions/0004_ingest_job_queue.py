@@ -0,0 +1,48 @@
+"""Queue table for the standalone ingest worker
+
+Revision ID: 0004_ingest_job_queue
+Revises: 0003_ncr_tracker_listing
+Create Date: 2026-10-18 13:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_ingest_job_queue'
+down_revision = '0003_ncr_tracker_listing'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ingest_job',
+        sa.Column('id', sa.String(length=32), primary_key=True),
+        sa.Column('dataset', sa.String(length=20), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('filepath', sa.String(length=500), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('phase', sa.String(length=20), nullable=False),
+        sa.Column('rows_total', sa.Integer()),
+        sa.Column('rows_parsed', sa.Integer()),
+        sa.Column('rows_written', sa.Integer()),
+        sa.Column('summary', sa.Text()),
+        sa.Column('error', sa.Text()),
+        sa.Column('worker', sa.String(length=100)),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime()),
+        sa.Column('write_started_at', sa.DateTime()),
+        sa.Column('heartbeat_at', sa.DateTime()),
+        sa.Column('finished_at', sa.DateTime()),
+        if_not_exists=True,
+    )
+    op.create_index('ix_ingest_job_status_created_at', 'ingest_job', ['status', 'created_at'], if_not_exists=True)
+    op.create_index('ix_ingest_job_finished_at', 'ingest_job', ['finished_at'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_ingest_job_finished_at', table_name='ingest_job', if_exists=True)
+    op.drop_index('ix_ingest_job_status_created_at', table_name='ingest_job', if_exists=True)
+    op.drop_table('ingest_job', if_exists=True)
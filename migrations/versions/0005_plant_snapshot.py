@@ -0,0 +1,47 @@
+"""Append-only plant snapshot store for /api/history
+
+Revision ID: 0005_plant_snapshot
+Revises: 0004_ingest_job_queue
+Create Date: 2026-10-18 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_plant_snapshot'
+down_revision = '0004_ingest_job_queue'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Partitioned by month on PostgreSQL; the app creates partitions as
+    # snapshots arrive (snapshots.ensure_partition)
+    op.create_table(
+        'plant_snapshot',
+        sa.Column('scope', sa.String(length=20), nullable=False),
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('taken_at', sa.DateTime(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('planned_hours', sa.Float(), nullable=False),
+        sa.Column('actual_hours', sa.Float(), nullable=False),
+        sa.Column('remaining_hours', sa.Float(), nullable=False),
+        sa.Column('backlog_hours', sa.Float(), nullable=False),
+        sa.Column('operation_count', sa.Integer(), nullable=False),
+        sa.Column('not_started_count', sa.Integer(), nullable=False),
+        sa.Column('in_progress_count', sa.Integer(), nullable=False),
+        sa.Column('completed_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('scope', 'snapshot_date', 'taken_at', 'name'),
+        postgresql_partition_by='RANGE (snapshot_date)',
+        if_not_exists=True,
+    )
+    op.create_index(
+        'ix_plant_snapshot_scope_name_date', 'plant_snapshot', ['scope', 'name', 'snapshot_date'], if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_plant_snapshot_scope_name_date', table_name='plant_snapshot', if_exists=True)
+    op.drop_table('plant_snapshot', if_exists=True)
@@ -0,0 +1,25 @@
+"""Day the stored work center rollups were computed for
+
+Revision ID: 0006_work_center_rollup_date
+Revises: 0005_plant_snapshot
+Create Date: 2026-10-18 15:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_work_center_rollup_date'
+down_revision = '0005_plant_snapshot'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # NULL counts as stale, so existing rows are recomputed on the first request
+    op.add_column('work_center', sa.Column('rollup_date', sa.Date(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('work_center', 'rollup_date')
@@ -10,6 +10,10 @@ class Job(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class WorkOrder(db.Model):
+    __table_args__ = (
+        db.Index('ix_work_order_job_id', 'job_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     work_order_number = db.Column(db.String(50), unique=True, nullable=False)
     job_id = db.Column(db.Integer, db.ForeignKey('job.id'), nullable=False)
@@ -17,6 +21,16 @@ class WorkOrder(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Operation(db.Model):
+    __table_args__ = (
+        # One row per operation within a work order; also the upsert key and
+        # the index behind work_order_id lookups
+        db.Index('uq_operation_work_order_operation', 'work_order_id', 'operation_number', unique=True),
+        db.Index('ix_operation_work_center_status', 'work_center', 'status'),
+        db.Index('ix_operation_scheduled_date', 'scheduled_date'),
+        # /api/ncr_monitor: started operations of one work center
+        db.Index('ix_operation_work_center_actual_hours', 'work_center', 'actual_hours'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     operation_number = db.Column(db.Integer, nullable=False)
     work_order_id = db.Column(db.Integer, db.ForeignKey('work_order.id'), nullable=False)
@@ -34,7 +48,7 @@ class WorkCenter(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
-    capacity = db.Column(db.Float, nullable=True)
+    capacity = db.Column(db.Float, nullable=True)  # Hours per working day
     workers = db.Column(db.Integer, nullable=True)
     efficiency = db.Column(db.Float, nullable=True)
     planned_hours = db.Column(db.Float, default=0)
@@ -43,9 +57,17 @@ class WorkCenter(db.Model):
     backlog = db.Column(db.Float, default=0)
     load_status = db.Column(db.String(20), default="Normal")
     projected_hours = db.Column(db.Float, default=0)
+    # Day the date-dependent rollups (backlog, available_work, load_status) were computed for
+    rollup_date = db.Column(db.Date)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class WorkLog(db.Model):
+    __table_args__ = (
+        db.Index('ix_work_log_job_number', 'job_number'),
+        db.Index('ix_work_log_employee_posting_date', 'employee_id', 'posting_date'),
+        db.Index('ix_work_log_posting_date', 'posting_date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, nullable=False)
     employee_name = db.Column(db.String(100), nullable=False)
@@ -73,6 +95,16 @@ class WorkLog(db.Model):
         }
 
 class NCRTracker(db.Model):
+    __table_args__ = (
+        db.Index('ix_ncr_tracker_job_number', 'job_number'),
+        db.Index('ix_ncr_tracker_status', 'status'),
+        # Keyset pages of /api/ncr and the category rollup
+        db.Index('ix_ncr_tracker_created_at_id', 'created_at', 'id'),
+        db.Index('ix_ncr_tracker_issue_category', 'issue_category'),
+        # One tracker per NCR operation; also the ingest upsert key
+        db.Index('uq_ncr_tracker_job_work_order_operation', 'job_number', 'work_order', 'operation_number', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     ncr_number = db.Column(db.String(50), unique=True, nullable=False)
     job_number = db.Column(db.String(50), nullable=False)
@@ -87,4 +119,58 @@ class NCRTracker(db.Model):
     corrective_action = db.Column(db.Text, nullable=False)
     financial_impact = db.Column(db.Float, default=0.0)
     status = db.Column(db.String(20), default="Pending") 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class IngestJob(db.Model):
+    """Upload queued for the standalone ingest worker (ingest_worker.py)."""
+    __table_args__ = (
+        # Claim order for queued jobs and the per-dataset "already running" check
+        db.Index('ix_ingest_job_status_created_at', 'status', 'created_at'),
+        db.Index('ix_ingest_job_finished_at', 'finished_at'),
+    )
+
+    id = db.Column(db.String(32), primary_key=True)
+    dataset = db.Column(db.String(20), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    filepath = db.Column(db.String(500), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    phase = db.Column(db.String(20), nullable=False, default="queued")
+    rows_total = db.Column(db.Integer)
+    rows_parsed = db.Column(db.Integer, default=0)
+    rows_written = db.Column(db.Integer, default=0)
+    summary = db.Column(db.Text)
+    error = db.Column(db.Text)
+    worker = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    write_started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+
+class PlantSnapshot(db.Model):
+    """Append-only per-work-center and per-job aggregates, one set per ingest.
+
+    Range-partitioned by snapshot_date on PostgreSQL (monthly partitions are
+    created by snapshots.ensure_partition). The primary key is ordered for
+    the /api/history lookups: scope, then date and snapshot, then name.
+    """
+    __table_args__ = (
+        # Trends of named work centers or jobs
+        db.Index('ix_plant_snapshot_scope_name_date', 'scope', 'name', 'snapshot_date'),
+        {'postgresql_partition_by': 'RANGE (snapshot_date)'},
+    )
+
+    scope = db.Column(db.String(20), primary_key=True)
+    snapshot_date = db.Column(db.Date, primary_key=True)
+    taken_at = db.Column(db.DateTime, primary_key=True)
+    name = db.Column(db.String(50), primary_key=True)
+    planned_hours = db.Column(db.Float, nullable=False, default=0.0)
+    actual_hours = db.Column(db.Float, nullable=False, default=0.0)
+    remaining_hours = db.Column(db.Float, nullable=False, default=0.0)
+    backlog_hours = db.Column(db.Float, nullable=False, default=0.0)
+    operation_count = db.Column(db.Integer, nullable=False, default=0)
+    not_started_count = db.Column(db.Integer, nullable=False, default=0)
+    in_progress_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
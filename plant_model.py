@@ -0,0 +1,280 @@
+import time
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from app import app, db
+from models import Job, WorkOrder, Operation
+from api_cache import dataset_version
+from aggregates import iso_date
+from rollups import active_work_centers, work_center_payload
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_CUSTOMER = "Unknown Customer"
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def enabled():
+    return app.config.get("PLANT_MODEL_ENABLED", True)
+
+
+def _fetch(query):
+    # Raw DBAPI rows; SQLAlchemy's per-row processing costs more than the copy into arrays
+    return db.session.connection().execute(query).cursor.fetchall()
+
+
+def _positions(ids, keys):
+    """Position in ids (any order) of every key; a key missing from ids is an error."""
+    if not len(keys):
+        return np.empty(0, dtype=np.int64)
+    order = np.argsort(ids, kind='stable')
+    found = np.searchsorted(ids, keys, sorter=order)
+    positions = order[np.minimum(found, len(ids) - 1)] if len(ids) else found
+    if not len(ids) or (ids[positions] != keys).any():
+        raise ValueError("rows reference parent ids that were not loaded")
+    return positions
+
+
+def _offsets(owner, count):
+    """Start offsets of each owner's run in a sorted owner array, plus the end."""
+    return np.searchsorted(owner, np.arange(count + 1)).astype(np.int64)
+
+
+def _ranges(starts, ends):
+    """Concatenation of arange(start, end) over the pairs, without a Python loop."""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    shift = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return np.arange(total, dtype=np.int64) + shift
+
+
+def _intern(values):
+    """Small integer codes plus the distinct strings; None becomes -1."""
+    codes, names = pd.factorize(pd.Series(values, dtype=object), sort=True)
+    dtype = np.int8 if len(names) < 127 else np.int16 if len(names) < 32767 else np.int32
+    return codes.astype(dtype), list(names)
+
+
+class PlantModel:
+    """Read-only columnar copy of Job, WorkOrder and Operation.
+
+    Jobs are sorted by job_number, work orders grouped by job and
+    operations by work order, each group in id order as the ORM
+    relationships return them. job_wo_offsets[j]:job_wo_offsets[j + 1] are
+    job j's work orders and wo_op_offsets likewise their operations, so a
+    job's rows are two slices. Work centers and statuses are interned as
+    small integer codes; hours are float64 (NaN for NULL) and scheduled
+    dates datetime64[D] (NaT for NULL).
+    """
+
+    def __init__(self, version):
+        self.version = version
+        # One outer-joined statement reads a consistent snapshot; separate
+        # SELECTs could see an ingest commit in between and load children
+        # of parents they never saw
+        rows = _fetch(
+            select(
+                Job.id, Job.job_number, Job.customer_name,
+                WorkOrder.id, WorkOrder.work_order_number,
+                Operation.id, Operation.operation_number, Operation.work_center,
+                Operation.planned_hours, Operation.actual_hours, Operation.status,
+                # ISO text parses in one vectorized call
+                iso_date(Operation.scheduled_date),
+            )
+            .select_from(Job)
+            .outerjoin(WorkOrder, WorkOrder.job_id == Job.id)
+            .outerjoin(Operation, Operation.work_order_id == WorkOrder.id)
+        )
+        columns = list(zip(*rows)) if rows else [()] * 12
+        row_jobs = np.array(columns[0], dtype=np.int64)
+        # Outer join rows of jobs without work orders (or work orders without operations) carry NULLs
+        row_wos = np.array([-1 if value is None else value for value in columns[3]], dtype=np.int64)
+        row_ops = np.array([-1 if value is None else value for value in columns[5]], dtype=np.int64)
+
+        job_ids, job_rows = np.unique(row_jobs, return_index=True)
+        # Sorted here rather than in SQL so binary searches agree with the order whatever the collation
+        job_numbers = np.array([columns[1][i] for i in job_rows], dtype=str)
+        job_order = np.argsort(job_numbers, kind='stable')
+        self.job_numbers = job_numbers[job_order]
+        job_ids = job_ids[job_order]
+        self.customers = np.array([columns[2][i] or UNKNOWN_CUSTOMER for i in job_rows], dtype=object)[job_order]
+
+        wo_ids, wo_rows = np.unique(row_wos, return_index=True)
+        wo_ids, wo_rows = wo_ids[wo_ids >= 0], wo_rows[wo_ids >= 0]
+        wo_jobs = _positions(job_ids, row_jobs[wo_rows])
+        wo_order = np.lexsort((wo_ids, wo_jobs))
+        wo_ids = wo_ids[wo_order]
+        self.wo_jobs = wo_jobs[wo_order]
+        self.work_order_numbers = np.array([columns[4][i] for i in wo_rows[wo_order]], dtype=str)
+        self.job_wo_offsets = _offsets(self.wo_jobs, len(job_ids))
+
+        op_rows = np.flatnonzero(row_ops >= 0)
+        op_ids = row_ops[op_rows]
+        op_wos = _positions(wo_ids, row_wos[op_rows])
+        op_order = np.lexsort((op_ids, op_wos))
+        self.op_ids = op_ids[op_order]
+        self.op_wos = op_wos[op_order]
+        self.wo_op_offsets = _offsets(self.op_wos, len(wo_ids))
+        self.op_jobs = self.wo_jobs[self.op_wos]
+        ordered = op_rows[op_order]
+
+        def op_column(i):
+            return [columns[i][row] for row in ordered.tolist()]
+
+        self.operation_numbers = np.array(op_column(6), dtype=np.int32)
+        self.work_center_codes, self.work_center_names = _intern(op_column(7))
+        self.planned_hours = np.array(op_column(8), dtype=np.float64)
+        self.actual_hours = np.array(op_column(9), dtype=np.float64)
+        self.status_codes, self.status_names = _intern(op_column(10))
+        self.scheduled_dates = pd.to_datetime(
+            pd.Series(op_column(11), dtype=object), format='%Y-%m-%d',
+        ).to_numpy(dtype='datetime64[D]')
+
+        # Stored rollups change with the operations, i.e. with the version
+        self.work_centers = {wc.name: work_center_payload(wc) for wc in active_work_centers()}
+
+    def __len__(self):
+        return len(self.op_ids)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the arrays (job and work order strings included)."""
+        arrays = [value for value in vars(self).values() if isinstance(value, np.ndarray)]
+        return sum(a.nbytes for a in arrays) + sum(len(c) for c in self.customers) + 8 * len(self.customers)
+
+    # Lookups
+
+    def job_position(self, job_number):
+        """Position of job_number, or None; a binary search over the sorted numbers."""
+        position = int(np.searchsorted(self.job_numbers, job_number))
+        if position < len(self.job_numbers) and self.job_numbers[position] == job_number:
+            return position
+        return None
+
+    def operation_mask(self, part=None, work_center=None, status=None, start_date=None, end_date=None):
+        """Boolean mask of operations matching the /api/jobs filters, or None without filters."""
+        mask = None
+
+        def narrow(condition):
+            nonlocal mask
+            mask = condition if mask is None else mask & condition
+
+        if part is not None:
+            narrow(self.operation_numbers == part)
+        if work_center:
+            code = self.work_center_names.index(work_center) if work_center in self.work_center_names else -2
+            narrow(self.work_center_codes == code)
+        if status:
+            code = self.status_names.index(status) if status in self.status_names else -2
+            narrow(self.status_codes == code)
+        if start_date:
+            narrow(self.scheduled_dates >= np.datetime64(start_date, 'D'))
+        if end_date:
+            narrow(self.scheduled_dates <= np.datetime64(end_date, 'D'))
+        return mask
+
+    def select_jobs(self, job_number=None, op_mask=None, after=None, limit=None):
+        """Positions of jobs in job_number order, as /api/jobs selects them."""
+        start = int(np.searchsorted(self.job_numbers, after, side='right')) if after else 0
+        if job_number is not None:
+            position = self.job_position(job_number)
+            positions = np.array([] if position is None or position < start else [position], dtype=np.int64)
+        else:
+            positions = np.arange(start, len(self.job_numbers), dtype=np.int64)
+        if op_mask is not None:
+            has_match = np.zeros(len(self.job_numbers), dtype=bool)
+            has_match[self.op_jobs[op_mask]] = True
+            positions = positions[has_match[positions]]
+        if limit is not None:
+            positions = positions[:limit]
+        return positions
+
+    # Payloads
+
+    def _operation_values(self, ops, field):
+        if field == 'id':
+            return self.op_ids[ops].tolist()
+        if field == 'operation_number':
+            return self.operation_numbers[ops].tolist()
+        if field == 'work_center':
+            names = self.work_center_names
+            return [names[code] for code in self.work_center_codes[ops].tolist()]
+        if field == 'status':
+            names = self.status_names
+            return [names[code] if code >= 0 else None for code in self.status_codes[ops].tolist()]
+        if field == 'scheduled_date':
+            dates = self.scheduled_dates[ops]
+            text = np.datetime_as_string(dates, unit='D').tolist()
+            return [None if missing else value for value, missing in zip(text, np.isnat(dates).tolist())]
+        values = getattr(self, field)[ops]
+        if np.isnan(values).any():
+            return [None if value != value else value for value in values.tolist()]
+        return values.tolist()
+
+    def work_orders(self, positions, op_fields, op_mask=None):
+        """[[{"work_order_number", "operations": [...]}, ...] per job position].
+
+        Operation dicts have op_fields as keys; with op_mask only matching
+        operations are listed, as in the SQL path.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        wos = _ranges(self.job_wo_offsets[positions], self.job_wo_offsets[positions + 1])
+        ops = _ranges(self.wo_op_offsets[wos], self.wo_op_offsets[wos + 1])
+        owners = np.repeat(np.arange(len(wos)), self.wo_op_offsets[wos + 1] - self.wo_op_offsets[wos])
+        if op_mask is not None:
+            keep = op_mask[ops]
+            ops, owners = ops[keep], owners[keep]
+
+        columns = [self._operation_values(ops, field) for field in op_fields]
+        rows = [dict(zip(op_fields, values)) for values in zip(*columns)]
+        op_ends = np.searchsorted(owners, np.arange(1, len(wos) + 1)).tolist()
+        numbers = self.work_order_numbers[wos].tolist()
+
+        per_wo = []
+        start = 0
+        for number, end in zip(numbers, op_ends):
+            per_wo.append({"work_order_number": number, "operations": rows[start:end]})
+            start = end
+        counts = (self.job_wo_offsets[positions + 1] - self.job_wo_offsets[positions]).tolist()
+        result = []
+        start = 0
+        for count in counts:
+            result.append(per_wo[start:start + count])
+            start += count
+        return result
+
+    def operations_frame(self):
+        """Operations in the shape of forecasting.load_operations()."""
+        return pd.DataFrame({
+            'job_number': self.job_numbers[self.op_jobs].astype(object),
+            'operation_number': self.operation_numbers.astype(np.int64),
+            'work_center': np.array(self.work_center_names, dtype=object)[self.work_center_codes],
+            'planned_hours': np.nan_to_num(self.planned_hours),
+            'actual_hours': np.nan_to_num(self.actual_hours),
+            'status': np.array(self.status_names + [''], dtype=object)[self.status_codes],
+        })
+
+
+def get_model():
+    """The PlantModel of the current dataset version, loaded on first use after a change."""
+    global _model
+    version = dataset_version()
+    model = _model
+    if model is not None and model.version == version:
+        return model
+    with _model_lock:
+        if _model is not None and _model.version == version:
+            return _model
+        started = time.perf_counter()
+        _model = PlantModel(version)
+        logger.info(
+            f"Plant model of {len(_model)} operations loaded in {time.perf_counter() - started:.2f}s "
+            f"({_model.nbytes / 2**20:.1f} MB)"
+        )
+        return _model
@@ -0,0 +1,192 @@
+import logging
+import threading
+from datetime import date
+import click
+from sqlalchemy import or_
+from app import app, db
+from models import WorkCenter
+from aggregates import work_center_totals
+from events import publish_on_commit
+from api_cache import bump_dataset_version
+
+logger = logging.getLogger(__name__)
+
+# Day this process last made sure the stored rollups were computed for
+_checked_date = None
+_checked_lock = threading.Lock()
+
+# Work centers whose operations all disappeared keep their row (capacity,
+# workers and efficiency are configured there) but are marked idle
+IDLE = "Idle"
+
+ROLLUP_FIELDS = ("planned_hours", "actual_hours", "available_work", "backlog", "projected_hours", "load_status")
+
+# Remaining hours are compared with this many working days (four five-day
+# weeks) of the center's daily capacity
+CAPACITY_HORIZON_DAYS = 20
+
+
+def _capacity(work_center, planned_hours):
+    """Hours available over the load horizon; WorkCenter.capacity is hours per working day."""
+    if work_center.capacity:
+        return work_center.capacity * CAPACITY_HORIZON_DAYS
+    return planned_hours * 1.2
+
+
+def compute_rollup(work_center, totals):
+    """Rollup column values for a WorkCenter row from its aggregate totals."""
+    if not totals:
+        return {"planned_hours": 0, "actual_hours": 0, "available_work": 0, "backlog": 0,
+                "projected_hours": 0, "load_status": IDLE}
+
+    planned = totals["planned_hours"]
+    remaining = max(totals["remaining_hours"], 0)
+    backlog = max(totals["overdue_hours"], 0)
+    capacity = _capacity(work_center, planned)
+    load = remaining / capacity if capacity else 0
+    if load > 1:
+        load_status = "Overloaded"
+    elif load > 0.8:
+        load_status = "High"
+    else:
+        load_status = "Normal"
+
+    return {
+        "planned_hours": planned,
+        "actual_hours": totals["actual_hours"],
+        "available_work": max(remaining - backlog, 0),
+        "backlog": backlog,
+        "projected_hours": planned * 1.1,  # Example projection
+        "load_status": load_status,
+    }
+
+
+def work_center_payload(work_center):
+    """A WorkCenter row as served by /api/work_centers and rollup events."""
+    return {
+        "planned_hours": work_center.planned_hours,
+        "actual_hours": work_center.actual_hours,
+        "efficiency": round((work_center.actual_hours / work_center.planned_hours * 100) if work_center.planned_hours else 0),
+        "capacity": _capacity(work_center, work_center.planned_hours),
+        "available_work": work_center.available_work,
+        "backlog": work_center.backlog,
+        "load_status": work_center.load_status
+    }
+
+
+def refresh_work_center_rollups(names=None, as_of=None):
+    """Recompute the stored rollups for names (all work centers if None).
+
+    Backlog, available work and load status count operations overdue as of
+    as_of (today by default), which is stored as rollup_date. Rows are added
+    to the session but not committed, so callers can fold the refresh into
+    their own transaction. Returns the refreshed names.
+    """
+    as_of = as_of or date.today()
+    totals = work_center_totals(work_centers=names, as_of=as_of) if names is not None else work_center_totals(as_of=as_of)
+    query = WorkCenter.query
+    if names is not None:
+        query = query.filter(WorkCenter.name.in_(list(names)))
+    rows = {wc.name: wc for wc in query.all()}
+
+    changed = {}
+    for name in set(rows) | set(totals):
+        work_center = rows.get(name)
+        if work_center is None:
+            work_center = WorkCenter(name=name)
+            db.session.add(work_center)
+        rollup = compute_rollup(work_center, totals.get(name))
+        if name not in rows or any(getattr(work_center, field) != value for field, value in rollup.items()):
+            for field, value in rollup.items():
+                setattr(work_center, field, value)
+            changed[name] = work_center_payload(work_center)
+        if work_center.rollup_date != as_of:
+            work_center.rollup_date = as_of
+
+    if changed:
+        # Clients patch their work center view; idle centers drop out of it
+        publish_on_commit(db.session, "rollup", {"work_centers": changed})
+    logger.debug(f"Refreshed rollups for {len(set(rows) | set(totals))} work centers")
+    return sorted(set(rows) | set(totals))
+
+
+def refresh_stale_rollups(today=None):
+    """Recompute every rollup if any was stored before today.
+
+    Overdue hours move with the calendar, so rollups stored on an earlier
+    day are stale even without a data change. The check runs once per
+    process and day; a new day also bumps the dataset version so cached
+    reads built on the previous day are dropped. Returns True if the rows
+    were refreshed.
+    """
+    global _checked_date
+    today = today or date.today()
+    if _checked_date == today:
+        return False
+    with _checked_lock:
+        if _checked_date == today:
+            return False
+        stale = WorkCenter.query.filter(
+            or_(WorkCenter.rollup_date.is_(None), WorkCenter.rollup_date < today)
+        ).first() is not None
+        if stale:
+            refresh_work_center_rollups(as_of=today)
+            db.session.commit()
+            logger.info(f"Refreshed work center rollups stored before {today}")
+        if stale or _checked_date is not None:
+            bump_dataset_version("rollup date")
+        _checked_date = today
+        return stale
+
+
+def active_work_centers():
+    """Stored rollup rows for work centers that currently have operations.
+
+    Builds the rollups on first use, e.g. for a database that predates them.
+    """
+    rows = WorkCenter.query.filter(WorkCenter.load_status != IDLE).order_by(WorkCenter.name).all()
+    if not rows and not WorkCenter.query.first():
+        refresh_work_center_rollups()
+        db.session.commit()
+        rows = WorkCenter.query.filter(WorkCenter.load_status != IDLE).order_by(WorkCenter.name).all()
+    return rows
+
+
+def rollup_differences(tolerance=1e-6):
+    """Compare stored rollups with a from-scratch rebuild.
+
+    Returns a list of (work_center, field, stored, expected) tuples.
+    """
+    totals = work_center_totals()
+    rows = {wc.name: wc for wc in WorkCenter.query.all()}
+    differences = []
+    for name in sorted(set(rows) | set(totals)):
+        work_center = rows.get(name) or WorkCenter(name=name)
+        expected = compute_rollup(work_center, totals.get(name))
+        for field in ROLLUP_FIELDS:
+            stored = getattr(work_center, field) if name in rows else None
+            wanted = expected[field]
+            if isinstance(wanted, float) or isinstance(stored, float):
+                same = stored is not None and abs((stored or 0) - wanted) <= tolerance
+            else:
+                same = stored == wanted
+            if not same:
+                differences.append((name, field, stored, wanted))
+    return differences
+
+
+@app.cli.command("check-rollups")
+@click.option("--fix", is_flag=True, help="Rewrite the stored rollups when they differ.")
+def check_rollups_command(fix):
+    """Rebuild work center rollups from operations and diff them with the stored rows."""
+    differences = rollup_differences()
+    for name, field, stored, expected in differences:
+        click.echo(f"{name}.{field}: stored={stored!r} expected={expected!r}")
+    if not differences:
+        click.echo("Work center rollups are consistent.")
+    elif fix:
+        refresh_work_center_rollups()
+        db.session.commit()
+        click.echo(f"Rebuilt rollups ({len(differences)} differences fixed).")
+    else:
+        raise SystemExit(1)
@@ -1,21 +1,57 @@
 
 import os
+import base64
+import time
+import uuid
 import pandas as pd
 from flask import render_template, request, jsonify, Response, stream_with_context
 from app import app, db
 from models import Job, WorkOrder, Operation, WorkLog, NCRTracker
-from utils import process_sapdata, calculate_forecast
+from utils import process_sapdata
 from datetime import datetime, timedelta
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import selectinload, contains_eager
 from werkzeug.utils import secure_filename
 import logging
 from flask import jsonify
 import json
 from concurrent.futures import ThreadPoolExecutor
 from excel_processor import process_sap_data
+from ingest import NCR_WORK_CENTER
+import upload_jobs
+import ingest_queue
+from aggregates import ncr_totals
+from assistant import answer as answer_chat
+from rollups import active_work_centers, refresh_stale_rollups, refresh_work_center_rollups, work_center_payload
+from api_cache import cached_json, bump_dataset_version, response_cache
+from scheduler import reschedule, move_operations
+from forecasting import plant_forecast
+from scenarios import run_scenarios
+from snapshots import snapshot_as_of, snapshot_trend
+from events import broker, publish_on_commit, MAX_EVENT_ITEMS
+import metrics
+import plant_model
+
+logger = logging.getLogger(__name__)
 
 # Configure thread pool for background tasks
 executor = ThreadPoolExecutor(max_workers=3)
 
+
+@app.before_request
+def _start_ingest_watcher():
+    ingest_queue.ensure_watcher()
+
+
+@app.before_request
+def _refresh_stale_rollups():
+    try:
+        refresh_stale_rollups()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error refreshing stale rollups: {str(e)}")
+
+
 @app.route('/')
 def dashboard():
     work_centers = db.session.query(Operation.work_center).distinct().all()
@@ -42,69 +78,187 @@ def purchase():
 def ncr_tracker():
     return render_template('ncr_tracker.html')
 
+JOB_FIELDS = ('job_number', 'customer_name')
+OPERATION_FIELDS = ('id', 'operation_number', 'work_center', 'planned_hours', 'actual_hours', 'status', 'scheduled_date')
+JOB_DETAIL_FIELDS = ('operation_number', 'work_center', 'planned_hours', 'actual_hours', 'status', 'scheduled_date')
+MAX_PAGE_SIZE = 1000
+
+
+def _parse_date_arg(name):
+    value = request.args.get(name)
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+def _json_flag(data, name, default):
+    """A JSON boolean from a request body; strings such as "false" are rejected."""
+    value = data.get(name, default)
+    if not isinstance(value, bool):
+        raise ValueError(f"{name} must be true or false")
+    return value
+
+
+def _operation_filter_values():
+    """The operation-level /api/jobs filters, None where not given."""
+    part = request.args.get('part')  # This refers to operation_number
+    return {
+        'part': int(part) if part else None,
+        'work_center': request.args.get('work_center') or None,
+        'status': request.args.get('status') or None,
+        'start_date': _parse_date_arg('start_date'),
+        'end_date': _parse_date_arg('end_date'),
+    }
+
+
+def _operation_filters():
+    """SQL criteria for the operation-level /api/jobs filters."""
+    values = _operation_filter_values()
+    criteria = []
+    if values['part'] is not None:
+        criteria.append(Operation.operation_number == values['part'])
+    if values['work_center']:
+        criteria.append(Operation.work_center == values['work_center'])
+    if values['status']:
+        criteria.append(Operation.status == values['status'])
+    if values['start_date']:
+        criteria.append(Operation.scheduled_date >= values['start_date'])
+    if values['end_date']:
+        criteria.append(Operation.scheduled_date <= values['end_date'])
+    return criteria
+
+
+def _model_jobs(job_number, cursor, limit, job_fields, op_fields):
+    """/api/jobs rows and next cursor from the in-memory plant model."""
+    model = plant_model.get_model()
+    op_mask = model.operation_mask(**_operation_filter_values())
+    positions = model.select_jobs(job_number, op_mask, after=cursor, limit=limit + 1 if limit else None)
+    next_cursor = None
+    if limit and len(positions) > limit:
+        positions = positions[:limit]
+        next_cursor = str(model.job_numbers[positions[-1]])
+
+    work_orders = model.work_orders(positions, op_fields, op_mask) if op_fields else None
+    result = []
+    for i, (number, customer) in enumerate(zip(model.job_numbers[positions].tolist(), model.customers[positions].tolist())):
+        item = {'job_number': number, 'customer_name': customer}
+        item = {key: item[key] for key in job_fields}
+        if op_fields:
+            item['work_orders'] = work_orders[i]
+        result.append(item)
+    return result, next_cursor
+
+
+def _serialize_operation(op, fields):
+    data = {
+        'id': op.id,
+        'operation_number': op.operation_number,
+        'work_center': op.work_center,
+        'planned_hours': op.planned_hours,
+        'actual_hours': op.actual_hours,
+        'status': op.status,
+        'scheduled_date': op.scheduled_date.isoformat() if op.scheduled_date else None
+    }
+    return {key: data[key] for key in fields}
+
+
 @app.route('/api/jobs')
+@cached_json
 def get_jobs():
+    """Jobs with their work orders and operations.
+
+    Optional filters: job_number, part (operation number), work_center,
+    status, start_date/end_date (scheduled date, YYYY-MM-DD). With limit,
+    the response is one page {"jobs": [...], "next_cursor": ...} ordered by
+    job_number; pass next_cursor back as cursor for the following page.
+    fields=job_number,work_center,... limits the keys returned; leaving out
+    every operation field skips loading work orders entirely.
+    """
     try:
         job_number = request.args.get('job_number')
-        part = request.args.get('part')  # This refers to operation_number
-
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit', type=int)
+        if limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+            return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+
+        fields = request.args.get('fields')
+        fields = [f.strip() for f in fields.split(',')] if fields else list(JOB_FIELDS + OPERATION_FIELDS)
+        unknown = set(fields) - set(JOB_FIELDS + OPERATION_FIELDS + ('work_orders',))
+        if unknown:
+            return jsonify({"error": f"Unknown fields: {', '.join(sorted(unknown))}"}), 400
+        job_fields = [f for f in JOB_FIELDS if f in fields]
+        op_fields = list(OPERATION_FIELDS) if 'work_orders' in fields else [f for f in OPERATION_FIELDS if f in fields]
+
+        if plant_model.enabled():
+            result, next_cursor = _model_jobs(job_number, cursor, limit, job_fields, op_fields)
+            if limit:
+                return jsonify({"jobs": result, "next_cursor": next_cursor})
+            return jsonify(result)
+
+        criteria = _operation_filters()
         query = Job.query
         if job_number:
             query = query.filter(Job.job_number == job_number)
-
-        jobs = query.all()
-
-        result = [
-            {
+        if criteria:
+            matching_jobs = db.select(WorkOrder.job_id).join(Operation).where(*criteria)
+            query = query.filter(Job.id.in_(matching_jobs))
+        if cursor:
+            query = query.filter(Job.job_number > cursor)
+        query = query.order_by(Job.job_number)
+        if limit:
+            query = query.limit(limit + 1)
+
+        if op_fields:
+            # Two IN-queries for all work orders and operations instead of one per job
+            query = query.options(
+                selectinload(Job.work_orders).selectinload(WorkOrder.operations.and_(*criteria))
+            )
+            jobs = query.all()
+        else:
+            jobs = query.with_entities(Job.job_number, Job.customer_name).all()
+
+        next_cursor = None
+        if limit and len(jobs) > limit:
+            jobs = jobs[:limit]
+            next_cursor = jobs[-1].job_number
+
+        result = []
+        for job in jobs:
+            item = {
                 'job_number': job.job_number,
                 'customer_name': job.customer_name if job.customer_name else "Unknown Customer",
-                'work_orders': [
+            }
+            item = {key: item[key] for key in job_fields}
+            if op_fields:
+                item['work_orders'] = [
                     {
                         'work_order_number': wo.work_order_number,
-                        'operations': [
-                            {
-                                'operation_number': op.operation_number,
-                                'work_center': op.work_center,
-                                'planned_hours': op.planned_hours,
-                                'actual_hours': op.actual_hours,
-                                'status': op.status,
-                                'scheduled_date': op.scheduled_date.isoformat() if op.scheduled_date else None
-                            }
-                            for op in wo.operations if not part or str(op.operation_number) == part
-                        ]
+                        'operations': [_serialize_operation(op, op_fields) for op in wo.operations]
                     }
                     for wo in job.work_orders
                 ]
-            }
-            for job in jobs
-        ]
+            result.append(item)
+
+        if limit:
+            return jsonify({"jobs": result, "next_cursor": next_cursor})
         return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {str(e)}"}), 400
     except Exception as e:
         app.logger.error(f"Error fetching jobs: {str(e)}")
         return jsonify({"error": "Internal Server Error"}), 500
 
 
 @app.route('/api/work_centers')
+@cached_json
 def get_work_centers():
     try:
-        work_centers = db.session.query(Operation.work_center).distinct().all()
         result = {}
 
-        for wc in work_centers:
-            work_center = wc[0]
-            operations = Operation.query.filter_by(work_center=work_center).all()
-
-            planned_hours = sum(op.planned_hours for op in operations)
-            actual_hours = sum(op.actual_hours for op in operations)
-            efficiency = round((actual_hours / planned_hours * 100) if planned_hours else 0)
+        if plant_model.enabled():
+            return jsonify(plant_model.get_model().work_centers)
 
-            result[work_center] = {
-                "planned_hours": planned_hours,
-                "actual_hours": actual_hours,
-                "efficiency": efficiency,
-                "capacity": planned_hours * 1.2,  # Example capacity calculation
-                "load_status": "Normal"
-            }
+        # Rollups are maintained on ingest and schedule changes
+        for wc in active_work_centers():
+            result[wc.name] = work_center_payload(wc)
 
         return jsonify(result)
     except Exception as e:
@@ -112,72 +266,199 @@ def get_work_centers():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/forecast')
+@cached_json
 def get_forecast():
     try:
-        work_centers = db.session.query(Operation.work_center).distinct().all()
-        forecast_data = {}
-
-        for wc in work_centers:
-            work_center = wc[0]
-            operations = Operation.query.filter_by(work_center=work_center).all()
-
-            planned = sum(op.planned_hours or 0 for op in operations)
-            actual = sum(op.actual_hours or 0 for op in operations)
-            remaining = max(planned - actual, 0)
-
-            forecast_data[work_center] = {
-                "planned_hours": planned,
-                "actual_hours": actual,
-                "remaining_hours": remaining,
-                "projected_hours": planned * 1.1  # Example projection
-            }
-
-        return jsonify(forecast_data)
+        # ?by=job switches from per-work-center to per-job projections
+        forecast = plant_forecast()
+        if request.args.get('by') == 'job':
+            return jsonify(forecast["jobs"])
+        return jsonify(forecast["work_centers"])
     except Exception as e:
         logging.error(f"Error generating forecast: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/history')
+@cached_json
+def get_history():
+    """Work center or job aggregates from the snapshots taken at each ingest.
+
+    as_of=YYYY-MM-DD returns the last snapshot on or before that date;
+    start_date/end_date return a daily series per name instead. scope is
+    work_center (default) or job; name=A,B restricts the names returned.
+    """
+    try:
+        scope = request.args.get('scope', 'work_center')
+        names = [n.strip() for n in request.args['name'].split(',')] if request.args.get('name') else None
+        start_date = _parse_date_arg('start_date')
+        end_date = _parse_date_arg('end_date')
+        if start_date or end_date:
+            return jsonify(snapshot_trend(start_date or end_date, end_date or datetime.utcnow().date(), scope, names))
+        as_of = _parse_date_arg('as_of') or datetime.utcnow().date()
+        return jsonify(snapshot_as_of(as_of, scope, names))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {str(e)}"}), 400
+    except Exception as e:
+        app.logger.error(f"Error fetching history: {str(e)}")
+        return jsonify({"error": "Internal Server Error"}), 500
+
+
 @app.route('/upload', methods=['POST'])
 def upload_sapdata():
     try:
-        print("🚀 Upload function triggered")  # Debugging log
-
         if 'file' not in request.files:
-            print("❌ No file part in request")
+            logger.warning("Upload rejected: no file part in request")
             return jsonify({"error": "No file part in request"}), 400
 
         file = request.files.get('file')
 
         if file is None or file.filename == '':
-            print("❌ No file selected")
+            logger.warning("Upload rejected: no file selected")
             return jsonify({"error": "No file selected"}), 400
 
-        print(f"📂 Received file: {file.filename}")
-
         uploads_dir = app.config.get("UPLOAD_FOLDER", "uploads")
-        print(f"📁 Saving to: {uploads_dir}")
 
         # Ensure upload directory exists
         if not os.path.exists(uploads_dir):
-            print("📂 Creating uploads directory")
+            logger.info(f"Creating uploads directory {uploads_dir}")
             os.makedirs(uploads_dir, exist_ok=True)
 
-        filepath = os.path.join(uploads_dir, file.filename)
-        print(f"💾 Saving file to: {filepath}")
-
+        job_id = uuid.uuid4().hex
+        # Prefix with the job id so concurrent uploads never overwrite each other's file
+        filepath = os.path.join(uploads_dir, f"{job_id}_{secure_filename(file.filename)}")
         file.save(filepath)
-        print("✅ File saved successfully")
+        logger.info(f"Saved upload {file.filename} to {filepath}")
 
-        # Process the file
-        process_sap_data(filepath)
+        # Process the file in the background; clients follow /api/upload/<job_id>
+        if ingest_queue.enabled():
+            ingest_queue.enqueue(job_id, "sapdata", file.filename, filepath)
+        else:
+            job = upload_jobs.create("sapdata", file.filename, job_id)
+            upload_jobs.start(executor, job, process_sap_data, filepath)
 
-        return jsonify({"status": "success", "message": "File uploaded"}), 200
+        return jsonify({"status": "accepted", "message": "File uploaded", "job_id": job_id}), 202
 
     except Exception as e:
-        print(f"❌ Error saving file: {e}")
+        logger.exception("Error saving upload")
         return jsonify({"error": f"Error uploading file: {str(e)}"}), 500
 
 
+@app.route('/api/upload/<job_id>')
+def get_upload_status(job_id):
+    """Return the progress of a background upload job."""
+    job = upload_jobs.get(job_id)
+    if job:
+        return jsonify(job.to_dict())
+    queued = ingest_queue.get(job_id) if ingest_queue.enabled() else None
+    if not queued:
+        return jsonify({"error": "Upload job not found"}), 404
+    return jsonify(ingest_queue.job_status(queued))
+
+
+def _queued_upload_events(job_id, interval=1.0, keepalive=15):
+    """Progress events for a job run by the ingest worker, polled from its row."""
+    last, idle = None, 0.0
+    while True:
+        db.session.expire_all()
+        status = ingest_queue.job_status(ingest_queue.get(job_id))
+        if status != last:
+            last, idle = status, 0.0
+            yield f"event: progress\ndata: {json.dumps(status)}\n\n"
+            if status["status"] in upload_jobs.FINISHED_STATES:
+                return
+        elif idle >= keepalive:
+            idle = 0.0
+            yield ": keepalive\n\n"
+        time.sleep(interval)
+        idle += interval
+
+
+@app.route('/api/upload/<job_id>/events')
+def stream_upload_status(job_id):
+    """Stream upload job progress as Server-Sent Events until it finishes."""
+    job = upload_jobs.get(job_id)
+    if not job and ingest_queue.enabled() and ingest_queue.get(job_id):
+        return Response(
+            stream_with_context(_queued_upload_events(job_id)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
+    if not job:
+        return jsonify({"error": "Upload job not found"}), 404
+
+    def generate():
+        version = None
+        while True:
+            if version != job.version:
+                version = job.version
+                yield f"event: progress\ndata: {json.dumps(job.to_dict())}\n\n"
+                if job.finished:
+                    return
+            elif not job.finished:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+            job.wait_for_change(version, timeout=15)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@app.route('/api/events')
+def stream_events():
+    """Stream change events (ingest, schedule, ncr, rollup) as Server-Sent Events.
+
+    A client that falls behind is sent a resync event and disconnected; it
+    should refetch its data and let EventSource reconnect.
+    """
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    subscriber = broker.subscribe(last_event_id)
+
+    def generate():
+        try:
+            yield f"retry: 3000\nid: {broker.last_id}\n\n" if last_event_id is None else "retry: 3000\n\n"
+            while True:
+                message = subscriber.get(timeout=15)
+                if message is not None:
+                    yield message
+                elif subscriber.dropped:
+                    yield broker.resync_message("client too slow")
+                    return
+                else:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+        finally:
+            broker.unsubscribe(subscriber)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus scrape endpoint for this process's request, SQL and ingest metrics."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/cache_stats')
+def get_cache_stats():
+    """Hit/miss counters and size of the read-API response cache."""
+    return jsonify(response_cache.stats())
+
+
+def _schedule_move(operation):
+    return {"id": operation.id, "scheduled_date": operation.scheduled_date.isoformat(), "work_center": operation.work_center}
+
+
 @app.route('/api/schedule', methods=['GET', 'POST'])
 def schedule():
     if request.method == 'POST':
@@ -185,7 +466,10 @@ def schedule():
         operation = Operation.query.get(data['operation_id'])
         if operation:
             operation.scheduled_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+            refresh_work_center_rollups([operation.work_center])
+            publish_on_commit(db.session, "schedule", {"operations": [_schedule_move(operation)]})
             db.session.commit()
+            bump_dataset_version("schedule")
             return jsonify({"status": "success"})
         return jsonify({"status": "error", "message": "Operation not found"}), 404
 
@@ -222,65 +506,156 @@ def schedule():
     }
 
     return jsonify(response_data)
+@app.route('/api/schedule/auto', methods=['POST'])
+def auto_schedule():
+    """Assign scheduled dates to all open operations under finite capacity.
+
+    Body: {"start_date": "YYYY-MM-DD", "dry_run": true, "max_changes": 500}.
+    A dry run (the default) only returns the diff against current dates.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date() if data.get('start_date') else None
+        dry_run = _json_flag(data, 'dry_run', True)
+        summary = reschedule(start_date, dry_run=dry_run, max_changes=int(data.get('max_changes', 500)))
+        if not dry_run and summary['applied']:
+            bump_dataset_version("schedule")
+        return jsonify(summary)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid request: {str(e)}"}), 400
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error running scheduler: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/schedule/batch', methods=['POST'])
+def batch_schedule():
+    """Move many operations at once.
+
+    Body: {"moves": [{"operation_id": 1, "new_date": "YYYY-MM-DD"}, ...],
+    "atomic": true}. Returns per-move results; with atomic (the default) a
+    single invalid move rejects the batch with status 400.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        atomic = _json_flag(data, 'atomic', True)
+        applied, results = move_operations(data.get('moves'), atomic=atomic)
+        if applied:
+            bump_dataset_version("schedule")
+        failed = sum(1 for r in results if r['status'] == 'error')
+        status = 400 if failed and atomic else 200
+        return jsonify({"applied": applied, "failed": failed, "results": results}), status
+    except ValueError as e:
+        return jsonify({"error": f"Invalid request: {str(e)}"}), 400
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error applying schedule batch: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/scenarios', methods=['POST'])
+def capacity_scenarios():
+    """Compare completion dates under what-if capacity overrides.
+
+    Body: {"start_date": "YYYY-MM-DD", "scenarios": [{"name": "...",
+    "overrides": {"CNC": {"add_workers": 2}, "*": {"working_days": [1,1,1,1,1,1,0]}}}]}.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date() if data.get('start_date') else None
+        return jsonify(run_scenarios(data.get('scenarios'), start_date))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid request: {str(e)}"}), 400
+    except Exception as e:
+        logging.error(f"Error running capacity scenarios: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 # work log code here 
+WORKLOG_STREAM_BATCH = 1000
+WORKLOG_GROUPS = {
+    'employee': (WorkLog.employee_id, WorkLog.employee_name),
+    'job': (WorkLog.job_number,),
+    'day': (WorkLog.posting_date,),
+}
+
+
 @app.route('/api/worklog', methods=['GET'])
+@cached_json
 def get_worklog():
-    worklogs = WorkLog.query.all()
-    return jsonify([log.to_dict() for log in worklogs])
+    """Labor confirmations, streamed from a server-side cursor.
+
+    Filters: employee_id, job_number, start_date/end_date (posting date,
+    YYYY-MM-DD). format=ndjson streams one JSON object per line instead of a
+    JSON array. group_by=employee|job|day (comma-separated combinations
+    allowed) returns hours summed in SQL instead of raw rows.
+    """
+    try:
+        query = WorkLog.query
+        if request.args.get('employee_id'):
+            query = query.filter(WorkLog.employee_id == int(request.args['employee_id']))
+        if request.args.get('job_number'):
+            query = query.filter(WorkLog.job_number == request.args['job_number'])
+        start_date = _parse_date_arg('start_date')
+        end_date = _parse_date_arg('end_date')
+        if start_date:
+            query = query.filter(WorkLog.posting_date >= start_date)
+        if end_date:
+            query = query.filter(WorkLog.posting_date <= end_date)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {str(e)}"}), 400
+
+    group_by = request.args.get('group_by')
+    if group_by:
+        return _worklog_aggregate(query, group_by)
+
+    rows = query.order_by(WorkLog.posting_date, WorkLog.id).yield_per(WORKLOG_STREAM_BATCH)
+
+    if request.args.get('format') == 'ndjson':
+        def generate():
+            for log in rows:
+                yield json.dumps(log.to_dict()) + "\n"
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    def generate():
+        yield "["
+        for i, log in enumerate(rows):
+            yield ("," if i else "") + json.dumps(log.to_dict())
+        yield "]"
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def _worklog_aggregate(query, group_by):
+    """Sum worklog hours in SQL grouped by employee, job and/or day."""
+    groups = [g.strip() for g in group_by.split(',')]
+    unknown = set(groups) - set(WORKLOG_GROUPS)
+    if unknown:
+        return jsonify({"error": f"Unknown group_by: {', '.join(sorted(unknown))}"}), 400
+
+    columns = [column for g in groups for column in WORKLOG_GROUPS[g]]
+    totals = query.with_entities(
+        *columns,
+        func.sum(WorkLog.actual_hours).label('total_hours'),
+        func.count(WorkLog.id).label('entries'),
+    ).group_by(*columns).order_by(*columns)
+
+    result = []
+    for row in totals:
+        item = dict(row._mapping)
+        if 'posting_date' in item:
+            item['posting_date'] = item['posting_date'].isoformat()
+        result.append(item)
+    return jsonify(result)
 
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
-    """Handle AI chat interactions"""
-    try:
-        data = request.get_json()
-        message = data.get('message', '').lower()
-
-        # Basic response logic based on keywords
-        if 'jobs in progress' in message:
-            active_jobs = Job.query.join(WorkOrder).join(Operation).filter(
-                Operation.status != 'Completed'
-            ).distinct().count()
-            return jsonify({
-                'response': f"There are currently {active_jobs} jobs in progress."
-            })
-
-        elif 'efficiency' in message and 'work center' in message:
-            # Extract work center name from message
-            work_center = message.split('work center')[-1].strip()
-            operations = Operation.query.filter_by(work_center=work_center).all()
-            if operations:
-                total_planned = sum(op.planned_hours for op in operations) or 1
-                total_actual = sum(op.actual_hours for op in operations)
-                efficiency = round((total_actual / total_planned) * 100)
-                return jsonify({
-                    'response': f"The efficiency for {work_center} is {efficiency}%"
-                })
-            return jsonify({'response': f"Could not find data for work center: {work_center}"})
-
-        elif 'remaining work' in message and 'job' in message:
-            # Extract job number from message
-            job_number = ''.join(filter(str.isdigit, message))
-            if job_number:
-                job = Job.query.filter_by(job_number=job_number).first()
-                if job:
-                    total_remaining = 0
-                    for wo in job.work_orders:
-                        for op in wo.operations:
-                            if op.status != 'Completed':
-                                total_remaining += op.planned_hours - op.actual_hours
-                    return jsonify({
-                        'response': f"Job {job_number} has {total_remaining:.1f} hours of remaining work."
-                    })
-                return jsonify({'response': f"Could not find job number: {job_number}"})
+    """Answer a plant question from the chat index (see assistant.py).
 
-        return jsonify({
-            'response': "I can help you with:\n" +
-                       "- Number of jobs in progress\n" +
-                       "- Work center efficiency\n" +
-                       "- Remaining work for specific jobs\n" +
-                       "Please ask me about these topics!"
-        })
+    Body: {"message": "..."}. Returns {"response", "intent"}; the index is
+    rebuilt on the first question after each dataset change.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        return jsonify(answer_chat(data.get('message', '')))
 
     except Exception as e:
         logging.error(f"Chat API error: {str(e)}")
@@ -293,7 +668,22 @@ def get_job_details():
     job_number = request.args.get('job_number')
     if not job_number:
         return jsonify({"error": "Missing job number"}), 400
-    
+
+    if plant_model.enabled():
+        model = plant_model.get_model()
+        position = model.job_position(job_number)
+        if position is None:
+            return jsonify({"error": "Job not found"}), 404
+        work_orders = model.work_orders([position], JOB_DETAIL_FIELDS)[0]
+        for wo in work_orders:
+            for op in wo["operations"]:
+                op["description"] = "No description"
+        return jsonify({
+            "job_number": job_number,
+            "customer_name": model.customers[position],
+            "work_orders": work_orders,
+        })
+
     job = Job.query.filter_by(job_number=job_number).first()
     if not job:
         return jsonify({"error": "Job not found"}), 404
@@ -334,7 +724,10 @@ def update_schedule():
             return jsonify({"error": "Operation not found"}), 404
 
         operation.scheduled_date = datetime.strptime(new_date, "%Y-%m-%d").date()
+        refresh_work_center_rollups([operation.work_center])
+        publish_on_commit(db.session, "schedule", {"operations": [_schedule_move(operation)]})
         db.session.commit()
+        bump_dataset_version("schedule")
         return jsonify({"status": "success", "message": "Schedule updated successfully."})
 
     except Exception as e:
@@ -362,58 +755,181 @@ def update_schedule():
 
 @app.route('/api/ncr_monitor', methods=['GET'])
 def check_ncr_operations():
-    """Detect work orders where an NCR operation has started (actual_hours > 0)."""
-    ncr_operations = Operation.query.filter(Operation.work_center == "NCR", Operation.actual_hours > 0).all()
-    
+    """Detect work orders where an NCR operation has started (actual_hours > 0).
+
+    One indexed query joins the work order, job and (if already recorded)
+    the operation's NCR tracker.
+    """
+    rows = (
+        db.session.query(Operation, NCRTracker.ncr_number, NCRTracker.status)
+        .join(Operation.work_order)
+        .join(WorkOrder.job)
+        .outerjoin(NCRTracker, db.and_(
+            NCRTracker.job_number == Job.job_number,
+            NCRTracker.work_order == WorkOrder.work_order_number,
+            NCRTracker.operation_number == Operation.operation_number,
+        ))
+        .options(contains_eager(Operation.work_order).contains_eager(WorkOrder.job))
+        .filter(Operation.work_center == NCR_WORK_CENTER, Operation.actual_hours > 0)
+        .all()
+    )
+
     result = []
-    for op in ncr_operations:
+    for op, ncr_number, ncr_status in rows:
         ncr_data = {
             "job_number": op.work_order.job.job_number,
             "work_order": op.work_order.work_order_number,
             "operation_number": op.operation_number,
             "planned_hours": op.planned_hours,
-            "actual_hours": op.actual_hours
+            "actual_hours": op.actual_hours,
+            "ncr_number": ncr_number,
+            "ncr_status": ncr_status
         }
         result.append(ncr_data)
     
     return jsonify(result)
 
+
+NCR_REPORT_FIELDS = (
+    "part_name", "planned_hours", "actual_hours", "issue_description", "issue_category",
+    "root_cause", "corrective_action", "financial_impact",
+)
+
+
 @app.route('/api/ncr_report', methods=['POST'])
 def submit_ncr():
-    """Allow users to submit an NCR report when an NCR event is detected."""
+    """Allow users to submit an NCR report when an NCR event is detected.
+
+    There is one tracker per (job, work order, operation): a report for an
+    operation that ingest already flagged fills in the existing tracker.
+    """
     data = request.json
-    
-    new_ncr = NCRTracker(
-        ncr_number=data.get("ncr_number"),
+
+    existing = NCRTracker.query.filter_by(
         job_number=data.get("job_number"),
         work_order=data.get("work_order"),
         operation_number=data.get("operation_number"),
-        part_name=data.get("part_name"),
-        planned_hours=data.get("planned_hours"),
-        actual_hours=data.get("actual_hours"),
-        issue_description=data.get("issue_description"),
-        issue_category=data.get("issue_category"),
-        root_cause=data.get("root_cause"),
-        corrective_action=data.get("corrective_action"),
-        financial_impact=data.get("financial_impact", 0.0)
-    )
-    
-    db.session.add(new_ncr)
+    ).first()
+    if existing:
+        for field in NCR_REPORT_FIELDS:
+            if data.get(field) is not None:
+                setattr(existing, field, data[field])
+        ncr = existing
+    else:
+        ncr = NCRTracker(
+            ncr_number=data.get("ncr_number"),
+            job_number=data.get("job_number"),
+            work_order=data.get("work_order"),
+            operation_number=data.get("operation_number"),
+            part_name=data.get("part_name"),
+            planned_hours=data.get("planned_hours"),
+            actual_hours=data.get("actual_hours"),
+            issue_description=data.get("issue_description"),
+            issue_category=data.get("issue_category"),
+            root_cause=data.get("root_cause"),
+            corrective_action=data.get("corrective_action"),
+            financial_impact=data.get("financial_impact", 0.0)
+        )
+        db.session.add(ncr)
+
+    db.session.flush()
+    publish_on_commit(db.session, "ncr", {"source": "report", "ncrs": [{
+        "ncr_number": ncr.ncr_number,
+        "job_number": ncr.job_number,
+        "work_order": ncr.work_order,
+        "operation_number": ncr.operation_number,
+        "status": ncr.status,
+    }]})
     db.session.commit()
-    
+    bump_dataset_version("ncr_report")
+
+    if existing:
+        return jsonify({"message": "NCR report updated successfully", "ncr_number": ncr.ncr_number}), 200
     return jsonify({"message": "NCR report submitted successfully"}), 201
 
 
-@app.route('/api/ncr')
-def get_ncr_data():
+NCR_SORTS = {
+    'created_at': NCRTracker.created_at,
+    'ncr_number': NCRTracker.ncr_number,
+    'job_number': NCRTracker.job_number,
+    'financial_impact': func.coalesce(NCRTracker.financial_impact, 0),
+    'overrun_hours': NCRTracker.actual_hours - NCRTracker.planned_hours,
+}
+
+
+def _ncr_filters():
+    """SQL criteria for the /api/ncr and /api/ncr/summary filters."""
+    criteria = []
+    for arg, column in (('status', NCRTracker.status), ('issue_category', NCRTracker.issue_category),
+                        ('job_number', NCRTracker.job_number)):
+        if request.args.get(arg):
+            criteria.append(column == request.args[arg])
+    start_date = _parse_date_arg('start_date')
+    end_date = _parse_date_arg('end_date')
+    if start_date:
+        criteria.append(NCRTracker.created_at >= start_date)
+    if end_date:
+        criteria.append(NCRTracker.created_at < end_date + timedelta(days=1))
+    return criteria
+
+
+def _encode_ncr_cursor(sort, value, ncr_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([sort, value, ncr_id]).encode()).decode()
+
+
+def _decode_ncr_cursor(cursor, sort):
     try:
-        print("📡 Fetching NCR records from database...")  # Debug Log
+        cursor_sort, value, ncr_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("malformed cursor")
+    if cursor_sort != sort:
+        raise ValueError("cursor belongs to a different sort")
+    if sort == 'created_at':
+        value = datetime.fromisoformat(value)
+    return value, ncr_id
 
-        ncr_entries = NCRTracker.query.all()
 
-        if not ncr_entries:
-            print("⚠️ No NCR records found in the database.")
-            return jsonify([])
+@app.route('/api/ncr')
+@cached_json
+def get_ncr_data():
+    """NCR trackers, newest first.
+
+    Optional filters: status, issue_category, job_number, start_date/end_date
+    (created date, YYYY-MM-DD). sort is one of NCR_SORTS, order asc or desc.
+    With limit, the response is one page {"ncrs": [...], "next_cursor": ...};
+    pass next_cursor back as cursor for the following page. Pages are
+    keyset-based on (sort value, id), so deep pages cost the same as the first.
+    """
+    try:
+        limit = request.args.get('limit', type=int)
+        if limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+            return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+        sort = request.args.get('sort', 'created_at')
+        if sort not in NCR_SORTS:
+            return jsonify({"error": f"sort must be one of {', '.join(NCR_SORTS)}"}), 400
+        descending = request.args.get('order', 'desc') == 'desc'
+
+        key = NCR_SORTS[sort]
+        query = db.session.query(NCRTracker, key.label('sort_value')).filter(*_ncr_filters())
+        cursor = request.args.get('cursor')
+        if cursor:
+            value, ncr_id = _decode_ncr_cursor(cursor, sort)
+            after = tuple_(key, NCRTracker.id)
+            query = query.filter(after < (value, ncr_id) if descending else after > (value, ncr_id))
+        if descending:
+            query = query.order_by(key.desc(), NCRTracker.id.desc())
+        else:
+            query = query.order_by(key, NCRTracker.id)
+        if limit:
+            query = query.limit(limit + 1)
+        rows = query.all()
+
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_ncr_cursor(sort, rows[-1].sort_value, rows[-1][0].id)
 
         data = [{
             "ncr_number": ncr.ncr_number,
@@ -423,12 +939,35 @@ def get_ncr_data():
             "planned_hours": ncr.planned_hours,
             "actual_hours": ncr.actual_hours,
             "issue_description": ncr.issue_description,
-            "status": ncr.status
-        } for ncr in ncr_entries]
-
-        print(f"✅ Returning {len(data)} NCR records.")  # Debug Log
+            "issue_category": ncr.issue_category,
+            "financial_impact": ncr.financial_impact,
+            "status": ncr.status,
+            "created_at": ncr.created_at.isoformat() if ncr.created_at else None
+        } for ncr, _ in rows]
+
+        if limit:
+            return jsonify({"ncrs": data, "next_cursor": next_cursor})
         return jsonify(data)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {str(e)}"}), 400
+    except Exception as e:
+        app.logger.error(f"Error fetching NCR data: {str(e)}")
+        return jsonify({"error": "Internal Server Error"}), 500
 
+
+@app.route('/api/ncr/summary')
+@cached_json
+def get_ncr_summary():
+    """NCR counts, overrun hours and financial impact grouped in SQL.
+
+    group_by is category (default), work_center or month; takes the same
+    filters as /api/ncr.
+    """
+    try:
+        group_by = request.args.get('group_by', 'category')
+        return jsonify({"group_by": group_by, "groups": ncr_totals(group_by, _ncr_filters())})
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {str(e)}"}), 400
     except Exception as e:
-        print(f"❌ Error fetching NCR data: {str(e)}")
+        app.logger.error(f"Error summarizing NCR data: {str(e)}")
         return jsonify({"error": "Internal Server Error"}), 500
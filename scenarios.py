@@ -0,0 +1,235 @@
+import os
+import math
+import time
+import logging
+import threading
+import multiprocessing
+from datetime import date, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from app import app
+from scheduler import (
+    HOURS_PER_SHIFT, center_capacities, daily_capacity, finite_capacity_schedule, load_open_operations,
+)
+from models import WorkCenter
+
+logger = logging.getLogger(__name__)
+
+MAX_SCENARIOS = 20
+OVERRIDE_FIELDS = {'capacity', 'workers', 'efficiency', 'working_days', 'add_workers'}
+# Applies to every work center unless a center-specific entry overrides it
+ALL_CENTERS = '*'
+# Numeric override fields and whether zero is allowed
+NUMERIC_FIELDS = {'capacity': False, 'workers': False, 'add_workers': True}
+
+_pool = None
+_pool_lock = threading.Lock()
+# Worker-side attachment to the shared base arrays of the current batch
+_attached = None
+
+
+def share_arrays(arrays):
+    """Copy named arrays into one shared memory block.
+
+    Returns (shm, layout); workers rebuild zero-copy views from the block
+    name and the layout with attach_arrays(). The caller owns the block and
+    must close() and unlink() it.
+    """
+    layout = []
+    offset = 0
+    for name, array in arrays.items():
+        layout.append((name, array.dtype.str, array.shape, offset))
+        offset += array.nbytes
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for (name, dtype, shape, start), array in zip(layout, arrays.values()):
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)[...] = array
+    return shm, layout
+
+
+def attach_arrays(shm_name, layout):
+    """Read-only views of a block written by share_arrays(), kept per process."""
+    global _attached
+    if _attached is not None and _attached[0] == shm_name:
+        return _attached[2]
+    if _attached is not None:
+        _attached[1].close()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    arrays = {}
+    for name, dtype, shape, offset in layout:
+        view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+        view.flags.writeable = False
+        arrays[name] = view
+    _attached = (shm_name, shm, arrays)
+    return arrays
+
+
+def run_scenario(shm_name, layout, center_weekly_hours, start_weekday):
+    """Schedule the shared base operations under one capacity table.
+
+    Runs in a pool process. Returns the last finish offset per work center
+    and per work order, plus the compute time.
+    """
+    started = time.perf_counter()
+    base = attach_arrays(shm_name, layout)
+    _, finish = finite_capacity_schedule(
+        base['work_orders'], base['operation_numbers'], base['centers'], base['hours'],
+        center_weekly_hours, start_weekday,
+    )
+    center_finish = np.full(len(center_weekly_hours), -1, dtype=np.int64)
+    np.maximum.at(center_finish, base['centers'], finish)
+    work_order_finish = np.zeros(int(base['work_orders'].max()) + 1 if len(finish) else 0, dtype=np.int64)
+    np.maximum.at(work_order_finish, base['work_orders'], finish)
+    return {
+        'center_finish': center_finish,
+        'work_order_finish': work_order_finish,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = app.config.get("SCENARIO_WORKERS") or os.cpu_count()
+            # Spawned, not forked: a fork of the threaded server would copy the
+            # engine's pooled connections and any lock another thread holds
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _number(value, field, center):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{field} for {center!r} must be a number")
+    return value
+
+
+def resolve_overrides(names, overrides):
+    """Validate one scenario's overrides and expand them per work center.
+
+    Accepts the center_capacities() fields plus add_workers, which adds
+    shifts of HOURS_PER_SHIFT on top of the center's current daily hours.
+    A "*" entry applies to every work center.
+    """
+    if not isinstance(overrides, dict):
+        raise ValueError("overrides must be an object keyed by work center")
+    for center, fields in overrides.items():
+        if center != ALL_CENTERS and center not in names:
+            raise ValueError(f"unknown work center {center!r}")
+        if not isinstance(fields, dict):
+            raise ValueError(f"overrides for {center!r} must be an object")
+        unknown = set(fields) - OVERRIDE_FIELDS
+        if unknown:
+            raise ValueError(f"unknown override field(s) {sorted(unknown)} for {center!r}")
+        for field, allow_zero in NUMERIC_FIELDS.items():
+            if field in fields:
+                value = _number(fields[field], field, center)
+                if value < 0 or (value == 0 and not allow_zero):
+                    bound = "zero or more" if allow_zero else "greater than zero"
+                    raise ValueError(f"{field} for {center!r} must be {bound}")
+        if 'efficiency' in fields and not 0 < _number(fields['efficiency'], 'efficiency', center) <= 100:
+            raise ValueError(f"efficiency for {center!r} must be above 0 and at most 100")
+        if 'working_days' in fields:
+            working_days = fields['working_days']
+            if (not isinstance(working_days, list) or len(working_days) != 7
+                    or any(isinstance(d, bool) or d not in (0, 1) for d in working_days)):
+                raise ValueError("working_days must list seven 0/1 flags, Monday first")
+
+    stored = {wc.name: wc for wc in WorkCenter.query.filter(WorkCenter.name.in_(list(names))).all()}
+    resolved = {}
+    for name in names:
+        fields = {**overrides.get(ALL_CENTERS, {}), **overrides.get(name, {})}
+        if not fields:
+            continue
+        extra = fields.pop('add_workers', None)
+        if extra:
+            row = stored.get(name)
+            base_hours = daily_capacity(
+                fields.get('capacity', row.capacity if row else None),
+                fields.get('workers', row.workers if row else None),
+            )
+            fields['capacity'] = base_hours + float(extra) * HOURS_PER_SHIFT
+        resolved[name] = fields
+    return resolved
+
+
+def _center_results(names, weekly, remaining, finish, base_finish, start_date):
+    out = {}
+    for i, name in enumerate(names):
+        weekly_hours = float(weekly[i].sum())
+        out[name] = {
+            "weekly_hours": round(weekly_hours, 2),
+            "remaining_hours": round(float(remaining[i]), 2),
+            "load_weeks": round(float(remaining[i]) / weekly_hours, 2) if weekly_hours else None,
+            "finish_date": (start_date + timedelta(days=int(finish[i]))).isoformat() if finish[i] >= 0 else None,
+            "finish_delta_days": int(finish[i] - base_finish[i]),
+        }
+    return out
+
+
+def run_scenarios(scenarios, start_date=None):
+    """Compare finite-capacity schedules of several capacity scenarios.
+
+    scenarios is a list of {"name", "overrides"}; a baseline with the
+    stored capacities is always run first. Every scenario is scheduled in
+    the process pool against one shared copy of the open operations.
+    """
+    if not isinstance(scenarios, list) or not scenarios:
+        raise ValueError("scenarios must be a non-empty list")
+    if len(scenarios) > MAX_SCENARIOS:
+        raise ValueError(f"at most {MAX_SCENARIOS} scenarios per request")
+    if not all(isinstance(s, dict) for s in scenarios):
+        raise ValueError("each scenario must be an object with a name and overrides")
+
+    started = time.perf_counter()
+    start_date = start_date or date.today()
+    ops = load_open_operations()
+    names = sorted(ops['work_center'].unique())
+    centers = pd.Categorical(ops['work_center'], categories=names).codes.astype(np.int64)
+    work_orders, _ = pd.factorize(ops['work_order_id'], sort=True)
+    hours = ops['remaining_hours'].to_numpy(dtype=float)
+    remaining = np.bincount(centers, weights=hours, minlength=len(names))
+
+    runs = [{"name": "baseline", "overrides": {}}] + [
+        {"name": str(s.get('name') or f"scenario {i + 1}"), "overrides": resolve_overrides(names, s.get('overrides', {}))}
+        for i, s in enumerate(scenarios)
+    ]
+    tables = [center_capacities(names, run['overrides']) for run in runs]
+
+    shm, layout = share_arrays({
+        'work_orders': work_orders.astype(np.int64),
+        'operation_numbers': ops['operation_number'].to_numpy(dtype=np.int64),
+        'centers': centers,
+        'hours': hours,
+    })
+    try:
+        executor = _executor()
+        futures = [executor.submit(run_scenario, shm.name, layout, table, start_date.weekday()) for table in tables]
+        outcomes = [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    base = outcomes[0]
+    results = []
+    for run, table, outcome in zip(runs, tables, outcomes):
+        finish = outcome['center_finish']
+        completion = int(finish.max()) if len(finish) else 0
+        results.append({
+            "name": run['name'],
+            "overrides": run['overrides'],
+            "seconds": round(outcome['seconds'], 3),
+            "completion_date": (start_date + timedelta(days=completion)).isoformat(),
+            "completion_delta_days": completion - (int(base['center_finish'].max()) if len(finish) else 0),
+            "mean_work_order_days": round(float(outcome['work_order_finish'].mean()), 1) if len(outcome['work_order_finish']) else None,
+            "work_centers": _center_results(names, table, remaining, finish, base['center_finish'], start_date),
+        })
+
+    logger.info(f"Ran {len(runs)} capacity scenarios over {len(ops)} operations in {time.perf_counter() - started:.2f}s")
+    return {
+        "start_date": start_date.isoformat(),
+        "operations": len(ops),
+        "scenarios": results,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
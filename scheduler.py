@@ -0,0 +1,344 @@
+import heapq
+import time
+import logging
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, update, case
+from app import db
+from models import Operation, WorkCenter
+from rollups import refresh_work_center_rollups
+from events import publish_on_commit, MAX_EVENT_ITEMS
+
+logger = logging.getLogger(__name__)
+
+HOURS_PER_SHIFT = 8.0
+# Monday..Sunday; weekends are closed unless a work center says otherwise
+WORKING_DAYS = (1, 1, 1, 1, 1, 0, 0)
+EPSILON = 1e-9
+UPDATE_BATCH_SIZE = 5000
+MAX_BATCH_MOVES = 1000
+
+
+def daily_capacity(capacity=None, workers=None, efficiency=None):
+    """Effective hours per working day from a WorkCenter's settings.
+
+    capacity is taken as the center's hours per day; without it, workers
+    times one shift is used. efficiency scales the result and may be given
+    as a fraction (0.85) or a percentage (85).
+    """
+    if capacity:
+        hours = capacity
+    elif workers:
+        hours = workers * HOURS_PER_SHIFT
+    else:
+        hours = HOURS_PER_SHIFT
+    if efficiency:
+        hours *= efficiency / 100 if efficiency > 1 else efficiency
+    return hours
+
+
+def weekly_capacity(hours_per_day, working_days=WORKING_DAYS):
+    """Hours available on each weekday, Monday first."""
+    return np.asarray(working_days, dtype=float) * hours_per_day
+
+
+class CapacityCalendar:
+    """Remaining hours per day for one work center.
+
+    Days are offsets from the schedule start. Full and closed days are
+    skipped with a union-find "next open day" pointer, so booking stays
+    near O(1) however far the calendar has filled up.
+    """
+
+    def __init__(self, weekday_hours, start_weekday):
+        weekday_hours = np.asarray(weekday_hours, dtype=float)
+        if weekday_hours.sum() <= EPSILON:
+            weekday_hours = weekly_capacity(HOURS_PER_SHIFT)
+        self.weekday_hours = weekday_hours.tolist()
+        self.start_weekday = start_weekday
+        self.left = []
+        self.parent = []
+
+    def _extend(self, day):
+        while len(self.left) <= day:
+            d = len(self.left)
+            hours = self.weekday_hours[(self.start_weekday + d) % 7]
+            self.left.append(hours)
+            self.parent.append(d if hours > EPSILON else d + 1)
+
+    def find(self, day):
+        """First day >= day that still has capacity."""
+        path = []
+        self._extend(day)
+        while self.parent[day] != day:
+            path.append(day)
+            day = self.parent[day]
+            self._extend(day)
+        for node in path:
+            self.parent[node] = day
+        return day
+
+    def book(self, ready_day, hours):
+        """Consume hours starting at ready_day; returns (start_day, finish_day)."""
+        day = self.find(ready_day)
+        start = day
+        while hours > EPSILON:
+            take = min(self.left[day], hours)
+            self.left[day] -= take
+            hours -= take
+            if self.left[day] <= EPSILON:
+                self.parent[day] = day + 1
+            if hours > EPSILON:
+                day = self.find(day + 1)
+        return start, day
+
+
+def finite_capacity_schedule(work_order_ids, operation_numbers, center_codes, hours, center_weekly_hours, start_weekday):
+    """Assign start/finish day offsets to operations under finite capacity.
+
+    Operations of a work order run in operation_number order; each becomes
+    ready on the day its predecessor finishes. Ready operations are taken
+    from a priority queue ordered by ready day, then by work order (older
+    orders first), and booked on their center's CapacityCalendar.
+    center_weekly_hours is an (n_centers, 7) array of hours per weekday.
+    Returns (start_offsets, finish_offsets) aligned with the inputs.
+    """
+    n = len(hours)
+    start = np.zeros(n, dtype=np.int64)
+    finish = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return start, finish
+
+    order = np.lexsort((operation_numbers, work_order_ids))
+    sorted_wo = np.asarray(work_order_ids)[order]
+    first_of_wo = np.ones(n, dtype=bool)
+    first_of_wo[1:] = sorted_wo[1:] != sorted_wo[:-1]
+    # Position in `order` of the next operation in the same work order, or -1
+    successor = np.full(n, -1, dtype=np.int64)
+    successor[:-1] = np.where(first_of_wo[1:], -1, np.arange(1, n))
+
+    calendars = [CapacityCalendar(row, start_weekday) for row in np.asarray(center_weekly_hours)]
+    centers = np.asarray(center_codes)[order].tolist()
+    booked_hours = np.asarray(hours, dtype=float)[order].tolist()
+    wo_rank = sorted_wo.tolist()
+    successor = successor.tolist()
+    order = order.tolist()
+
+    heap = [(0, wo_rank[pos], pos) for pos in np.flatnonzero(first_of_wo).tolist()]
+    heapq.heapify(heap)
+    while heap:
+        ready, rank, pos = heapq.heappop(heap)
+        op_start, op_finish = calendars[centers[pos]].book(ready, booked_hours[pos])
+        start[order[pos]] = op_start
+        finish[order[pos]] = op_finish
+        nxt = successor[pos]
+        if nxt != -1:
+            heapq.heappush(heap, (op_finish, rank, nxt))
+    return start, finish
+
+
+def load_open_operations():
+    """Open operations with their remaining hours, as one DataFrame."""
+    rows = db.session.query(
+        Operation.id, Operation.work_order_id, Operation.operation_number, Operation.work_center,
+        func.coalesce(Operation.planned_hours, 0) - func.coalesce(Operation.actual_hours, 0),
+        Operation.scheduled_date,
+    ).filter(func.coalesce(Operation.status, '') != 'Completed').all()
+    frame = pd.DataFrame(rows, columns=[
+        'operation_id', 'work_order_id', 'operation_number', 'work_center', 'remaining_hours', 'scheduled_date',
+    ])
+    frame['remaining_hours'] = frame['remaining_hours'].astype(float).clip(lower=0)
+    return frame
+
+
+def center_capacities(names, overrides=None):
+    """(n_centers, 7) weekday hours for names, from WorkCenter rows.
+
+    overrides maps a work center name to {"capacity", "workers",
+    "efficiency", "working_days"} values replacing the stored ones.
+    """
+    rows = {wc.name: wc for wc in WorkCenter.query.filter(WorkCenter.name.in_(list(names))).all()}
+    overrides = overrides or {}
+    table = []
+    for name in names:
+        stored = rows.get(name)
+        override = overrides.get(name, {})
+        settings = {
+            field: override.get(field, getattr(stored, field) if stored else None)
+            for field in ('capacity', 'workers', 'efficiency')
+        }
+        table.append(weekly_capacity(daily_capacity(**settings), override.get('working_days', WORKING_DAYS)))
+    return np.array(table).reshape(len(names), 7)
+
+
+def plan_schedule(start_date=None, overrides=None):
+    """Compute a finite-capacity schedule for all open operations.
+
+    Returns a DataFrame with operation_id, work_center, old_date,
+    scheduled_date and finish_date.
+    """
+    start_date = start_date or date.today()
+    ops = load_open_operations()
+    names = sorted(ops['work_center'].unique())
+    codes = pd.Categorical(ops['work_center'], categories=names).codes
+    start, finish = finite_capacity_schedule(
+        ops['work_order_id'].to_numpy(), ops['operation_number'].to_numpy(), codes,
+        ops['remaining_hours'].to_numpy(), center_capacities(names, overrides), start_date.weekday(),
+    )
+    base = np.datetime64(start_date, 'D')
+    return pd.DataFrame({
+        'operation_id': ops['operation_id'],
+        'work_center': ops['work_center'],
+        'old_date': ops['scheduled_date'],
+        'scheduled_date': pd.to_datetime(base + start).date,
+        'finish_date': pd.to_datetime(base + finish).date,
+    })
+
+
+def apply_schedule(plan):
+    """Write the plan's changed scheduled dates in one transaction.
+
+    Returns the number of operations moved.
+    """
+    changed = plan[plan['scheduled_date'] != plan['old_date']]
+    records = [
+        {'id': int(op_id), 'scheduled_date': new_date}
+        for op_id, new_date in zip(changed['operation_id'], changed['scheduled_date'])
+    ]
+    for start in range(0, len(records), UPDATE_BATCH_SIZE):
+        db.session.execute(update(Operation), records[start:start + UPDATE_BATCH_SIZE])
+    if records:
+        centers = sorted(changed['work_center'].unique())
+        refresh_work_center_rollups(centers)
+        if len(records) <= MAX_EVENT_ITEMS:
+            moves = [
+                {"id": record['id'], "scheduled_date": record['scheduled_date'].isoformat(), "work_center": center}
+                for record, center in zip(records, changed['work_center'])
+            ]
+            publish_on_commit(db.session, "schedule", {"operations": moves})
+        else:
+            publish_on_commit(db.session, "schedule", {"count": len(records), "work_centers": centers, "truncated": True})
+    db.session.commit()
+    return len(records)
+
+
+def reschedule(start_date=None, dry_run=True, max_changes=500):
+    """Plan (and unless dry_run, apply) a finite-capacity schedule.
+
+    Returns a summary with the number of moved operations, the first
+    max_changes moves and the projected last working day per work center.
+    """
+    started = time.perf_counter()
+    plan = plan_schedule(start_date)
+    changed = plan[plan['scheduled_date'] != plan['old_date']]
+    planned_seconds = time.perf_counter() - started
+
+    moved = 0 if dry_run else apply_schedule(plan)
+    summary = {
+        'dry_run': dry_run,
+        'operations': len(plan),
+        'changed': len(changed),
+        'applied': moved,
+        'changes': [
+            {
+                'operation_id': int(row.operation_id),
+                'work_center': row.work_center,
+                'old_date': row.old_date.isoformat() if pd.notna(row.old_date) else None,
+                'new_date': row.scheduled_date.isoformat(),
+                'finish_date': row.finish_date.isoformat(),
+            }
+            for row in changed.head(max_changes).itertuples()
+        ],
+        'work_centers': {
+            name: {'last_day': group.max().isoformat(), 'operations': int(group.size)}
+            for name, group in plan.groupby('work_center')['finish_date']
+        },
+        'plan_seconds': round(planned_seconds, 3),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+    logger.info(f"Finite-capacity schedule: {summary['changed']} of {summary['operations']} operations moved")
+    return summary
+
+
+def _validate_move(move, seen):
+    """(operation_id, date) for one batch item; raises ValueError if malformed."""
+    if not isinstance(move, dict):
+        raise ValueError("move must be an object")
+    try:
+        operation_id = int(move['operation_id'])
+        new_date = datetime.strptime(str(move['new_date']), '%Y-%m-%d').date()
+    except KeyError as e:
+        raise ValueError(f"missing {e.args[0]}")
+    except (TypeError, ValueError):
+        raise ValueError("operation_id must be an integer and new_date YYYY-MM-DD")
+    if operation_id in seen:
+        raise ValueError("operation moved twice in one batch")
+    seen.add(operation_id)
+    return operation_id, new_date
+
+
+def move_operations(moves, atomic=True):
+    """Apply a batch of {operation_id, new_date} moves in one transaction.
+
+    All moves are validated first (shape, duplicates, existence). With
+    atomic, any invalid move rejects the whole batch; otherwise the valid
+    ones are applied. Changed dates are written with a single UPDATE and
+    rollups are refreshed once for the touched work centers. Returns
+    (applied, results) with one result per input move.
+    """
+    if not isinstance(moves, list) or not moves:
+        raise ValueError("moves must be a non-empty list")
+    if len(moves) > MAX_BATCH_MOVES:
+        raise ValueError(f"at most {MAX_BATCH_MOVES} moves per batch")
+
+    seen = set()
+    parsed = []
+    for move in moves:
+        try:
+            parsed.append(_validate_move(move, seen) + (None,))
+        except ValueError as e:
+            parsed.append((move.get('operation_id') if isinstance(move, dict) else None, None, str(e)))
+
+    ids = [op_id for op_id, _, error in parsed if error is None]
+    current = {
+        op_id: (work_center, scheduled_date)
+        for op_id, work_center, scheduled_date in db.session.query(
+            Operation.id, Operation.work_center, Operation.scheduled_date,
+        ).filter(Operation.id.in_(ids)).all()
+    } if ids else {}
+
+    results = []
+    for op_id, new_date, error in parsed:
+        if error is None and op_id not in current:
+            error = "operation not found"
+        if error is not None:
+            results.append({"operation_id": op_id, "status": "error", "error": error})
+        elif current[op_id][1] == new_date:
+            results.append({"operation_id": op_id, "status": "unchanged", "scheduled_date": new_date.isoformat()})
+        else:
+            results.append({"operation_id": op_id, "status": "updated", "scheduled_date": new_date.isoformat()})
+
+    failed = any(result['status'] == 'error' for result in results)
+    if failed and atomic:
+        for result in results:
+            if result['status'] != 'error':
+                result['status'] = 'rejected'
+        return 0, results
+
+    updates = {r['operation_id']: date.fromisoformat(r['scheduled_date']) for r in results if r['status'] == 'updated'}
+    if updates:
+        db.session.execute(
+            update(Operation)
+            .where(Operation.id.in_(list(updates)))
+            .values(scheduled_date=case(updates, value=Operation.id)),
+            execution_options={"synchronize_session": False},
+        )
+        centers = sorted({current[op_id][0] for op_id in updates})
+        refresh_work_center_rollups(centers)
+        publish_on_commit(db.session, "schedule", {"operations": [
+            {"id": op_id, "scheduled_date": new_date.isoformat(), "work_center": current[op_id][0]}
+            for op_id, new_date in updates.items()
+        ]})
+    db.session.commit()
+    return len(updates), results
@@ -0,0 +1,163 @@
+import time
+import logging
+from datetime import datetime
+from sqlalchemy import func, case, and_, insert, literal, select, text, Date, DateTime, String
+from app import db
+from models import Job, WorkOrder, Operation, PlantSnapshot
+from api_cache import bump_dataset_version
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ('work_center', 'job')
+METRICS = (
+    'planned_hours', 'actual_hours', 'remaining_hours', 'backlog_hours',
+    'operation_count', 'not_started_count', 'in_progress_count', 'completed_count',
+)
+MAX_TREND_DAYS = 366
+
+_partitions = set()
+
+
+def ensure_partition(day):
+    """Create the monthly PostgreSQL partition holding day, if missing."""
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    month = day.replace(day=1)
+    if month in _partitions:
+        return
+    following = month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+    db.session.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {PlantSnapshot.__tablename__}_{month:%Y_%m} "
+        f"PARTITION OF {PlantSnapshot.__tablename__} FOR VALUES FROM ('{month}') TO ('{following}')"
+    ))
+    _partitions.add(month)
+
+
+def _aggregate_select(scope, group, snapshot_date, taken_at):
+    planned = func.coalesce(Operation.planned_hours, 0)
+    actual = func.coalesce(Operation.actual_hours, 0)
+    status = func.coalesce(Operation.status, '')
+    is_open = status != 'Completed'
+    return select(
+        literal(snapshot_date, Date),
+        literal(taken_at, DateTime),
+        literal(scope, String),
+        group,
+        func.sum(planned),
+        func.sum(actual),
+        func.sum(case((is_open, planned - actual), else_=0)),
+        func.sum(case((and_(is_open, Operation.scheduled_date < snapshot_date), planned - actual), else_=0)),
+        func.count(Operation.id),
+        func.sum(case((status.not_in(['In Progress', 'Completed']), 1), else_=0)),
+        func.sum(case((status == 'In Progress', 1), else_=0)),
+        func.sum(case((status == 'Completed', 1), else_=0)),
+    ).group_by(group)
+
+
+def record_snapshot(taken_at=None):
+    """Append the current per-work-center and per-job aggregates.
+
+    Each scope is one INSERT ... SELECT ... GROUP BY, so the rows never
+    leave the database. Backlog hours are the remaining hours of open
+    operations scheduled before the snapshot date, as in the work center
+    rollups. Does not commit. Returns the number of rows written per scope.
+    """
+    taken_at = taken_at or datetime.utcnow()
+    snapshot_date = taken_at.date()
+    ensure_partition(snapshot_date)
+    columns = ['snapshot_date', 'taken_at', 'scope', 'name', *METRICS]
+    sources = {
+        'work_center': _aggregate_select('work_center', Operation.work_center, snapshot_date, taken_at),
+        'job': _aggregate_select('job', Job.job_number, snapshot_date, taken_at)
+        .select_from(Operation).join(WorkOrder, WorkOrder.id == Operation.work_order_id).join(Job, Job.id == WorkOrder.job_id),
+    }
+    written = {}
+    for scope, source in sources.items():
+        written[scope] = db.session.execute(insert(PlantSnapshot).from_select(columns, source)).rowcount
+    return written
+
+
+def _check_scope(scope):
+    if scope not in SCOPES:
+        raise ValueError(f"scope must be one of {', '.join(SCOPES)}")
+
+
+def _metrics(row):
+    return {metric: round(getattr(row, metric), 2) if metric.endswith('_hours') else getattr(row, metric) for metric in METRICS}
+
+
+def snapshot_as_of(day, scope='work_center', names=None):
+    """The last snapshot taken on or before day; items maps name to metrics."""
+    _check_scope(scope)
+    in_scope = PlantSnapshot.scope == scope
+    snapshot_date = db.session.query(func.max(PlantSnapshot.snapshot_date)).filter(
+        in_scope, PlantSnapshot.snapshot_date <= day,
+    ).scalar()
+    if snapshot_date is None:
+        return {"as_of": day.isoformat(), "snapshot_date": None, "taken_at": None, "items": {}}
+    taken_at = db.session.query(func.max(PlantSnapshot.taken_at)).filter(
+        in_scope, PlantSnapshot.snapshot_date == snapshot_date,
+    ).scalar()
+
+    query = db.session.query(PlantSnapshot.name, *(getattr(PlantSnapshot, m) for m in METRICS)).filter(
+        in_scope, PlantSnapshot.snapshot_date == snapshot_date, PlantSnapshot.taken_at == taken_at,
+    )
+    if names:
+        query = query.filter(PlantSnapshot.name.in_(names))
+    return {
+        "as_of": day.isoformat(),
+        "snapshot_date": snapshot_date.isoformat(),
+        "taken_at": taken_at.isoformat(),
+        "items": {row.name: _metrics(row) for row in query.order_by(PlantSnapshot.name)},
+    }
+
+
+def snapshot_trend(start, end, scope='work_center', names=None):
+    """Daily series between start and end from each day's last snapshot.
+
+    series maps each name to [{"date", metrics...}, ...]; days without an
+    ingest have no point.
+    """
+    _check_scope(scope)
+    if end < start:
+        raise ValueError("end_date must not be before start_date")
+    if (end - start).days >= MAX_TREND_DAYS:
+        raise ValueError(f"date range is limited to {MAX_TREND_DAYS} days")
+
+    # Each day's last snapshot, found through its few work center rows
+    last = db.session.query(PlantSnapshot.snapshot_date, func.max(PlantSnapshot.taken_at)).filter(
+        PlantSnapshot.scope == 'work_center', PlantSnapshot.snapshot_date >= start, PlantSnapshot.snapshot_date <= end,
+    ).group_by(PlantSnapshot.snapshot_date).all()
+    if not last:
+        return {"start_date": start.isoformat(), "end_date": end.isoformat(), "series": {}}
+
+    query = db.session.query(
+        PlantSnapshot.snapshot_date, PlantSnapshot.taken_at, PlantSnapshot.name, *(getattr(PlantSnapshot, m) for m in METRICS),
+    ).filter(PlantSnapshot.scope == scope, PlantSnapshot.snapshot_date >= start, PlantSnapshot.snapshot_date <= end)
+    if names:
+        query = query.filter(PlantSnapshot.name.in_(names))
+
+    # Earlier snapshots of the same day are dropped here rather than in SQL,
+    # which keeps named lookups on the (scope, name) index
+    keep = {tuple(row) for row in last}
+    series = {}
+    for row in query.order_by(PlantSnapshot.name, PlantSnapshot.snapshot_date):
+        if (row.snapshot_date, row.taken_at) in keep:
+            series.setdefault(row.name, []).append({"date": row.snapshot_date.isoformat(), **_metrics(row)})
+    return {"start_date": start.isoformat(), "end_date": end.isoformat(), "series": series}
+
+
+def take_snapshot():
+    """Record and commit a snapshot; failures are logged, not raised."""
+    started = time.perf_counter()
+    try:
+        written = record_snapshot()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        logger.exception("Error recording plant snapshot")
+        return None
+    # /api/history responses cached since the ingest's own bump predate the snapshot
+    bump_dataset_version("snapshot")
+    logger.info(f"Plant snapshot of {written} rows in {time.perf_counter() - started:.2f}s")
+    return written
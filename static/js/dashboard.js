@@ -9,6 +9,9 @@ document.addEventListener('DOMContentLoaded', function() {
 
     let workCenterChart = null;
     let isLoading = false; // Prevent multiple requests
+    // Last loaded payloads, patched in place by /api/events updates
+    let workCenterState = {};
+    let jobsState = [];
 
     // File upload handling
     const uploadForm = document.getElementById('uploadForm');
@@ -43,17 +46,12 @@ document.addEventListener('DOMContentLoaded', function() {
             })
             .then(response => response.json())
             .then(data => {
-                if (uploadStatus) uploadStatus.style.display = 'none';
-                if (uploadButton) uploadButton.disabled = false;
-
-                if (data.status === "success") {
-                    if (typeof showAlert === 'function') {
-                        showAlert('File uploaded and processed successfully!', 'success');
-                    } else {
-                        alert('✅ File uploaded and processed successfully!');
-                    }
-                    loadDashboardData(); // Refresh dashboard data after successful upload
+                if (data.job_id) {
+                    // Ingest runs in the background; follow its progress stream
+                    followUploadJob(data.job_id, uploadStatus, uploadButton);
                 } else {
+                    if (uploadStatus) uploadStatus.style.display = 'none';
+                    if (uploadButton) uploadButton.disabled = false;
                     if (typeof showAlert === 'function') {
                         showAlert('Error: ' + (data.error || 'Upload failed'), 'danger');
                     } else {
@@ -75,6 +73,48 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    function followUploadJob(jobId, uploadStatus, uploadButton) {
+        const source = new EventSource(`/api/upload/${jobId}/events`);
+
+        source.addEventListener('progress', event => {
+            const job = JSON.parse(event.data);
+            if (uploadStatus) {
+                const percent = job.rows_total ? Math.round(job.rows_written / job.rows_total * 100) : null;
+                const eta = job.eta_seconds !== null ? `, ~${Math.ceil(job.eta_seconds)}s left` : '';
+                uploadStatus.textContent = `Processing (${job.phase}${percent !== null ? ` ${percent}%` : ''}${eta})...`;
+            }
+            if (job.status !== 'succeeded' && job.status !== 'failed') return;
+
+            source.close();
+            if (uploadStatus) uploadStatus.style.display = 'none';
+            if (uploadButton) uploadButton.disabled = false;
+
+            if (job.status === 'succeeded') {
+                if (typeof showAlert === 'function') {
+                    showAlert('File uploaded and processed successfully!', 'success');
+                } else {
+                    alert('✅ File uploaded and processed successfully!');
+                }
+                loadDashboardData(); // Refresh dashboard data after successful upload
+            } else if (typeof showAlert === 'function') {
+                showAlert('Error: ' + (job.error || 'Processing failed'), 'danger');
+            } else {
+                alert('❌ Error: ' + (job.error || 'Processing failed'));
+            }
+        });
+
+        source.onerror = () => {
+            // The browser reconnects on its own; only give up once the job is gone
+            fetch(`/api/upload/${jobId}`).then(res => {
+                if (res.status === 404) {
+                    source.close();
+                    if (uploadStatus) uploadStatus.style.display = 'none';
+                    if (uploadButton) uploadButton.disabled = false;
+                }
+            });
+        };
+    }
+
     function loadDashboardData() {
         if (isLoading) return; // Prevent duplicate calls
         isLoading = true;
@@ -90,6 +130,8 @@ document.addEventListener('DOMContentLoaded', function() {
             console.log("🚀 Received work centers:", Object.keys(workCenterData).length);
             console.log("🚀 Received jobs:", jobsData.length);
 
+            workCenterState = workCenterData;
+            jobsState = jobsData;
             updateWorkCenterChart(workCenterData);
             updateEfficiencyMetrics(workCenterData);
             updateActiveJobs(jobsData);
@@ -99,7 +141,6 @@ document.addEventListener('DOMContentLoaded', function() {
         .finally(() => {
             if (uploadStatus) uploadStatus.style.display = 'none';
             isLoading = false; // Allow next request
-            setTimeout(loadDashboardData, 300000); // Wait 5 minutes before calling again
         })
         .catch(error => {
             console.error('❌ Error loading dashboard data:', error);
@@ -112,6 +153,36 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    // Patch the loaded state from change events instead of polling the full payloads
+    function subscribeDashboardUpdates() {
+        if (typeof subscribeToUpdates !== 'function') return;
+
+        subscribeToUpdates({
+            rollup: data => {
+                applyRollupEvent(workCenterState, data);
+                updateWorkCenterChart(workCenterState);
+                updateEfficiencyMetrics(workCenterState);
+                updateStatusCards(jobsState, workCenterState);
+            },
+            schedule: data => {
+                if (data.truncated) {
+                    loadDashboardData();
+                    return;
+                }
+                const moves = new Map((data.operations || []).map(move => [move.id, move.scheduled_date]));
+                jobsState.forEach(job => (job.work_orders || []).forEach(wo => (wo.operations || []).forEach(op => {
+                    if (moves.has(op.id)) op.scheduled_date = moves.get(op.id);
+                })));
+                updateUpcomingDeadlines(jobsState);
+                updateStatusCards(jobsState, workCenterState);
+            },
+            ingest: data => {
+                if (data.dataset === 'sapdata') loadDashboardData();
+            },
+            resync: () => loadDashboardData()
+        });
+    }
+
     function updateWorkCenterChart(data) {
         const chartElement = document.getElementById('workCenterChart');
         if (!chartElement) {
@@ -598,4 +669,5 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Initial load
     loadDashboardData();
+    subscribeDashboardUpdates();
 });
\ No newline at end of file
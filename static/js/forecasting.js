@@ -20,6 +20,7 @@ let jobsData = [];
 document.addEventListener('DOMContentLoaded', function() {
     console.log("📊 Initializing forecasting page...");
     loadForecastingData();
+    subscribeForecastUpdates();
     
     // Set up generate forecast button
     const generateForecastBtn = document.getElementById('generateForecastBtn');
@@ -46,10 +47,7 @@ function loadForecastingData() {
         
         // Initialize UI components
         initWorkCenterSelect(workCenters);
-        initForecastChart(forecast);
-        initEfficiencyChart(forecast);
-        initCompletionChart(forecast);
-        displayForecastTable(forecast);
+        renderForecast(forecast);
     })
     .catch(error => {
         console.error("❌ Error loading forecast data:", error);
@@ -57,6 +55,34 @@ function loadForecastingData() {
     });
 }
 
+function renderForecast(forecast) {
+    initForecastChart(forecast);
+    initEfficiencyChart(forecast);
+    initCompletionChart(forecast);
+    displayForecastTable(forecast);
+}
+
+// The forecast is computed server-side, so change events only refetch /api/forecast
+function subscribeForecastUpdates() {
+    if (typeof subscribeToUpdates !== 'function') return;
+
+    const refreshForecast = () => fetch('/api/forecast')
+        .then(res => res.json())
+        .then(renderForecast)
+        .catch(error => console.error("❌ Error refreshing forecast:", error));
+
+    subscribeToUpdates({
+        rollup: data => {
+            const known = Object.keys(workCentersData).length;
+            applyRollupEvent(workCentersData, data);
+            if (Object.keys(workCentersData).length !== known) initWorkCenterSelect(workCentersData);
+            refreshForecast();
+        },
+        ingest: refreshForecast,
+        resync: () => loadForecastingData()
+    });
+}
+
 // Initialize work center select dropdown
 function initWorkCenterSelect(workCenters) {
     const select = document.getElementById('workCenterSelect');
@@ -72,6 +72,36 @@ function createProgressBar(percentage) {
     `;
 }
 
+// Live change events from /api/events. handlers maps an event type
+// (ingest, schedule, ncr, rollup, resync) to a callback taking the parsed
+// payload; EventSource reconnects on its own and resumes after the last id.
+function subscribeToUpdates(handlers) {
+    if (typeof EventSource === 'undefined') return null;
+    const source = new EventSource('/api/events');
+    Object.entries(handlers).forEach(([type, handler]) => {
+        source.addEventListener(type, event => {
+            try {
+                handler(JSON.parse(event.data));
+            } catch (error) {
+                console.error(`❌ Error handling ${type} event:`, error);
+            }
+        });
+    });
+    return source;
+}
+
+// Apply a rollup event to a {work_center: metrics} map; idle centers are removed
+function applyRollupEvent(workCenters, data) {
+    Object.entries(data.work_centers || {}).forEach(([name, metrics]) => {
+        if (metrics.load_status === 'Idle') {
+            delete workCenters[name];
+        } else {
+            workCenters[name] = metrics;
+        }
+    });
+    return workCenters;
+}
+
 // Export functions for use in other modules
 if (typeof module !== 'undefined' && module.exports) {
     module.exports = {
@@ -80,7 +110,9 @@ if (typeof module !== 'undefined' && module.exports) {
         calculateEfficiency,
         getStatusColor,
         getPriorityLabel,
-        createProgressBar
+        createProgressBar,
+        subscribeToUpdates,
+        applyRollupEvent
     };
 }
 function showAlert(message, type = 'info', duration = 3000) {
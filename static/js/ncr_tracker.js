@@ -0,0 +1,84 @@
+document.addEventListener("DOMContentLoaded", () => {
+    loadNCRData();
+    loadNCRSummary();
+});
+
+const NCR_PAGE_SIZE = 50;
+let ncrNextCursor = null;
+
+// Fetch one keyset page of /api/ncr; append=true continues after the last page
+async function loadNCRData(append = false) {
+    console.log("📡 Fetching NCR data...");
+    
+    let tableBody = document.getElementById("ncrTableBody");
+    if (!tableBody) {
+        console.error("❌ NCR table body not found.");
+        return;
+    }
+
+    try {
+        let url = `/api/ncr?limit=${NCR_PAGE_SIZE}`;
+        if (append && ncrNextCursor) url += `&cursor=${encodeURIComponent(ncrNextCursor)}`;
+        let response = await fetch(url);
+        if (!response.ok) throw new Error("❌ Failed to fetch NCR data");
+
+        let page = await response.json();
+        let ncrData = page.ncrs;
+        ncrNextCursor = page.next_cursor;
+        console.log("✅ NCR Data Loaded:", ncrData);
+
+        if (!append) tableBody.innerHTML = "";
+        if (ncrData.length === 0 && !append) {
+            console.warn("⚠️ No NCR records found.");
+            tableBody.innerHTML = `<tr><td colspan="8" class="text-center">No NCR records found.</td></tr>`;
+        }
+
+        let fragment = document.createDocumentFragment();
+        ncrData.forEach(ncr => {
+            let row = document.createElement("tr");
+            row.innerHTML = `
+                <td>${ncr.ncr_number || "N/A"}</td>
+                <td>${ncr.job_number || "N/A"}</td>
+                <td>${ncr.work_order || "N/A"}</td>
+                <td>${ncr.operation_number || "N/A"}</td>
+                <td>${ncr.planned_hours || "0"}</td>
+                <td>${ncr.actual_hours || "0"}</td>
+                <td>${ncr.issue_description || "N/A"}</td>
+                <td>${ncr.status || "Unknown"}</td>
+            `;
+            fragment.appendChild(row);
+        });
+        tableBody.appendChild(fragment);
+
+        let loadMore = document.getElementById("ncrLoadMore");
+        if (loadMore) loadMore.style.display = ncrNextCursor ? "" : "none";
+
+        console.log(`✅ Table updated with ${ncrData.length} records.`);
+
+    } catch (error) {
+        console.error("❌ Error loading NCR data:", error);
+    }
+}
+
+// Per-category counts, overrun hours and cost, aggregated server-side
+async function loadNCRSummary() {
+    let summaryBody = document.getElementById("ncrSummaryBody");
+    if (!summaryBody) return;
+
+    try {
+        let response = await fetch("/api/ncr/summary?group_by=category");
+        if (!response.ok) throw new Error("❌ Failed to fetch NCR summary");
+
+        let summary = await response.json();
+        summaryBody.innerHTML = summary.groups.map(group => `
+            <tr>
+                <td>${group.group || "Uncategorized"}</td>
+                <td>${group.count}</td>
+                <td>${group.overrun_hours.toFixed(2)}</td>
+                <td>$${group.financial_impact.toFixed(2)}</td>
+            </tr>
+        `).join("") || `<tr><td colspan="4" class="text-center">No NCR records found.</td></tr>`;
+    } catch (error) {
+        console.error("❌ Error loading NCR summary:", error);
+    }
+}
@@ -13,6 +13,7 @@ let operationsData = [];
 document.addEventListener('DOMContentLoaded', function() {
     console.log("📅 Initializing scheduling page...");
     loadSchedulingData();
+    subscribeSchedulingUpdates();
     
     // Initialize save operation button
     const saveOperationBtn = document.getElementById('saveOperationBtn');
@@ -59,6 +60,34 @@ function loadSchedulingData() {
     });
 }
 
+// Patch operations and work centers from /api/events instead of refetching /api/jobs
+function subscribeSchedulingUpdates() {
+    if (typeof subscribeToUpdates !== 'function') return;
+
+    subscribeToUpdates({
+        schedule: data => {
+            if (data.truncated) {
+                loadSchedulingData();
+                return;
+            }
+            const moves = new Map((data.operations || []).map(move => [String(move.id), move.scheduled_date]));
+            operationsData.forEach(op => {
+                if (moves.has(op.id)) op.scheduled_date = new Date(moves.get(op.id));
+            });
+            applyFilters();
+        },
+        rollup: data => {
+            const known = Object.keys(workCentersData).length;
+            applyRollupEvent(workCentersData, data);
+            if (Object.keys(workCentersData).length !== known) initWorkCenterFilter(workCentersData);
+        },
+        ingest: data => {
+            if (data.dataset === 'sapdata') loadSchedulingData();
+        },
+        resync: () => loadSchedulingData()
+    });
+}
+
 // Initialize work center filter dropdown
 function initWorkCenterFilter(workCenters) {
     const filter = document.getElementById('workCenterFilter');
@@ -128,7 +157,8 @@ function initCalendar(operations) {
         };
     }).filter(event => event !== null);
     
-    // Initialize calendar
+    // Initialize calendar (re-rendering after filters or moves replaces the old one)
+    if (calendar) calendar.destroy();
     calendar = new FullCalendar.Calendar(calendarEl, {
         initialView: 'dayGridMonth',
         headerToolbar: {
@@ -145,8 +175,8 @@ function initCalendar(operations) {
             const operation = info.event.extendedProps.operation;
             const newDate = info.event.start;
             
-            // Update operation scheduled date
-            updateScheduledDate(operation, newDate);
+            // Update operation scheduled date; put the event back if the server refuses
+            updateScheduledDate(operation, newDate, info.revert);
         }
     });
     
@@ -346,22 +376,44 @@ function saveOperation() {
 }
 
 // Update operation scheduled date
-function updateScheduledDate(operation, newDate) {
+function updateScheduledDate(operation, newDate, revert) {
     // Find operation in data
     const op = operationsData.find(o => o.id === operation.id);
     if (!op) return;
-    
-    // Update scheduled date
-    op.scheduled_date = newDate.toISOString();
-    
-    // In a real app, you would send the updated data to the server here
-    // For demo purposes, we'll just update the UI
-    
-    // Refresh table
-    displayScheduleTable(operationsData);
-    displayUnscheduledOperations(operationsData);
-    
-    showAlert("Operation rescheduled successfully", "success");
+
+    // The dropped operation and the later ones of its work order shift by the
+    // same number of days, sent as one batch
+    const dayMs = 24 * 60 * 60 * 1000;
+    const shiftDays = op.scheduled_date ? Math.round((newDate - new Date(op.scheduled_date)) / dayMs) : 0;
+    const affected = operationsData.filter(o =>
+        o === op || (o.work_order_number === op.work_order_number &&
+                     o.operation_number > op.operation_number && o.scheduled_date && shiftDays !== 0)
+    );
+    const targets = affected.map(o => ({
+        op: o,
+        date: o === op ? newDate : new Date(new Date(o.scheduled_date).getTime() + shiftDays * dayMs)
+    }));
+
+    fetch('/api/schedule/batch', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            moves: targets.map(t => ({ operation_id: Number(t.op.id), new_date: t.date.toISOString().split('T')[0] }))
+        })
+    })
+    .then(res => res.json().then(data => ({ ok: res.ok, data })))
+    .then(({ ok, data }) => {
+        if (!ok) throw new Error(data.error || `${data.failed} move(s) failed`);
+
+        targets.forEach(t => { t.op.scheduled_date = t.date; });
+        applyFilters();
+        showAlert(`Rescheduled ${data.applied} operation(s)`, "success");
+    })
+    .catch(error => {
+        console.error("❌ Error rescheduling:", error);
+        if (revert) revert();
+        showAlert("Error rescheduling operation: " + error.message, "danger");
+    });
 }
 
 // Apply filters to calendar and table
@@ -408,7 +460,7 @@ function extractOperations(jobs) {
             
             workOrder.operations.forEach(operation => {
                 operations.push({
-                    id: id.toString(),
+                    id: operation.id != null ? operation.id.toString() : id.toString(),
                     job_number: job.job_number,
                     work_order_number: workOrder.work_order_number,
                     operation_number: operation.operation_number,
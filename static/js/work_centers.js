@@ -26,11 +26,14 @@ function showLoadingState(container, isLoading) {
 // Global variables
 let workloadChart = null;
 let efficiencyChart = null;
+let workCentersState = {};
+let jobsState = [];
 
 // Load data on page load
 document.addEventListener('DOMContentLoaded', function() {
     console.log("🏭 Initializing work centers page...");
     loadWorkCentersData();
+    subscribeWorkCenterUpdates();
     
     // Set up refresh button
     const refreshBtn = document.getElementById('refreshBtn');
@@ -52,14 +55,9 @@ function loadWorkCentersData() {
         console.log("✅ Work centers data loaded:", {workCenters, jobs});
         
         // Extract work center data from API response
-        const workCenterData = workCenters.workCenters || workCenters;
-        
-        displayWorkCenters(workCenterData, jobs);
-        createWorkloadChart(workCenterData);
-        createEfficiencyChart(workCenterData);
-        
-        // Add click handlers for details buttons
-        setupDetailButtons(workCenterData);
+        workCentersState = workCenters.workCenters || workCenters;
+        jobsState = jobs;
+        renderWorkCenters();
     })
     .catch(error => {
         console.error("❌ Error loading work centers data:", error);
@@ -67,6 +65,31 @@ function loadWorkCentersData() {
     });
 }
 
+function renderWorkCenters() {
+    displayWorkCenters(workCentersState, jobsState);
+    createWorkloadChart(workCentersState);
+    createEfficiencyChart(workCentersState);
+
+    // Add click handlers for details buttons
+    setupDetailButtons(workCentersState);
+}
+
+// Rollup events carry the changed work centers in the /api/work_centers shape
+function subscribeWorkCenterUpdates() {
+    if (typeof subscribeToUpdates !== 'function') return;
+
+    subscribeToUpdates({
+        rollup: data => {
+            applyRollupEvent(workCentersState, data);
+            renderWorkCenters();
+        },
+        ingest: data => {
+            if (data.dataset === 'sapdata') loadWorkCentersData();
+        },
+        resync: () => loadWorkCentersData()
+    });
+}
+
 // Display work centers in table
 function displayWorkCenters(workCenters, jobsData) {
     showLoadingState('workCentersTable');
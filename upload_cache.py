@@ -0,0 +1,154 @@
+import os
+import uuid
+import shutil
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+from app import app
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever column normalization or typing of parsed uploads changes;
+# entries written under another version are never read and get evicted.
+SCHEMA_VERSION = 2
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def cache_dir():
+    return os.path.join(app.config.get("UPLOAD_FOLDER", "uploads"), "parsed_cache")
+
+
+def file_fingerprint(file_path, block_size=1024 * 1024):
+    """SHA-256 of the file contents."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _entry_path(kind, digest):
+    return os.path.join(cache_dir(), f"v{SCHEMA_VERSION}-{kind}-{digest}")
+
+
+def _encode_column(series, prefix, arrays):
+    """Store one column as plain NumPy arrays; returns its kind tag."""
+    mask = series.isna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        arrays[f"{prefix}.values"] = series.to_numpy(dtype="datetime64[ns]").view("int64")
+        arrays[f"{prefix}.mask"] = mask
+        return "datetime"
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        arrays[f"{prefix}.values"] = series.to_numpy(dtype="float64", na_value=np.nan) if mask.any() else series.to_numpy()
+        return "numeric"
+    # Everything else is dictionary-encoded text, which keeps low-cardinality
+    # SAP columns (work centers, statuses, names) small on disk
+    text = series.where(~mask, "").astype(str).to_numpy(dtype=str)
+    uniques, codes = np.unique(text, return_inverse=True)
+    arrays[f"{prefix}.values"] = uniques
+    arrays[f"{prefix}.codes"] = codes.astype(np.int32)
+    arrays[f"{prefix}.mask"] = mask
+    return "text"
+
+
+def _decode_column(kind, prefix, data):
+    values = data[f"{prefix}.values"]
+    if kind == "numeric":
+        return pd.Series(values)
+    mask = data[f"{prefix}.mask"]
+    if kind == "datetime":
+        series = pd.Series(values.view("datetime64[ns]"))
+        return series.mask(mask)
+    series = pd.Series(values[data[f"{prefix}.codes"]], dtype=object)
+    return series.mask(mask, None)
+
+
+def write_frame(frame, path):
+    """Write a DataFrame as an uncompressed, pickle-free .npz file."""
+    arrays = {"__columns__": np.array(frame.columns, dtype=str)}
+    kinds = []
+    for i, column in enumerate(frame.columns):
+        kinds.append(_encode_column(frame[column].reset_index(drop=True), str(i), arrays))
+    arrays["__kinds__"] = np.array(kinds, dtype=str)
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+
+def read_frame(path):
+    with np.load(path, allow_pickle=False) as data:
+        columns = list(data["__columns__"])
+        kinds = list(data["__kinds__"])
+        return pd.DataFrame({
+            column: _decode_column(kind, str(i), data)
+            for i, (column, kind) in enumerate(zip(columns, kinds))
+        })
+
+
+def _entries():
+    """Complete cache entries as (path, size, mtime)."""
+    root = cache_dir()
+    if not os.path.isdir(root):
+        return []
+    entries = []
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if ".tmp-" in name or not os.path.isdir(path):
+            continue
+        size = sum(os.path.getsize(os.path.join(path, part)) for part in os.listdir(path))
+        entries.append((path, size, os.path.getmtime(path)))
+    return entries
+
+
+def evict(max_bytes=None):
+    """Drop stale-schema entries, then least recently used ones above max_bytes."""
+    if max_bytes is None:
+        max_bytes = app.config.get("UPLOAD_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)
+    prefix = f"v{SCHEMA_VERSION}-"
+    live = []
+    for path, size, mtime in _entries():
+        if os.path.basename(path).startswith(prefix):
+            live.append((path, size, mtime))
+        else:
+            shutil.rmtree(path, ignore_errors=True)
+
+    total = sum(size for _, size, _ in live)
+    for path, size, _ in sorted(live, key=lambda entry: entry[2]):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        logger.info(f"Evicted parsed upload cache entry {os.path.basename(path)}")
+
+
+def iter_cached_chunks(file_path, kind, read_chunks):
+    """Yield the parsed chunks of file_path, reusing a previous parse if possible.
+
+    On a miss, read_chunks() is consumed and every chunk is written to the
+    cache as it is yielded, so memory stays bounded by one chunk either way.
+    The entry only becomes visible once the whole file was parsed.
+    """
+    if not app.config.get("UPLOAD_CACHE_ENABLED", True):
+        yield from read_chunks()
+        return
+
+    entry = _entry_path(kind, file_fingerprint(file_path))
+    if os.path.isdir(entry):
+        logger.info(f"Parsed upload cache hit for {os.path.basename(file_path)}")
+        os.utime(entry)
+        for part in sorted(os.listdir(entry)):
+            yield read_frame(os.path.join(entry, part))
+        return
+
+    staging = f"{entry}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(staging)
+    try:
+        for i, chunk in enumerate(read_chunks()):
+            write_frame(chunk, os.path.join(staging, f"part-{i:05d}.npz"))
+            yield chunk
+        if not os.path.isdir(entry):
+            os.replace(staging, entry)
+        evict()
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
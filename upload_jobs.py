@@ -0,0 +1,129 @@
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from app import app
+import events
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept around for status lookups
+MAX_FINISHED_JOBS = 100
+
+FINISHED_STATES = ("succeeded", "failed")
+
+
+class UploadJob:
+    """Progress record for one background upload ingest."""
+
+    def __init__(self, dataset, filename, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.dataset = dataset
+        self.filename = filename
+        self.status = "queued"
+        self.phase = "queued"
+        self.rows_total = None
+        self.rows_parsed = 0
+        self.rows_written = 0
+        self.summary = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.write_started_at = None
+        self.finished_at = None
+        self.version = 0
+        self.changed = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def update(self, phase=None, **counts):
+        """Record progress; used as the processors' progress callback."""
+        with self.changed:
+            if phase:
+                self.phase = phase
+            for name, value in counts.items():
+                setattr(self, name, value)
+            if counts.get("rows_written") and self.write_started_at is None:
+                self.write_started_at = time.time()
+            self.version += 1
+            self.changed.notify_all()
+
+    def wait_for_change(self, seen_version, timeout):
+        """Block until the job moves past seen_version; returns the new version."""
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != seen_version, timeout=timeout)
+            return self.version
+
+    def eta_seconds(self):
+        """Estimate remaining time from the write rate so far."""
+        if self.finished or not self.rows_total or not self.write_started_at or not self.rows_written:
+            return None
+        elapsed = time.time() - self.write_started_at
+        remaining = max(self.rows_total - self.rows_written, 0)
+        return round(elapsed / self.rows_written * remaining, 1)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "dataset": self.dataset,
+            "filename": self.filename,
+            "status": self.status,
+            "phase": self.phase,
+            "rows_total": self.rows_total,
+            "rows_parsed": self.rows_parsed,
+            "rows_written": self.rows_written,
+            "eta_seconds": self.eta_seconds(),
+            "elapsed_seconds": round((self.finished_at or time.time()) - self.started_at, 1) if self.started_at else None,
+            "summary": self.summary,
+            "error": self.error,
+        }
+
+
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+# One lock per dataset so two uploads of the same data never ingest concurrently
+_dataset_locks = defaultdict(threading.Lock)
+
+
+def create(dataset, filename, job_id=None):
+    """Register a new queued upload job."""
+    job = UploadJob(dataset, filename, job_id)
+    with _jobs_lock:
+        _jobs[job.id] = job
+        _prune()
+    return job
+
+
+def get(job_id):
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def _prune():
+    finished = [job_id for job_id, job in _jobs.items() if job.finished]
+    for job_id in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+        del _jobs[job_id]
+
+
+def start(executor, job, processor, filepath):
+    """Run processor(filepath, progress=...) for job on executor."""
+    return executor.submit(_run, job, processor, filepath)
+
+
+def _run(job, processor, filepath):
+    with _dataset_locks[job.dataset]:
+        job.started_at = time.time()
+        job.update(phase="starting", status="running")
+        try:
+            with app.app_context():
+                summary = processor(filepath, progress=job.update)
+            job.finished_at = time.time()
+            job.update(phase="done", status="succeeded", summary=summary)
+            events.publish("ingest", {"dataset": job.dataset, "job_id": job.id, "filename": job.filename, "summary": summary})
+        except Exception as e:
+            logger.exception(f"Upload job {job.id} failed")
+            job.finished_at = time.time()
+            job.update(phase="failed", status="failed", error=str(e))
@@ -1,11 +1,15 @@
 
 import os
+import time
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
 from models import Job, WorkOrder, Operation
 from app import db
+from ingest import bulk_load_sapdata, delta_sync_sapdata, DEFAULT_CUSTOMER
+from rollups import refresh_work_center_rollups
+from api_cache import bump_dataset_version
 
 logger = logging.getLogger(__name__)
 
@@ -20,9 +24,32 @@ logger = logging.getLogger(__name__)
         
         # ... (rest of the code)
 
-def process_sapdata(df):
-    """Process uploaded SAPDATA Excel file and update database"""
+def process_sapdata(df, mode="bulk", progress=None):
+    """Process uploaded SAPDATA Excel file and update database
+
+    mode="bulk" derives all tables with pandas and writes them in batches
+    (see ingest.bulk_load_sapdata), mode="delta" only writes rows that changed
+    since the last upload (see ingest.delta_sync_sapdata; df may also be an
+    iterable of chunks there) and mode="row" is the original per-row loop.
+    """
+    if mode == "bulk":
+        stats = bulk_load_sapdata(df)
+        refresh_work_center_rollups()
+        db.session.commit()
+        bump_dataset_version("sapdata")
+        return stats
+    if mode == "delta":
+        summary = delta_sync_sapdata(df, progress=progress)
+        # Untouched work centers' backlog moves with the date too, so refresh them all
+        refresh_work_center_rollups()
+        db.session.commit()
+        bump_dataset_version("sapdata")
+        return summary
+    if mode != "row":
+        raise ValueError(f"Unknown SAPDATA ingest mode: {mode}")
+
     try:
+        started = time.perf_counter()
         logging.info(f"Starting SAPDATA processing with {len(df)} rows")
         
         # Clear existing data
@@ -33,6 +60,7 @@ def process_sapdata(df):
         
         job_cache = {}
         work_order_cache = {}
+        operation_cache = {}
         
         # Process each row
         for idx, row in df.iterrows():
@@ -40,7 +68,7 @@ def process_sapdata(df):
                 # Create job
                 job_number = str(row['Order']).strip()
                 if job_number not in job_cache:
-                    job = Job(job_number=job_number)
+                    job = Job(job_number=job_number, customer_name=DEFAULT_CUSTOMER)
                     db.session.add(job)
                     db.session.flush()
                     job_cache[job_number] = job
@@ -57,17 +85,29 @@ def process_sapdata(df):
                     db.session.flush()
                     work_order_cache[wo_key] = work_order
                 
-                # Create operation
-                operation = Operation(
-                    operation_number=int(row['Oper./Act.']),
+                # Create operation; a repeated (order, operation) line updates the
+                # one already added (last wins, as in bulk mode) instead of
+                # violating uq_operation_work_order_operation
+                values = dict(
                     work_center=str(row['Oper.WorkCenter']),
                     planned_hours=float(row['Work']),
                     actual_hours=float(row['Actual work']) if pd.notna(row['Actual work']) else 0,
                     status='Completed' if pd.notna(row['Actual work']) and float(row['Actual work']) >= float(row['Work']) else 'In Progress',
                     scheduled_date=datetime.now().date(),
-                    work_order_id=work_order_cache[wo_key].id
                 )
-                db.session.add(operation)
+                op_key = (wo_key, int(row['Oper./Act.']))
+                operation = operation_cache.get(op_key)
+                if operation is None:
+                    operation = Operation(
+                        operation_number=op_key[1],
+                        work_order_id=work_order_cache[wo_key].id,
+                        **values
+                    )
+                    db.session.add(operation)
+                    operation_cache[op_key] = operation
+                else:
+                    for field, value in values.items():
+                        setattr(operation, field, value)
                 
                 if idx % 100 == 0:
                     db.session.commit()
@@ -76,24 +116,15 @@ def process_sapdata(df):
                 logging.error(f"Error processing row {idx}: {str(e)}")
                 continue
                 
+        refresh_work_center_rollups()
         db.session.commit()
+        bump_dataset_version("sapdata")
+        elapsed = time.perf_counter() - started
+        logging.info(f"Row-by-row SAPDATA ingest: {len(df)} rows in {elapsed:.3f}s "
+                     f"({len(df) / elapsed if elapsed else 0:.0f} rows/s)")
         return True
         
     except Exception as e:
         logging.error(f"Error processing SAPDATA: {str(e)}")
         db.session.rollback()
         raise
-
-def calculate_forecast(operations):
-    """Calculate forecasted completion time based on current progress"""
-    total_planned = sum(op.planned_hours for op in operations)
-    total_actual = sum(op.actual_hours for op in operations)
-    
-    if total_planned == 0 or total_actual == 0:
-        return total_planned
-    
-    progress_rate = total_actual / total_planned
-    if progress_rate == 0:
-        return total_planned * 1.1  # Add 10% buffer
-    
-    return total_planned / progress_rate